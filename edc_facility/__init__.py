@@ -2,5 +2,13 @@ from importlib.metadata import version
 
 __version__ = version("edc_facility")
 
-from .facility import Facility
 from .import_holidays import import_holidays
+
+
+def __getattr__(name):
+    # imported on first use, not on startup. See `startup_profile`.
+    if name == "Facility":
+        from .facility import Facility
+
+        return Facility
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Iterable
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from edc_utils import convert_php_dateformat, get_utcnow
+from edc_utils.date import to_local
+
+from .engines import UTC, as_utc, get_candidate_holiday_set, get_window
+from .exceptions import FacilityError
+from .min_cost_flow import MinCostFlow
+
+if TYPE_CHECKING:
+    from .capacity import SlotCounter
+    from .facility import Facility
+    from .taken_dates import TakenDates
+
+
+class BulkScheduler:
+    """Assigns many suggested datetimes to available dates at a
+    facility at once.
+
+    The assignment minimizes the total number of days moved from
+    the suggested dates while respecting the facility's days,
+    holidays, taken dates and the slots per day. Unlike resolving
+    requests one at a time, requests are not all put on the first
+    open day when days are at capacity.
+
+    Requests with the same suggested date and window are grouped
+    and the grouped problem is solved as a min-cost flow from
+    groups to days. See `MinCostFlow`.
+
+    Slots already booked are counted if a `SlotCounter` is given.
+    """
+
+    def __init__(
+        self,
+        facility: Facility,
+        taken_dates: TakenDates,
+        holiday_dates: frozenset[date] | None,
+        slot_counter: SlotCounter | None = None,
+    ) -> None:
+        self.facility = facility
+        self.taken_dates = taken_dates
+        self.holiday_dates = holiday_dates
+        self.slot_counter = slot_counter
+        self.candidate_holidays = get_candidate_holiday_set(holiday_dates or frozenset())
+        self._open_dates: dict[date, bool] = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(facility={self.facility.name})"
+
+    def capacity(self, candidate_date: date) -> int:
+        """Returns the number of open slots on this date."""
+        slots = self.facility.slots_by_weekday.get(candidate_date.weekday(), 0)
+        if self.slot_counter:
+            slots -= self.slot_counter.count(candidate_date)
+        return max(slots, 0)
+
+    def is_open(self, candidate_date: date) -> bool:
+        """Returns True if a date other than the suggested date is
+        available, ignoring slots.
+        """
+        try:
+            return self._open_dates[candidate_date]
+        except KeyError:
+            pass
+        is_open = bool(
+            self.facility.weekday_mask[candidate_date.weekday()]
+            and candidate_date not in self.taken_dates
+            and candidate_date not in self.candidate_holidays
+            and self.facility.is_open_on(candidate_date)
+        )
+        self._open_dates[candidate_date] = is_open
+        return is_open
+
+    def is_suggested_open(self, suggested_datetime: datetime) -> bool:
+        """Returns True if the suggested date is available, ignoring
+        slots.
+        """
+        suggested_date = suggested_datetime.date()
+        return bool(
+            self.facility.weekday_mask[suggested_date.weekday()]
+            and suggested_date not in self.taken_dates
+            and (
+                self.holiday_dates is None
+                or to_local(suggested_datetime).date() not in self.holiday_dates
+            )
+            and self.facility.is_open_on(suggested_date, suggested_datetime)
+        )
+
+    def schedule(
+        self,
+        requests: Iterable[tuple[datetime | None, relativedelta | None, relativedelta | None]],
+    ) -> list[datetime]:
+        """Returns a list of available datetimes, in order, for a
+        sequence of (suggested_datetime, forward_delta, reverse_delta)
+        tuples.
+
+        If a request cannot be assigned, the suggested datetime is
+        returned if the facility allows a best effort, otherwise
+        raises a FacilityError.
+        """
+        suggested_datetimes = []
+        groups: dict[tuple[date, date, date, bool], list[int]] = {}
+        # requests repeat, so convert each distinct request once
+        converted: dict[tuple, tuple[datetime, tuple[date, date, date, bool]]] = {}
+        for index, request in enumerate(requests):
+            try:
+                suggested_datetime, key = converted[request]
+            except KeyError:
+                suggested_datetime, forward_delta, reverse_delta = request
+                cache = bool(suggested_datetime)
+                suggested_datetime = as_utc(suggested_datetime or get_utcnow())
+                forward_delta = forward_delta or relativedelta(months=1)
+                reverse_delta = reverse_delta or relativedelta(months=0)
+                key = (
+                    suggested_datetime.date(),
+                    *get_window(suggested_datetime, forward_delta, reverse_delta),
+                    self.is_suggested_open(suggested_datetime),
+                )
+                if cache:
+                    converted[request] = suggested_datetime, key
+            suggested_datetimes.append(suggested_datetime)
+            groups.setdefault(key, []).append(index)
+        if self.slot_counter and groups:
+            self.slot_counter.load(min(k[1] for k in groups), max(k[2] for k in groups))
+        available_dates = self._assign(groups, len(suggested_datetimes))
+        unassigned = [
+            i for i, available_date in enumerate(available_dates) if not available_date
+        ]
+        if unassigned and not self.facility.best_effort_available_datetime:
+            formatted_date = suggested_datetimes[unassigned[0]].strftime(
+                convert_php_dateformat(settings.SHORT_DATE_FORMAT)
+            )
+            raise FacilityError(
+                f"No available appointment dates at facility for period. "
+                f"Got {len(unassigned)} of {len(suggested_datetimes)} requests without an "
+                f"available date, the first suggested on {formatted_date}. "
+                f"Facility is {repr(self.facility)}."
+            )
+        return [
+            datetime.combine(
+                available_date or suggested_datetime.date(),
+                suggested_datetime.time(),
+                tzinfo=UTC,
+            )
+            for suggested_datetime, available_date in zip(suggested_datetimes, available_dates)
+        ]
+
+    def _assign(
+        self, groups: dict[tuple[date, date, date, bool], list[int]], count: int
+    ) -> list[date | None]:
+        """Returns a list of assigned dates, or None, indexed by
+        request.
+        """
+        mcf = MinCostFlow(2)
+        source, sink = 0, 1
+        day_nodes: dict[date, int] = {}
+        group_edges: list[tuple[list[int], list[tuple[int, date]]]] = []
+        for (suggested_date, min_date, max_date, suggested_open), indexes in groups.items():
+            group_node = mcf.add_node()
+            mcf.add_edge(source, group_node, len(indexes), 0)
+            edges = []
+            for offset in range(
+                (min_date - suggested_date).days, (max_date - suggested_date).days
+            ):
+                candidate_date = suggested_date + timedelta(days=offset)
+                if (suggested_open if offset == 0 else self.is_open(candidate_date)) and (
+                    candidate_date in day_nodes or self.capacity(candidate_date) > 0
+                ):
+                    if candidate_date not in day_nodes:
+                        day_nodes[candidate_date] = mcf.add_node()
+                        mcf.add_edge(
+                            day_nodes[candidate_date], sink, self.capacity(candidate_date), 0
+                        )
+                    edges.append(
+                        (
+                            mcf.add_edge(
+                                group_node,
+                                day_nodes[candidate_date],
+                                len(indexes),
+                                abs(offset),
+                            ),
+                            candidate_date,
+                        )
+                    )
+            group_edges.append((indexes, edges))
+        mcf.solve(source, sink)
+        available_dates: list[date | None] = [None] * count
+        for indexes, edges in group_edges:
+            assigned_dates = []
+            for edge, candidate_date in sorted(edges, key=lambda x: x[1]):
+                assigned_dates.extend([candidate_date] * mcf.flow(edge))
+            for index, assigned_date in zip(indexes, assigned_dates):
+                available_dates[index] = assigned_date
+        return available_dates
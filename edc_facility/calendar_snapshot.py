@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from datetime import date
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, Iterable, Type
+
+from django.conf import settings
+from django.db import transaction
+
+from .exceptions import CalendarSnapshotError
+
+if TYPE_CHECKING:
+    from .models import Holiday
+
+MAGIC = b"EDCFCAL\x00"
+VERSION = 1
+# magic, version, length of the JSON index in bytes
+HEADER = struct.Struct("<8sII")
+
+
+def get_calendar_snapshot_path() -> Path | None:
+    """Returns the path of the calendar snapshot or None if not
+    used.
+
+    Set `settings.EDC_FACILITY_CALENDAR_SNAPSHOT` to a path shared
+    by the workers on a host.
+    """
+    path = getattr(settings, "EDC_FACILITY_CALENDAR_SNAPSHOT", None)
+    return Path(path).expanduser() if path else None
+
+
+class CalendarSnapshot:
+    """A read-only, memory-mapped snapshot of the holiday table.
+
+    The file is a header, a JSON index and, per country, a sorted
+    array of int32 date ordinals in the byte order of the host.
+    Processes that map the same file share its pages in the page
+    cache and `ordinals` and `is_holiday` read them without copying.
+    `local_dates`, used by the `holiday_cache`, builds a frozenset
+    per process.
+
+    See `write_calendar_snapshot`.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise CalendarSnapshotError(f"Invalid calendar snapshot. Got {e}. See {path}.")
+        try:
+            magic, version, index_size = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic, version, index_size = None, None, 0
+        if magic != MAGIC or version != VERSION:
+            raise CalendarSnapshotError(
+                f"Invalid calendar snapshot. Expected version {VERSION}. See {path}."
+            )
+        index = json.loads(self._mmap[HEADER.size : HEADER.size + index_size])
+        self.model: str = index["model"]
+        ordinals = memoryview(self._mmap)[get_data_offset(index_size) :].cast("i")
+        self._countries: dict[str, memoryview] = {
+            country: ordinals[start : start + count]
+            for country, (start, count) in index["countries"].items()
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path})"
+
+    @property
+    def countries(self) -> list[str]:
+        return list(self._countries)
+
+    def ordinals(self, country: str) -> memoryview:
+        """Returns the sorted date ordinals of the country's holidays
+        as a read-only int32 view of the file.
+        """
+        return self._countries[country]
+
+    def local_dates(self, country: str) -> frozenset[date]:
+        """Returns a new frozenset of the local dates of the
+        country's holidays.
+        """
+        return frozenset(date.fromordinal(ordinal) for ordinal in self.ordinals(country))
+
+    def is_holiday(self, country: str, local_date: date) -> bool:
+        """Returns True if the local date is a holiday, searching the
+        mapped ordinals without copying them.
+        """
+        ordinals = self.ordinals(country)
+        index = bisect_left(ordinals, local_date.toordinal())
+        return index < len(ordinals) and ordinals[index] == local_date.toordinal()
+
+
+def get_data_offset(index_size: int) -> int:
+    """Returns the offset of the ordinals, aligned to 4 bytes."""
+    return -(-(HEADER.size + index_size) // 4) * 4
+
+
+def write_calendar_snapshot(
+    path: str | Path, model: str, holidays: dict[str, Iterable[date]]
+) -> None:
+    """Writes a calendar snapshot atomically.
+
+    `holidays` is a mapping of country to local dates.
+    """
+    ordinals = array("i")
+    countries = {}
+    for country, local_dates in sorted(holidays.items()):
+        country_ordinals = sorted({d.toordinal() for d in local_dates})
+        countries[country] = [len(ordinals), len(country_ordinals)]
+        ordinals.extend(country_ordinals)
+    if ordinals.itemsize != 4:  # pragma: no cover
+        raise CalendarSnapshotError("Expected 4-byte integers for array('i').")
+    index = json.dumps({"model": model, "countries": countries}).encode()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        f.write(index)
+        f.write(b"\x00" * (get_data_offset(len(index)) - HEADER.size - len(index)))
+        f.write(ordinals.tobytes())
+    os.replace(f.name, path)
+
+
+def build_calendar_snapshot(
+    path: str | Path | None = None, model_cls: Type[Holiday] | None = None
+) -> Path:
+    """Writes a calendar snapshot of the holiday table, read with
+    one query, and returns the path.
+    """
+    from .utils import get_holiday_model_cls  # avoid circular import
+
+    path = path or get_calendar_snapshot_path()
+    if not path:
+        raise CalendarSnapshotError(
+            "Calendar snapshot path not set. See settings.EDC_FACILITY_CALENDAR_SNAPSHOT."
+        )
+    model_cls = model_cls or get_holiday_model_cls()
+    holidays: dict[str, list[date]] = {}
+    for country, local_date in model_cls.objects.values_list(
+        "country", "local_date"
+    ).iterator():
+        holidays.setdefault(country, []).append(local_date)
+    write_calendar_snapshot(path, model_cls._meta.label_lower, holidays)
+    return Path(path)
+
+
+def build_calendar_snapshot_on_commit(using: str | None = None) -> None:
+    """Rebuilds the calendar snapshot, if a path is set, when the
+    current transaction commits.
+
+    Called by `import_holidays` and by the `Holiday` post_save /
+    post_delete signals.
+    """
+    if get_calendar_snapshot_path():
+        transaction.on_commit(build_calendar_snapshot, using=using)
+
+
+_snapshots: dict[Path, CalendarSnapshot] = {}
+_lock = Lock()
+
+
+def get_calendar_snapshot(path: str | Path | None = None) -> CalendarSnapshot | None:
+    """Returns the calendar snapshot mapped in this process or None
+    if not set, not found or invalid.
+
+    The file is mapped again if it was replaced.
+    """
+    path = Path(path) if path else get_calendar_snapshot_path()
+    if not path:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    snapshot = _snapshots.get(path)
+    if snapshot is None or snapshot.key != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+        try:
+            snapshot = CalendarSnapshot(path)
+        except (OSError, ValueError, KeyError, CalendarSnapshotError):
+            return None
+        with _lock:
+            _snapshots[path] = snapshot
+    return snapshot
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from typing import TYPE_CHECKING, Iterable, Type
+from zoneinfo import ZoneInfo
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+if TYPE_CHECKING:
+    from django.db.models import Model, QuerySet
+
+
+def get_booking_model() -> str | None:
+    """Returns the label_lower of the model of booked appointments
+    counted against facility slots, or None if slots are not
+    enforced.
+
+    For example, "edc_appointment.appointment".
+    """
+    return getattr(settings, "EDC_FACILITY_BOOKING_MODEL", None)
+
+
+class SlotCounter:
+    """Counts booked appointments per day for a facility and site.
+
+    Counts are loaded with one aggregated query per search window
+    and cached. Windows already loaded are not queried again and
+    gaps between loaded windows are not queried. Use
+    `add` to update the counts as bookings are made.
+
+    Dates are the UTC dates of the booked datetimes.
+    """
+
+    facility_name_field: str = "facility_name"
+    datetime_field: str = "appt_datetime"
+    site_field: str = "site"
+
+    def __init__(
+        self, facility_name: str, site_id: int | None = None, model: str | None = None
+    ) -> None:
+        self.facility_name = facility_name
+        self.site_id = site_id
+        self.model = model or get_booking_model()
+        self._counts: dict[int, int] = {}
+        # sorted, disjoint [lower, upper) windows of date ordinals
+        self._loaded: list[tuple[int, int]] = []
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(facility_name={self.facility_name}, "
+            f"site_id={self.site_id}, model={self.model})"
+        )
+
+    @property
+    def model_cls(self) -> Type[Model]:
+        return django_apps.get_model(self.model)
+
+    def load(self, min_date: date, max_date: date) -> None:
+        """Loads counts for dates within [min_date, max_date) not
+        already loaded.
+        """
+        for lower, upper in self._unloaded(min_date, max_date):
+            self._add_rows(self._get_queryset(lower, upper))
+
+    async def aload(self, min_date: date, max_date: date) -> None:
+        """Loads counts for dates within [min_date, max_date) not
+        already loaded, see `load`, with the async ORM.
+        """
+        for lower, upper in self._unloaded(min_date, max_date):
+            self._add_rows([row async for row in self._get_queryset(lower, upper)])
+
+    def _unloaded(self, min_date: date, max_date: date) -> list[tuple[int, int]]:
+        """Returns the windows within [min_date, max_date) not
+        already loaded, as date ordinals, and marks them loaded.
+        """
+        lower, upper = min_date.toordinal(), max_date.toordinal()
+        if lower >= upper:
+            return []
+        windows, loaded = [], []
+        merged_lower, merged_upper, start = lower, upper, lower
+        for loaded_lower, loaded_upper in self._loaded:
+            if loaded_upper < lower or loaded_lower > upper:
+                loaded.append((loaded_lower, loaded_upper))
+                continue
+            # overlaps or touches the new window
+            if start < loaded_lower:
+                windows.append((start, loaded_lower))
+            start = max(start, loaded_upper)
+            merged_lower = min(merged_lower, loaded_lower)
+            merged_upper = max(merged_upper, loaded_upper)
+        if start < upper:
+            windows.append((start, upper))
+        loaded.append((merged_lower, merged_upper))
+        self._loaded = sorted(loaded)
+        return windows
+
+    def _get_queryset(self, lower: int, upper: int) -> QuerySet:
+        """Returns a queryset of counts per day for dates within
+        [lower, upper) as date ordinals.
+        """
+        utc = ZoneInfo("UTC")
+        opts = {
+            self.facility_name_field: self.facility_name,
+            f"{self.datetime_field}__gte": datetime.combine(
+                date.fromordinal(lower), time(0), tzinfo=utc
+            ),
+            f"{self.datetime_field}__lt": datetime.combine(
+                date.fromordinal(upper), time(0), tzinfo=utc
+            ),
+        }
+        if self.site_id:
+            opts.update({f"{self.site_field}_id": self.site_id})
+        return (
+            self.model_cls.objects.filter(**opts)
+            .annotate(booked_date=TruncDate(self.datetime_field, tzinfo=utc))
+            .values("booked_date")
+            .annotate(booked=Count("pk"))
+            .order_by()
+        )
+
+    def _add_rows(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            ordinal = row["booked_date"].toordinal()
+            self._counts[ordinal] = self._counts.get(ordinal, 0) + row["booked"]
+
+    def count(self, booked_date: date) -> int:
+        """Returns the number of bookings on this date."""
+        return self._counts.get(booked_date.toordinal(), 0)
+
+    def add(self, booked_date: date, count: int | None = None) -> None:
+        """Adds a booking, or `count` bookings, on this date."""
+        ordinal = booked_date.toordinal()
+        self._counts[ordinal] = self._counts.get(ordinal, 0) + (count or 1)
+
+    def full_dates(self, slots_by_weekday: dict[int, int]) -> set[date]:
+        """Returns the set of loaded dates at or over capacity."""
+        full_dates = set()
+        for ordinal, booked in self._counts.items():
+            booked_date = date.fromordinal(ordinal)
+            if booked >= slots_by_weekday.get(booked_date.weekday(), 0):
+                full_dates.add(booked_date)
+        return full_dates
@@ -0,0 +1,613 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Iterator
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from edc_utils.date import to_local
+
+from .exceptions import FacilityError
+from .instrumentation import add_count
+from .taken_dates import TakenDates
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from .capacity import SlotCounter
+    from .facility import Facility
+
+UTC = ZoneInfo("UTC")
+# date(1970, 1, 1).toordinal(), the ordinal of day 0 of datetime64[D]
+EPOCH_ORDINAL = 719163
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Returns the datetime, if aware, or the naive datetime as UTC.
+
+    The same as `Arrow.fromdatetime(dt).datetime`.
+    """
+    return dt if dt.tzinfo else dt.replace(tzinfo=UTC)
+
+
+@lru_cache(maxsize=64)
+def as_timedelta(delta: relativedelta | timedelta) -> relativedelta | timedelta:
+    """Returns a timedelta for a relativedelta of days or smaller
+    units, otherwise the delta as is.
+
+    Adding a timedelta is much faster than adding a relativedelta.
+    """
+    if isinstance(delta, timedelta) or any(
+        [
+            delta.years,
+            delta.months,
+            delta.leapdays,
+            delta.weekday,
+            *[
+                getattr(delta, attr) is not None
+                for attr in ["year", "month", "day", "hour", "minute", "second", "microsecond"]
+            ],
+        ]
+    ):
+        return delta
+    return timedelta(
+        days=delta.days,
+        hours=delta.hours,
+        minutes=delta.minutes,
+        seconds=delta.seconds,
+        microseconds=delta.microseconds,
+    )
+
+
+def get_window(
+    suggested_datetime: datetime,
+    forward_delta: relativedelta | timedelta,
+    reverse_delta: relativedelta | timedelta,
+) -> tuple[date, date]:
+    """Returns (min_date, max_date) of the window around the
+    suggested datetime. `max_date` is not in the window.
+    """
+    return (
+        (suggested_datetime - as_timedelta(reverse_delta)).date(),
+        (suggested_datetime + as_timedelta(forward_delta)).date(),
+    )
+
+
+def get_candidate_holidays(holiday_dates: frozenset[date]) -> list[date]:
+    """Returns a sorted list of candidate dates that fall on a
+    holiday.
+
+    A candidate date is tested as midnight UTC converted to the
+    local date. For example, where the local timezone is behind UTC,
+    the candidate for a local holiday is the following day.
+    """
+    candidate_holidays = set()
+    for holiday_date in holiday_dates:
+        for candidate_date in [holiday_date, holiday_date + timedelta(days=1)]:
+            dt = datetime.combine(candidate_date, time(0), tzinfo=UTC)
+            if to_local(dt).date() == holiday_date:
+                candidate_holidays.add(candidate_date)
+    return sorted(candidate_holidays)
+
+
+def get_candidate_holiday_set(holiday_dates: frozenset[date]) -> frozenset[date]:
+    """Returns a frozenset of candidate dates that fall on a holiday,
+    cached per holidays and timezone.
+
+    See `get_candidate_holidays`.
+    """
+    return _get_candidate_holiday_set(holiday_dates, settings.TIME_ZONE)
+
+
+@lru_cache(maxsize=16)
+def _get_candidate_holiday_set(holiday_dates: frozenset[date], time_zone: str):
+    return frozenset(get_candidate_holidays(holiday_dates))
+
+
+def get_holiday_intervals(holiday_dates: frozenset[date]) -> tuple[np.ndarray, np.ndarray]:
+    """Returns sorted arrays of the start and end, as datetime64[us]
+    in UTC, of each local holiday, cached per holidays and timezone.
+
+    A UTC datetime is on a local holiday if start <= datetime < end.
+    """
+    return _get_holiday_intervals(holiday_dates, settings.TIME_ZONE)
+
+
+@lru_cache(maxsize=16)
+def _get_holiday_intervals(holiday_dates: frozenset[date], time_zone: str):
+    tz = ZoneInfo(time_zone)
+    intervals = [
+        [
+            datetime.combine(local_date, time(0), tzinfo=tz)
+            .astimezone(UTC)
+            .replace(tzinfo=None)
+            for local_date in [holiday_date, holiday_date + timedelta(days=1)]
+        ]
+        for holiday_date in sorted(holiday_dates)
+    ]
+    intervals = np.array(intervals or np.empty((0, 2)), dtype="datetime64[us]")
+    return intervals[:, 0], intervals[:, 1]
+
+
+def iter_candidate_offsets(lt_len: int, gt_len: int) -> Iterator[int]:
+    """Yields day offsets from the suggested date ordered outward
+    from the suggested date, alternating forward then reverse.
+
+    `lt_len` and `gt_len` are the number of days before and after
+    the suggested date. Where one side is longer, its extra days are
+    yielded first. For example, where lt_len == gt_len: +1, -1, +2, -2, ...
+
+    The suggested date (offset 0) is not included.
+    """
+    diff = abs(gt_len - lt_len)
+    for k in range(1, max(lt_len, gt_len) + 1):
+        if gt_len >= lt_len:
+            plus, minus = k, k - diff
+        else:
+            plus, minus = k - diff, k
+        if plus >= 1:
+            yield plus
+        if minus >= 1:
+            yield -minus
+
+
+def iter_candidate_dates(
+    suggested_date: date, min_date: date, max_date: date
+) -> Iterator[date]:
+    """Yields candidate dates within [min_date, max_date), starting
+    with the suggested date and ordered outward.
+
+    The span is not allocated so the cost is proportional to the
+    number of dates consumed.
+    """
+    if min_date <= suggested_date < max_date:
+        yield suggested_date
+    lt_len = max((suggested_date - min_date).days, 0)
+    gt_len = max((max_date - suggested_date).days, 0)
+    for offset in iter_candidate_offsets(lt_len, gt_len):
+        if offset < gt_len:
+            yield suggested_date + timedelta(days=offset)
+
+
+class SearchEngine:
+    """The default search engine used by `Facility` to find an
+    available date.
+
+    Candidate dates are tested one at a time in the order yielded
+    by `iter_candidate_dates`.
+    """
+
+    name: str = "python"
+
+    def __init__(self, facility: Facility) -> None:
+        self.facility = facility
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(facility={self.facility.name})"
+
+    def search(
+        self,
+        suggested_datetime: datetime,
+        forward_delta: relativedelta,
+        reverse_delta: relativedelta,
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+        slot_counter: SlotCounter | None = None,
+    ) -> date | None:
+        """Returns the first available date or None.
+
+        A naive `suggested_datetime` is taken as UTC. If
+        `holiday_dates` is None, holidays are ignored. If
+        `slot_counter` is None, slots are not enforced.
+        """
+        facility = self.facility
+        weekday_mask = facility.weekday_mask
+        suggested_datetime = as_utc(suggested_datetime)
+        suggested_date = suggested_datetime.date()
+        min_date, max_date = get_window(suggested_datetime, forward_delta, reverse_delta)
+        candidate_holidays = get_candidate_holiday_set(holiday_dates or frozenset())
+        available_date = None
+        candidates = 0
+        for candidate_date in iter_candidate_dates(suggested_date, min_date, max_date):
+            candidates += 1
+            if (
+                not weekday_mask[candidate_date.weekday()]
+                or candidate_date in taken_dates
+                or not facility.has_open_slot(candidate_date, slot_counter)
+            ):
+                continue
+            if candidate_date == suggested_date:
+                if (
+                    holiday_dates is None
+                    or to_local(suggested_datetime).date() not in holiday_dates
+                ) and facility.is_open_on(candidate_date, suggested_datetime):
+                    available_date = candidate_date
+                    break
+            elif candidate_date not in candidate_holidays and facility.is_open_on(
+                candidate_date
+            ):
+                available_date = candidate_date
+                break
+        add_count("candidates", candidates)
+        return available_date
+
+
+class BusdayEngine(SearchEngine):
+    """A search engine built on `numpy.busdaycalendar`.
+
+    The facility's days are the weekmask and the holidays are the
+    calendar holidays. Candidates are ranked in the same order as
+    `iter_candidate_offsets` so the result is the same as
+    `SearchEngine`.
+
+    Requires `numpy`.
+    """
+
+    name: str = "busday"
+
+    def __init__(self, facility: Facility) -> None:
+        if np is None:
+            raise FacilityError(
+                f"Facility engine '{self.name}' requires numpy. See {repr(facility)}."
+            )
+        super().__init__(facility)
+        self.weekmask = [1 if open_day else 0 for open_day in facility.weekday_mask]
+        self._calendars: dict[tuple[frozenset[date] | None, str], np.busdaycalendar] = {}
+
+    def get_busdaycalendar(
+        self,
+        holiday_dates: frozenset[date] | None,
+        taken_dates: TakenDates | set[date] | None = None,
+    ) -> np.busdaycalendar:
+        """Returns a busdaycalendar for these holidays, cached per
+        holidays and timezone unless `taken_dates` are included.
+        """
+        if taken_dates:
+            holidays = np.array(
+                get_candidate_holidays(holiday_dates or frozenset()), dtype="datetime64[D]"
+            )
+            return np.busdaycalendar(
+                weekmask=self.weekmask,
+                holidays=np.union1d(holidays, self.as_days(taken_dates)),
+            )
+        key = (holiday_dates, settings.TIME_ZONE)
+        try:
+            return self._calendars[key]
+        except KeyError:
+            pass
+        holidays = get_candidate_holidays(holiday_dates or frozenset())
+        calendar = np.busdaycalendar(
+            weekmask=self.weekmask, holidays=np.array(holidays, dtype="datetime64[D]")
+        )
+        if len(self._calendars) > 16:
+            self._calendars = {}
+        self._calendars[key] = calendar
+        return calendar
+
+    @staticmethod
+    def as_days(taken_dates: TakenDates | set[date]) -> np.ndarray:
+        """Returns the taken dates as a datetime64[D] array."""
+        if isinstance(taken_dates, TakenDates):
+            ordinals = taken_dates.ordinals
+        else:
+            ordinals = [taken_date.toordinal() for taken_date in taken_dates]
+        return (np.fromiter(ordinals, dtype="int64") - EPOCH_ORDINAL).astype("datetime64[D]")
+
+    def first_candidate_ok(
+        self,
+        suggested_datetime: datetime,
+        min_date: date,
+        max_date: date,
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+    ) -> bool:
+        """Returns True if the suggested date itself is available."""
+        suggested_datetime = as_utc(suggested_datetime)
+        suggested_date = suggested_datetime.date()
+        return (
+            min_date <= suggested_date < max_date
+            and self.facility.weekday_mask[suggested_date.weekday()]
+            and (
+                holiday_dates is None
+                or to_local(suggested_datetime).date() not in holiday_dates
+            )
+            and suggested_date not in taken_dates
+        )
+
+    def search(
+        self,
+        suggested_datetime: datetime,
+        forward_delta: relativedelta,
+        reverse_delta: relativedelta,
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+        slot_counter: SlotCounter | None = None,
+    ) -> date | None:
+        if not any(self.weekmask):
+            return None
+        suggested_date = suggested_datetime.date()
+        min_date, max_date = get_window(suggested_datetime, forward_delta, reverse_delta)
+        if (
+            self.first_candidate_ok(
+                suggested_datetime, min_date, max_date, taken_dates, holiday_dates
+            )
+            and self.facility.has_open_slot(suggested_date, slot_counter)
+            and self.facility.is_open_on(suggested_date, suggested_datetime)
+        ):
+            add_count("candidates")
+            return suggested_date
+        available_date = None
+        candidates = 1
+        for candidate_date in self.iter_candidate_busdays(
+            suggested_date, min_date, max_date, holiday_dates
+        ):
+            candidates += 1
+            if candidate_date in taken_dates or not self.facility.has_open_slot(
+                candidate_date, slot_counter
+            ):
+                continue
+            if self.facility.is_open_on(candidate_date):
+                available_date = candidate_date
+                break
+        add_count("candidates", candidates)
+        return available_date
+
+    def iter_candidate_busdays(
+        self,
+        suggested_date: date,
+        min_date: date,
+        max_date: date,
+        holiday_dates: frozenset[date] | None,
+    ) -> Iterator[date]:
+        """Yields the business days of the calendar, other than the
+        suggested date, in the order of `iter_candidate_offsets`.
+        """
+        calendar = self.get_busdaycalendar(holiday_dates)
+        lt_len = max((suggested_date - min_date).days, 0)
+        gt_len = max((max_date - suggested_date).days, 0)
+        origin = np.datetime64(suggested_date, "D")
+        plus = self._next_busday(origin + 1, 1, calendar)
+        minus = self._next_busday(origin - 1, -1, calendar)
+        while True:
+            # offsets of the next forward and reverse business days
+            plus_offset = int((plus - origin).astype(int))
+            minus_offset = int((origin - minus).astype(int))
+            plus_pos = (
+                self.plus_position(plus_offset, lt_len, gt_len)
+                if plus_offset < gt_len
+                else None
+            )
+            minus_pos = (
+                self.minus_position(minus_offset, lt_len, gt_len)
+                if minus_offset <= lt_len
+                else None
+            )
+            if plus_pos is None and minus_pos is None:
+                return
+            if minus_pos is None or (plus_pos is not None and plus_pos < minus_pos):
+                candidate = plus
+                plus = self._next_busday(plus + 1, 1, calendar)
+            else:
+                candidate = minus
+                minus = self._next_busday(minus - 1, -1, calendar)
+            yield candidate.astype(date)
+
+    def search_many(
+        self,
+        suggested_datetimes: list[datetime],
+        forward_deltas: list[relativedelta],
+        reverse_deltas: list[relativedelta],
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+    ) -> list[date | None]:
+        """Returns a list of available dates, or None, for many
+        independent suggested datetimes in one vectorized pass.
+
+        The windows, the test of each suggested date and the nearest
+        business day on either side are computed with numpy arrays
+        over the whole batch. Taken dates are not updated between
+        suggested datetimes.
+        """
+        available_dates, _ = self.search_array(
+            suggested_datetimes, forward_deltas, reverse_deltas, taken_dates, holiday_dates
+        )
+        # NaT converts to None
+        return available_dates.astype(object).tolist()
+
+    def search_many_datetimes(
+        self,
+        suggested_datetimes: list[datetime],
+        forward_deltas: list[relativedelta],
+        reverse_deltas: list[relativedelta],
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+    ) -> list[datetime | None]:
+        """Returns a list of available datetimes in UTC, or None, see
+        `search_many`.
+
+        Each available date is combined with the time of the
+        suggested datetime.
+        """
+        available_dates, wall_times = self.search_array(
+            suggested_datetimes, forward_deltas, reverse_deltas, taken_dates, holiday_dates
+        )
+        times = wall_times - wall_times.astype("datetime64[D]")
+        # NaT converts to None
+        return [
+            None if dt is None else dt.replace(tzinfo=UTC)
+            for dt in (available_dates + times).astype(object).tolist()
+        ]
+
+    def search_array(
+        self,
+        suggested_datetimes: list[datetime],
+        forward_deltas: list[relativedelta],
+        reverse_deltas: list[relativedelta],
+        taken_dates: TakenDates | set[date],
+        holiday_dates: frozenset[date] | None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (available_dates, wall_times), a datetime64[D]
+        array of the available dates, NaT if none, and the
+        datetime64[us] array of the suggested datetimes, see
+        `as_datetime64`.
+        """
+        count = len(suggested_datetimes)
+        if not count:
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype="datetime64[us]")
+        wall_times, utc_times = self.as_datetime64(suggested_datetimes)
+        if not any(self.weekmask):
+            return np.full(count, np.datetime64("NaT", "D")), wall_times
+        origin = wall_times.astype("datetime64[D]")
+        min_dates = self.window_bounds(suggested_datetimes, wall_times, reverse_deltas, -1)
+        max_dates = self.window_bounds(suggested_datetimes, wall_times, forward_deltas, 1)
+        lt_len = np.maximum((origin - min_dates).astype(int), 0)
+        gt_len = np.maximum((max_dates - origin).astype(int), 0)
+        first_ok = (
+            (min_dates <= origin)
+            & (origin < max_dates)
+            & np.is_busday(origin, weekmask=self.weekmask)
+            & ~np.isin(origin, self.as_days(taken_dates))
+        )
+        if holiday_dates is not None:
+            first_ok &= ~self.on_holiday(utc_times, holiday_dates)
+        calendar = self.get_busdaycalendar(holiday_dates, taken_dates=taken_dates)
+        plus = np.busday_offset(origin + 1, 0, roll="forward", busdaycal=calendar)
+        minus = np.busday_offset(origin - 1, 0, roll="backward", busdaycal=calendar)
+        plus_offset = (plus - origin).astype(int)
+        minus_offset = (origin - minus).astype(int)
+        diff = np.abs(gt_len - lt_len)
+        plus_pos = np.where(
+            gt_len >= lt_len,
+            np.where(plus_offset <= diff, plus_offset, diff + 2 * (plus_offset - diff) - 1),
+            diff + 2 * plus_offset - 1,
+        )
+        minus_pos = np.where(
+            gt_len >= lt_len,
+            diff + 2 * minus_offset,
+            np.where(minus_offset <= diff, minus_offset, diff + 2 * (minus_offset - diff)),
+        )
+        inf = np.iinfo(plus_pos.dtype).max
+        plus_pos = np.where(plus_offset < gt_len, plus_pos, inf)
+        minus_pos = np.where(minus_offset <= lt_len, minus_pos, inf)
+        available = np.where(plus_pos < minus_pos, plus, minus)
+        found = np.minimum(plus_pos, minus_pos) < inf
+        available = np.where(
+            first_ok, origin, np.where(found, available, np.datetime64("NaT", "D"))
+        )
+        return available, wall_times
+
+    @staticmethod
+    def as_datetime64(datetimes: list[datetime]) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (wall_times, utc_times), the datetimes as
+        datetime64[us] arrays of the wall clock time in their own
+        timezone and of the time in UTC.
+
+        A naive datetime is taken as UTC.
+        """
+        tzinfos = set(map(attrgetter("tzinfo"), datetimes))
+        if None in tzinfos:
+            datetimes = list(map(as_utc, datetimes))
+            tzinfos = set(map(attrgetter("tzinfo"), datetimes))
+        count = len(datetimes)
+        utc_times = (
+            (
+                np.fromiter(map(datetime.timestamp, datetimes), dtype="float64", count=count)
+                * 1e6
+            )
+            .round()
+            .astype("int64")
+            .astype("datetime64[us]")
+        )
+        if tzinfos <= {UTC, timezone.utc}:
+            return utc_times, utc_times
+        offsets = np.fromiter(
+            map(timedelta.total_seconds, map(datetime.utcoffset, datetimes)),
+            dtype="float64",
+            count=count,
+        )
+        return (
+            utc_times + (offsets * 1e6).round().astype("int64").astype("timedelta64[us]"),
+            utc_times,
+        )
+
+    @staticmethod
+    def window_bounds(
+        datetimes: list[datetime],
+        wall_times: np.ndarray,
+        deltas: list[relativedelta | timedelta],
+        sign: int,
+    ) -> np.ndarray:
+        """Returns the dates of the datetimes plus, or minus, the
+        deltas as a datetime64[D] array, as `get_window`.
+
+        Deltas of days or smaller units are added as an array. Others,
+        for example of months, are added one at a time.
+        """
+        ids, inverse = np.unique(
+            np.fromiter(map(id, deltas), dtype="int64", count=len(deltas)), return_inverse=True
+        )
+        deltas_by_id = dict(zip(map(id, deltas), deltas))
+        unique_deltas = [as_timedelta(deltas_by_id[delta_id]) for delta_id in ids.tolist()]
+        if all(isinstance(delta, timedelta) for delta in unique_deltas):
+            microseconds = np.array(
+                [delta // timedelta(microseconds=1) for delta in unique_deltas], dtype="int64"
+            )
+            return (
+                wall_times + sign * microseconds[inverse].astype("timedelta64[us]")
+            ).astype("datetime64[D]")
+        return np.array(
+            [
+                (as_utc(dt) + sign * as_timedelta(delta)).date()
+                for dt, delta in zip(datetimes, deltas)
+            ],
+            dtype="datetime64[D]",
+        )
+
+    @staticmethod
+    def on_holiday(utc_datetimes: np.ndarray, holiday_dates: frozenset[date]) -> np.ndarray:
+        """Returns a boolean array, True where the local date of the
+        UTC datetime is a holiday.
+        """
+        starts, ends = get_holiday_intervals(holiday_dates)
+        if not len(starts):
+            return np.zeros(len(utc_datetimes), dtype=bool)
+        index = np.searchsorted(starts, utc_datetimes, side="right") - 1
+        return (index >= 0) & (utc_datetimes < ends[np.maximum(index, 0)])
+
+    @staticmethod
+    def plus_position(offset: int, lt_len: int, gt_len: int) -> int:
+        """Returns the position of a forward offset in the
+        candidate order.
+        """
+        diff = abs(gt_len - lt_len)
+        if gt_len >= lt_len:
+            return offset if offset <= diff else diff + 2 * (offset - diff) - 1
+        return diff + 2 * offset - 1
+
+    @staticmethod
+    def minus_position(offset: int, lt_len: int, gt_len: int) -> int:
+        """Returns the position of a reverse offset in the
+        candidate order.
+        """
+        diff = abs(gt_len - lt_len)
+        if gt_len >= lt_len:
+            return diff + 2 * offset
+        return offset if offset <= diff else diff + 2 * (offset - diff)
+
+    @staticmethod
+    def _next_busday(start, step: int, calendar):
+        return np.busday_offset(
+            start, 0, roll="forward" if step > 0 else "backward", busdaycal=calendar
+        )
+
+
+engines: dict[str, type[SearchEngine]] = {
+    SearchEngine.name: SearchEngine,
+    BusdayEngine.name: BusdayEngine,
+}
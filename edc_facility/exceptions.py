@@ -20,3 +20,7 @@ class FacilitySiteError(Exception):
 
 class FacilityCountryError(Exception):
     pass
+
+
+class CalendarSnapshotError(Exception):
+    pass
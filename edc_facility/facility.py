@@ -1,23 +1,36 @@
 from __future__ import annotations
 
-from datetime import datetime
-from operator import methodcaller
-from typing import TYPE_CHECKING, Any, List, Tuple, Union
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Iterable, List, Tuple, Union
 
-import arrow
 from arrow import Arrow
 from dateutil._common import weekday
 from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
 from django.conf import settings
 from edc_utils import convert_php_dateformat, get_utcnow, to_utc
 
+from .bulk_scheduler import BulkScheduler
+from .capacity import SlotCounter, get_booking_model
+from .engines import (
+    UTC,
+    SearchEngine,
+    as_utc,
+    engines,
+    get_window,
+    iter_candidate_offsets,
+)
 from .exceptions import FacilityError
 from .holidays import Holidays
+from .instrumentation import instrumented
+from .taken_dates import TakenDates
 
 if TYPE_CHECKING:
     from django.contrib.sites.models import Site
 
+    from .models import SlotReservation
+
 
 class Facility:
     """
@@ -27,9 +40,25 @@ class Facility:
         lead to a protocol violation but may be helpful for facilities
         open 1 or 2 days per week, where the visit has a very
         narrow window period (forward_delta, reverse_delta).
+
+    Note: `engine` (Default: "python") selects the search engine
+        used to find an available date. Set to "busday" to use the
+        numpy busday calendar engine. See `engines`.
+
+    Note: `slots` are enforced if `settings.EDC_FACILITY_BOOKING_MODEL`
+        is set. Days with as many bookings as slots are skipped. See
+        `SlotCounter`.
+
+    Note: `reserve` (Default: False) if True reserves a slot on the
+        available date in the `SlotReservation` ledger. If the slots
+        on a date are taken by a concurrent booking, the search moves
+        on to the next candidate. See `reserve_slot`.
     """
 
     holiday_cls = Holidays
+    slot_counter_cls = SlotCounter
+    bulk_scheduler_cls = BulkScheduler
+    reservation_model = "edc_facility.slotreservation"
 
     def __init__(
         self,
@@ -37,23 +66,46 @@ class Facility:
         days: list = None,
         slots: list[int] = None,
         best_effort_available_datetime: datetime | None = None,
+        engine: str | None = None,
     ):
-        self.days = []
+        self.days = ()
         self.name = name
         if not name:
             raise FacilityError(f"Name cannot be None. See {repr(self)}")
         self.best_effort_available_datetime = (
             True if best_effort_available_datetime is None else best_effort_available_datetime
         )
+        compiled_days = []
         for day in days:
             try:
                 day.weekday
             except AttributeError:
                 day = weekday(day)
-            self.days.append(day)
-        self.slots = slots or [99999 for _ in self.days]
-        self.config = dict(zip([str(d) for d in self.days], self.slots))
+            compiled_days.append(day)
+        self.days = tuple(compiled_days)
+        self.slots = tuple(slots or [99999 for _ in self.days])
+        self.config = MappingProxyType(dict(zip([str(d) for d in self.days], self.slots)))
+        # compiled lookup tables, indexed by date.weekday()
+        self.weekday_mask = tuple(i in [d.weekday for d in self.days] for i in range(7))
+        self.slots_by_weekday = MappingProxyType(
+            {d.weekday: slot for d, slot in zip(self.days, self.slots)}
+        )
         self.holidays = self.holiday_cls()
+        try:
+            self.engine = engines[engine or SearchEngine.name](self)
+        except KeyError:
+            raise FacilityError(
+                f"Invalid search engine. Expected one of {list(engines)}. "
+                f"Got '{engine}'. See {repr(self)}."
+            )
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise FacilityError(
+                f"Facility is immutable. Cannot set `{name}`. See {repr(self)}."
+            )
+        super().__setattr__(name, value)
 
     def __repr__(self):
         return f"{self.__class__.__name__}(name={self.name}, days={self.days})"
@@ -75,20 +127,215 @@ class Facility:
     def weekdays(self) -> list[int]:
         return [d.weekday for d in self.days]
 
+    def get_holidays(self, site: Site | None = None) -> Holidays:
+        """Returns the Holidays instance for the given site or,
+        if None, for the current site.
+        """
+        return self.holiday_cls(site=site) if site else self.holidays
+
+    def get_slot_counter(self, site: Site | None = None) -> SlotCounter | None:
+        """Returns a new SlotCounter for this facility and the given
+        or current site, or None if slots are not enforced.
+        """
+        if not get_booking_model():
+            return None
+        site = site or self.holidays.site
+        return self.slot_counter_cls(facility_name=self.name, site_id=site.id)
+
+    def has_open_slot(self, candidate_date: date, slot_counter: SlotCounter | None) -> bool:
+        """Returns True if the number booked on this date is less
+        than the slots for the weekday or if slots are not enforced.
+        """
+        if slot_counter is None:
+            return True
+        return slot_counter.count(candidate_date) < self.slots_by_weekday.get(
+            candidate_date.weekday(), 0
+        )
+
     @staticmethod
     def open_slot_on(arr) -> Arrow:
         """Hook for handling load balance by day.
 
-        For example, if 15 appointment `slots` are filled out of 30
-        allowed for Monday, return arw, if 30/30 return None.
+        Slots per day are enforced by `has_open_slot`. Override to
+        add further rules, for example, return None to refuse a day.
         """
         return arr
 
-    def is_holiday(self, dt: datetime) -> bool:
-        return self.holidays.is_holiday(utc_datetime=to_utc(dt))
+    def is_open_on(self, candidate_date: date, candidate_datetime: datetime = None) -> bool:
+        """Returns True unless `open_slot_on` is overridden and refuses
+        the day.
+
+        An Arrow object is passed to `open_slot_on` only if it is
+        overridden. If `candidate_datetime` is None, the candidate
+        is midnight UTC on `candidate_date`.
+        """
+        if type(self).open_slot_on is Facility.open_slot_on:
+            return True
+        if candidate_datetime is None:
+            arr = Arrow.fromdate(candidate_date, tzinfo=UTC)
+        else:
+            arr = Arrow.fromdatetime(candidate_datetime)
+        return bool(self.open_slot_on(arr))
+
+    @property
+    def reservation_model_cls(self) -> type[SlotReservation]:
+        return django_apps.get_model(self.reservation_model)
+
+    def reserve_slot(
+        self, reserved_date: date, site: Site | None = None, force: bool | None = None
+    ) -> bool:
+        """Returns True if a slot on this date was reserved in the
+        ledger for the given or current site.
+
+        If `force` is True, the slot is reserved even if the
+        date is at capacity.
+        """
+        site = site or self.holidays.site
+        return self.reservation_model_cls.objects.reserve(
+            self.name,
+            site.id,
+            reserved_date,
+            capacity=None if force else self.slots_by_weekday.get(reserved_date.weekday(), 0),
+        )
+
+    async def areserve_slot(
+        self, reserved_date: date, site: Site, force: bool | None = None
+    ) -> bool:
+        """Returns True if a slot on this date was reserved in the
+        ledger for the site, see `reserve_slot`.
+        """
+        return await self.reservation_model_cls.objects.areserve(
+            self.name,
+            site.id,
+            reserved_date,
+            capacity=None if force else self.slots_by_weekday.get(reserved_date.weekday(), 0),
+        )
+
+    def release_slot(self, reserved_date: date, site: Site | None = None) -> bool:
+        """Returns True if a slot reserved on this date was released."""
+        site = site or self.holidays.site
+        return self.reservation_model_cls.objects.release(self.name, site.id, reserved_date)
+
+    def is_holiday(self, dt: datetime, site: Site | None = None) -> bool:
+        return self.get_holidays(site=site).is_holiday(utc_datetime=to_utc(dt))
 
-    def available_datetime(self, **kwargs) -> datetime:
-        return self.available_arr(**kwargs).datetime
+    @instrumented("Facility.available_datetime")
+    def available_datetime(
+        self,
+        suggested_datetime=None,
+        forward_delta=None,
+        reverse_delta=None,
+        taken_datetimes=None,
+        schedule_on_holidays=None,
+        site: Site = None,
+        slot_counter: SlotCounter | None = None,
+        reserve: bool | None = None,
+    ) -> datetime:
+        """Returns a datetime in UTC equal to or close to the
+        suggested datetime.
+
+        To exclude datetimes other than holidays, pass a list of
+        datetimes in UTC, or a `TakenDates` index, to
+        `taken_datetimes`.
+
+        If slots are enforced, pass a `SlotCounter` to reuse counts
+        already loaded.
+
+        If `reserve` is True, a slot on the available date is
+        reserved in the `SlotReservation` ledger.
+        """
+        return self._available_datetime(
+            suggested_datetime=suggested_datetime,
+            forward_delta=forward_delta,
+            reverse_delta=reverse_delta,
+            taken_dates=self.get_taken_dates(taken_datetimes),
+            holiday_dates=None if schedule_on_holidays else self.get_holiday_dates(site),
+            slot_counter=slot_counter or self.get_slot_counter(site),
+            reserve_site=(site or self.holidays.site) if reserve else None,
+        )
+
+    @instrumented("Facility.aavailable_datetime")
+    async def aavailable_datetime(
+        self,
+        suggested_datetime=None,
+        forward_delta=None,
+        reverse_delta=None,
+        taken_datetimes=None,
+        schedule_on_holidays=None,
+        site: Site = None,
+        slot_counter: SlotCounter | None = None,
+        reserve: bool | None = None,
+    ) -> datetime:
+        """Returns a datetime in UTC equal to or close to the
+        suggested datetime, see `available_datetime`.
+
+        Queries use the async ORM. Holiday dates are shared with
+        the sync path through `holiday_cache`.
+        """
+        holidays = self.get_holidays(site=site)
+        site = site or await holidays.asite()
+        slot_counter = slot_counter or self.get_slot_counter(site)
+        forward_delta, reverse_delta, suggested_datetime = self.get_search_args(
+            suggested_datetime, forward_delta, reverse_delta
+        )
+        if slot_counter:
+            await slot_counter.aload(
+                *get_window(suggested_datetime, forward_delta, reverse_delta)
+            )
+        taken_dates = self.get_taken_dates(taken_datetimes)
+        holiday_dates = None if schedule_on_holidays else await holidays.acached_local_dates()
+        excluded_dates = taken_dates
+        while True:
+            available_date = self.engine.search(
+                suggested_datetime,
+                forward_delta,
+                reverse_delta,
+                excluded_dates,
+                holiday_dates,
+                slot_counter=slot_counter,
+            )
+            if (
+                not available_date
+                or not reserve
+                or await self.areserve_slot(available_date, site)
+            ):
+                break
+            excluded_dates = self.exclude_reserved(excluded_dates, taken_dates, available_date)
+        if not available_date:
+            available_date = self.get_best_effort_date(
+                suggested_datetime, forward_delta, reverse_delta
+            )
+            if reserve:
+                await self.areserve_slot(available_date, site, force=True)
+        return datetime.combine(available_date, suggested_datetime.time(), tzinfo=UTC)
+
+    @instrumented("Facility.aavailable_arr")
+    async def aavailable_arr(
+        self,
+        suggested_datetime=None,
+        forward_delta=None,
+        reverse_delta=None,
+        taken_datetimes=None,
+        schedule_on_holidays=None,
+        site: Site = None,
+        slot_counter: SlotCounter | None = None,
+        reserve: bool | None = None,
+    ) -> Arrow:
+        """Returns an arrow object for a datetime equal to or
+        close to the suggested datetime, see `aavailable_datetime`.
+        """
+        return Arrow.fromdatetime(
+            await self.aavailable_datetime(
+                suggested_datetime=suggested_datetime,
+                forward_delta=forward_delta,
+                reverse_delta=reverse_delta,
+                taken_datetimes=taken_datetimes,
+                schedule_on_holidays=schedule_on_holidays,
+                site=site,
+                slot_counter=slot_counter,
+                reserve=reserve,
+            )
+        )
 
     @staticmethod
     def get_arr_span(
@@ -96,37 +343,22 @@ class Facility:
     ) -> Tuple[List[Union[Arrow, Any]], Arrow, Arrow]:
         """Returns a list of arrow objects in a custom ordered.
         Objects are ordered around the suggested date. For example,
+        suggested, +1, -1, +2, -2, ...
+
+        Not used by the search engines. See `iter_candidate_dates`.
         """
-        # min_arw = self.to_arrow_utc(suggested_arr.datetime - reverse_delta)
-        min_arr = Arrow.fromdate(
-            suggested_arr.datetime - reverse_delta, tzinfo=ZoneInfo("UTC")
-        )
-        # max_arw = self.to_arrow_utc(suggested_arw.datetime + forward_delta)
-        max_arr = Arrow.fromdate(
-            suggested_arr.datetime + forward_delta, tzinfo=ZoneInfo("UTC")
-        )
-        span = [arw[0] for arw in Arrow.span_range("day", min_arr.datetime, max_arr.datetime)]
-        span_lt = [arw for arw in span if arw.date() < suggested_arr.date()]
-        span_lt = sorted(span_lt, key=methodcaller("date"), reverse=True)
-        span_gt = [arw for arw in span if arw.date() > suggested_arr.date()]
-        arr_span = []
-        max_len = len(span_gt) if len(span_gt) > len(span_lt) else len(span_lt)
-        for i in range(0, max_len):
-            try:
-                item = span_lt.pop()
-            except IndexError:
-                pass
-            else:
-                arr_span.insert(0, item)
-            try:
-                item = span_gt.pop()
-            except IndexError:
-                pass
-            else:
-                arr_span.insert(0, item)
-        arr_span.insert(0, suggested_arr)
+        min_arr = Arrow.fromdate(suggested_arr.datetime - reverse_delta, tzinfo=UTC)
+        max_arr = Arrow.fromdate(suggested_arr.datetime + forward_delta, tzinfo=UTC)
+        lt_len = max((suggested_arr.date() - min_arr.date()).days, 0)
+        gt_len = max((max_arr.date() - suggested_arr.date()).days, 0)
+        arr_span = [suggested_arr]
+        for offset in iter_candidate_offsets(lt_len, gt_len):
+            arr_span.append(
+                Arrow.fromdate(suggested_arr.date() + timedelta(days=offset), tzinfo=UTC)
+            )
         return arr_span, min_arr, max_arr
 
+    @instrumented("Facility.available_arr")
     def available_arr(
         self,
         suggested_datetime=None,
@@ -135,56 +367,277 @@ class Facility:
         taken_datetimes=None,
         schedule_on_holidays=None,
         site: Site = None,
-    ):
+        slot_counter: SlotCounter | None = None,
+        reserve: bool | None = None,
+    ) -> Arrow:
         """Returns an arrow object for a datetime equal to or
         close to the suggested datetime.
 
-        To exclude datetimes other than holidays, pass a list of
-        datetimes in UTC to `taken_datetimes`.
-        """
-        available_arr = None
-        forward_delta = forward_delta or relativedelta(months=1)
-        reverse_delta = reverse_delta or relativedelta(months=0)
-        taken_arr = [
-            arrow.Arrow.fromdatetime(dt, tzinfo=ZoneInfo("UTC")).to("utc")
-            for dt in taken_datetimes or []
+        Kept for compatibility. See `available_datetime`.
+        """
+        return Arrow.fromdatetime(
+            self.available_datetime(
+                suggested_datetime=suggested_datetime,
+                forward_delta=forward_delta,
+                reverse_delta=reverse_delta,
+                taken_datetimes=taken_datetimes,
+                schedule_on_holidays=schedule_on_holidays,
+                site=site,
+                slot_counter=slot_counter,
+                reserve=reserve,
+            )
+        )
+
+    @instrumented("Facility.available_datetimes")
+    def available_datetimes(
+        self,
+        requests: Iterable[tuple[datetime | None, relativedelta | None, relativedelta | None]],
+        taken_datetimes: list[datetime] | TakenDates | None = None,
+        schedule_on_holidays: bool | None = None,
+        site: Site = None,
+        update_taken: bool | None = None,
+        slot_counter: SlotCounter | None = None,
+        reserve: bool | None = None,
+    ) -> list[datetime]:
+        """Returns a list of available datetimes, in order, for a
+        sequence of (suggested_datetime, forward_delta, reverse_delta)
+        tuples.
+
+        Holidays are looked up once and each available date found
+        is added to the taken dates before searching for the next.
+        If `taken_datetimes` is a `TakenDates` index, it is updated
+        in place.
+
+        If slots are enforced, booked counts are loaded once for
+        all windows and each available date found is counted as
+        booked.
+
+        If `update_taken` is False, each request is resolved
+        independently of the others and, if the engine supports it,
+        all requests are resolved in one vectorized pass.
+
+        If `reserve` is True, a slot on each available date is
+        reserved in the `SlotReservation` ledger.
+        """
+        requests = [
+            (
+                as_utc(suggested_datetime or get_utcnow()),
+                forward_delta or relativedelta(months=1),
+                reverse_delta or relativedelta(months=0),
+            )
+            for suggested_datetime, forward_delta, reverse_delta in requests
         ]
-        if suggested_datetime:
-            suggested_arr = arrow.Arrow.fromdatetime(suggested_datetime)
-        else:
-            suggested_arr = arrow.Arrow.fromdatetime(get_utcnow())
-        arr_span_range, min_arr, max_arr = self.get_arr_span(
-            suggested_arr,
-            forward_delta,
-            reverse_delta,
+        taken_dates = self.get_taken_dates(taken_datetimes)
+        holiday_dates = None if schedule_on_holidays else self.get_holiday_dates(site)
+        slot_counter = slot_counter or self.get_slot_counter(site)
+        if slot_counter and requests:
+            slot_counter.load(
+                min(get_window(*request)[0] for request in requests),
+                max(get_window(*request)[1] for request in requests),
+            )
+        update_taken = True if update_taken is None else update_taken
+        reserve_site = (site or self.holidays.site) if reserve else None
+        if not update_taken and not reserve and hasattr(self.engine, "search_many_datetimes"):
+            return self._available_datetimes_many(
+                requests, taken_dates, holiday_dates, slot_counter
+            )
+        available_datetimes = []
+        for suggested_datetime, forward_delta, reverse_delta in requests:
+            available_datetime = self._available_datetime(
+                suggested_datetime=suggested_datetime,
+                forward_delta=forward_delta,
+                reverse_delta=reverse_delta,
+                taken_dates=taken_dates,
+                holiday_dates=holiday_dates,
+                slot_counter=slot_counter,
+                reserve_site=reserve_site,
+            )
+            if update_taken:
+                taken_dates.add(available_datetime.date())
+                if slot_counter:
+                    slot_counter.add(available_datetime.date())
+            available_datetimes.append(available_datetime)
+        return available_datetimes
+
+    @instrumented("Facility.assign_datetimes")
+    def assign_datetimes(
+        self,
+        requests: Iterable[tuple[datetime | None, relativedelta | None, relativedelta | None]],
+        taken_datetimes: list[datetime] | TakenDates | None = None,
+        schedule_on_holidays: bool | None = None,
+        site: Site = None,
+        slot_counter: SlotCounter | None = None,
+    ) -> list[datetime]:
+        """Returns a list of available datetimes, in order, for a
+        sequence of (suggested_datetime, forward_delta, reverse_delta)
+        tuples, assigned together to minimize the total number of
+        days moved while respecting the slots per day.
+
+        Use to rebook many appointments at once. See `BulkScheduler`.
+        """
+        return self.bulk_scheduler_cls(
+            self,
+            taken_dates=self.get_taken_dates(taken_datetimes),
+            holiday_dates=None if schedule_on_holidays else self.get_holiday_dates(site),
+            slot_counter=slot_counter or self.get_slot_counter(site),
+        ).schedule(requests)
+
+    def _available_datetimes_many(
+        self,
+        requests: list[tuple[datetime, relativedelta, relativedelta]],
+        taken_dates: TakenDates,
+        holiday_dates: frozenset[date] | None,
+        slot_counter: SlotCounter | None,
+    ) -> list[datetime]:
+        """Returns a list of available datetimes using the engine's
+        vectorized `search_many_datetimes`.
+
+        Days at capacity are treated as taken. Falls back to a single
+        search for any date rejected by `open_slot_on`.
+        """
+        unavailable_dates = taken_dates
+        if slot_counter:
+            unavailable_dates = taken_dates.copy()
+            unavailable_dates.update(slot_counter.full_dates(self.slots_by_weekday))
+        suggested_datetimes, forward_deltas, reverse_deltas = (
+            [list(x) for x in zip(*requests)] if requests else ([], [], [])
+        )
+        available_datetimes = self.engine.search_many_datetimes(
+            suggested_datetimes,
+            forward_deltas,
+            reverse_deltas,
+            unavailable_dates,
+            holiday_dates,
         )
-        for arr in arr_span_range:
-            # add back time to arrow object, r
-            if arr.date().weekday() in self.weekdays and (
-                min_arr.date() <= arr.date() < max_arr.date()
+        open_slot_on_overridden = type(self).open_slot_on is not Facility.open_slot_on
+        for index, available_datetime in enumerate(available_datetimes):
+            if available_datetime is None or (
+                open_slot_on_overridden and not self.is_open_on(available_datetime.date())
             ):
-                is_holiday = False if schedule_on_holidays else self.is_holiday(arr.datetime)
-                if (
-                    not is_holiday
-                    and arr.date() not in [a.date() for a in taken_arr]
-                    and self.open_slot_on(arr)
-                ):
-                    available_arr = arr
-                    break
-        if not available_arr:
-            if self.best_effort_available_datetime:
-                available_arr = suggested_arr
-            else:
-                formatted_date = suggested_datetime.strftime(
-                    convert_php_dateformat(settings.SHORT_DATE_FORMAT)
+                available_datetimes[index] = self._available_datetime(
+                    suggested_datetime=suggested_datetimes[index],
+                    forward_delta=forward_deltas[index],
+                    reverse_delta=reverse_deltas[index],
+                    taken_dates=taken_dates,
+                    holiday_dates=holiday_dates,
+                    slot_counter=slot_counter,
                 )
-                raise FacilityError(
-                    f"No available appointment dates at facility for period. "
-                    f"Got no available dates within {reverse_delta.days}-"
-                    f"{forward_delta.days} days of {formatted_date}. "
-                    f"Facility is {repr(self)}."
-                )
-        available_arr = arrow.Arrow.fromdatetime(
-            datetime.combine(available_arr.date(), suggested_arr.time())
+        return available_datetimes
+
+    @staticmethod
+    def get_taken_dates(
+        taken_datetimes: list[datetime] | TakenDates | None,
+    ) -> TakenDates:
+        """Returns a TakenDates index for a list of datetimes in UTC.
+
+        If `taken_datetimes` is already a TakenDates index, it is
+        returned as is.
+        """
+        if isinstance(taken_datetimes, TakenDates):
+            return taken_datetimes
+        return TakenDates(taken_datetimes)
+
+    def get_holiday_dates(self, site: Site | None = None) -> frozenset[date]:
+        """Returns a frozenset of local holiday dates for the site's
+        country.
+        """
+        return self.get_holidays(site=site).cached_local_dates
+
+    def _available_datetime(
+        self,
+        suggested_datetime: datetime | None = None,
+        forward_delta: relativedelta | None = None,
+        reverse_delta: relativedelta | None = None,
+        taken_dates: TakenDates = None,
+        holiday_dates: frozenset[date] | None = None,
+        slot_counter: SlotCounter | None = None,
+        reserve_site: Site | None = None,
+    ) -> datetime:
+        """Returns a datetime in UTC equal to or close to the
+        suggested datetime.
+
+        The time of the suggested datetime is kept. A naive
+        suggested datetime is taken as UTC.
+
+        If `holiday_dates` is None, holidays are ignored. If
+        `slot_counter` is None, slots are not enforced. If
+        `reserve_site` is not None, a slot on the available date
+        is reserved for that site.
+        """
+        forward_delta, reverse_delta, suggested_datetime = self.get_search_args(
+            suggested_datetime, forward_delta, reverse_delta
+        )
+        if slot_counter:
+            slot_counter.load(*get_window(suggested_datetime, forward_delta, reverse_delta))
+        excluded_dates = taken_dates
+        while True:
+            available_date = self.engine.search(
+                suggested_datetime,
+                forward_delta,
+                reverse_delta,
+                excluded_dates,
+                holiday_dates,
+                slot_counter=slot_counter,
+            )
+            if (
+                not available_date
+                or not reserve_site
+                or self.reserve_slot(available_date, site=reserve_site)
+            ):
+                break
+            excluded_dates = self.exclude_reserved(excluded_dates, taken_dates, available_date)
+        if not available_date:
+            available_date = self.get_best_effort_date(
+                suggested_datetime, forward_delta, reverse_delta
+            )
+            if reserve_site:
+                self.reserve_slot(available_date, site=reserve_site, force=True)
+        return datetime.combine(available_date, suggested_datetime.time(), tzinfo=UTC)
+
+    @staticmethod
+    def get_search_args(
+        suggested_datetime: datetime | None,
+        forward_delta: relativedelta | None,
+        reverse_delta: relativedelta | None,
+    ) -> tuple[relativedelta, relativedelta, datetime]:
+        """Returns (forward_delta, reverse_delta, suggested_datetime)
+        with defaults applied and the datetime in UTC.
+        """
+        return (
+            forward_delta or relativedelta(months=1),
+            reverse_delta or relativedelta(months=0),
+            as_utc(suggested_datetime or get_utcnow()),
         )
-        return available_arr
+
+    @staticmethod
+    def exclude_reserved(
+        excluded_dates: TakenDates, taken_dates: TakenDates, reserved_date: date
+    ) -> TakenDates:
+        """Returns the excluded dates with a date on which slots were
+        reserved concurrently, without changing `taken_dates`.
+        """
+        if excluded_dates is taken_dates:
+            excluded_dates = TakenDates(taken_dates)
+        excluded_dates.add(reserved_date)
+        return excluded_dates
+
+    def get_best_effort_date(
+        self,
+        suggested_datetime: datetime,
+        forward_delta: relativedelta,
+        reverse_delta: relativedelta,
+    ) -> date:
+        """Returns the suggested date if no date is available and
+        `best_effort_available_datetime` is True, otherwise raises.
+        """
+        if not self.best_effort_available_datetime:
+            formatted_date = suggested_datetime.strftime(
+                convert_php_dateformat(settings.SHORT_DATE_FORMAT)
+            )
+            raise FacilityError(
+                f"No available appointment dates at facility for period. "
+                f"Got no available dates within {reverse_delta.days}-"
+                f"{forward_delta.days} days of {formatted_date}. "
+                f"Facility is {repr(self)}."
+            )
+        return suggested_datetime.date()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import date
+from threading import Lock, local
+from time import monotonic
+from typing import TYPE_CHECKING, Iterator, Type
+
+from django.db import transaction
+
+from .calendar_snapshot import get_calendar_snapshot
+from .instrumentation import add_count
+from .shared_holiday_cache import (
+    get_holiday_cache_version_interval,
+    get_shared_holiday_cache,
+)
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+    from .models import Holiday
+
+
+class HolidayCache:
+    """A process-wide, in-memory cache of holiday dates per country.
+
+    Each country's holidays are loaded from the model once into an
+    immutable set of local dates. The cache is cleared by the
+    `Holiday` post_save / post_delete signals and by `import_holidays`.
+
+    Use `deferred` to clear the cache once, after a transaction
+    commits, instead of on each change.
+
+    If a calendar snapshot is set, holidays are read from the
+    snapshot instead of the model. Once the cache is cleared, the
+    snapshot is not read again in this process until it is rebuilt.
+    Each process checks the snapshot at most once per interval and
+    clears its cache if the snapshot was rebuilt, for example by
+    another process. See `CalendarSnapshot`.
+
+    If a Django cache is shared, holidays are read from and stored in
+    the shared cache under a version key before querying the model.
+    Clearing the cache bumps the version. Each process reads the
+    version at most once per interval and clears its cache if it
+    changed. See `SharedHolidayCache`.
+    """
+
+    def __init__(self) -> None:
+        self._registry: dict[tuple[str, str], frozenset[date]] = {}
+        self._generation: int = 0
+        self._stale_snapshots: set[tuple[int, int, int]] = set()
+        self._snapshot_key: tuple[int, int, int] | None = None
+        self._snapshot_checked: float | None = None
+        self._version: int | None = None
+        self._version_checked: float = 0.0
+        self._lock = Lock()
+        self._local = local()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(keys={list(self._registry)})"
+
+    def __len__(self):
+        return len(self._registry)
+
+    def get(self, model_cls: Type[Holiday], country: str) -> frozenset[date]:
+        """Returns a frozenset of local dates for this country,
+        querying the model on first access only.
+        """
+        self._check_snapshot()
+        shared = get_shared_holiday_cache()
+        if shared and self._version_due():
+            self._set_version(shared.get_version())
+        key = (model_cls._meta.label_lower, country)
+        local_dates = self._lookup(key)
+        if local_dates is None:
+            generation, version = self._generation, self._version
+            local_dates = self._from_snapshot(*key)
+            if local_dates is None and shared:
+                local_dates = shared.get(*key, version)
+            if local_dates is None:
+                local_dates = frozenset(self.get_queryset(model_cls, country))
+                if shared:
+                    shared.set(*key, version, local_dates)
+            self._store(key, generation, local_dates)
+        return local_dates
+
+    async def aget(self, model_cls: Type[Holiday], country: str) -> frozenset[date]:
+        """Returns a frozenset of local dates for this country, see
+        `get`, querying the model with the async ORM.
+        """
+        self._check_snapshot()
+        shared = get_shared_holiday_cache()
+        if shared and self._version_due():
+            self._set_version(await shared.aget_version())
+        key = (model_cls._meta.label_lower, country)
+        local_dates = self._lookup(key)
+        if local_dates is None:
+            generation, version = self._generation, self._version
+            local_dates = self._from_snapshot(*key)
+            if local_dates is None and shared:
+                local_dates = await shared.aget(*key, version)
+            if local_dates is None:
+                local_dates = frozenset(
+                    [d async for d in self.get_queryset(model_cls, country)]
+                )
+                if shared:
+                    await shared.aset(*key, version, local_dates)
+            self._store(key, generation, local_dates)
+        return local_dates
+
+    @staticmethod
+    def get_queryset(model_cls: Type[Holiday], country: str) -> QuerySet:
+        return model_cls.objects.filter(country=country).values_list("local_date", flat=True)
+
+    def _from_snapshot(self, model: str, country: str) -> frozenset[date] | None:
+        """Returns the local dates for this country from the calendar
+        snapshot, or None if not in a current snapshot.
+        """
+        snapshot = get_calendar_snapshot()
+        if (
+            snapshot
+            and snapshot.key not in self._stale_snapshots
+            and snapshot.model == model
+            and country in snapshot.countries
+        ):
+            return snapshot.local_dates(country)
+        return None
+
+    def _check_snapshot(self) -> None:
+        """Clears the cache if the calendar snapshot changed since
+        last checked, checking at most once per interval.
+        """
+        if (
+            self._snapshot_checked is not None
+            and monotonic() - self._snapshot_checked < get_holiday_cache_version_interval()
+        ):
+            return
+        snapshot = get_calendar_snapshot()
+        key = snapshot.key if snapshot else None
+        with self._lock:
+            self._snapshot_checked = monotonic()
+            if key != self._snapshot_key:
+                self._generation += 1
+                self._registry = {}
+                self._snapshot_key = key
+
+    def _version_due(self) -> bool:
+        return (
+            self._version is None
+            or monotonic() - self._version_checked >= get_holiday_cache_version_interval()
+        )
+
+    def _set_version(self, version: int) -> None:
+        """Sets the shared version, clearing the cache if changed."""
+        with self._lock:
+            self._version_checked = monotonic()
+            if version != self._version:
+                self._generation += 1
+                self._registry = {}
+                self._version = version
+
+    def _lookup(self, key: tuple[str, str]) -> frozenset[date] | None:
+        local_dates = self._registry.get(key)
+        add_count("cache_misses" if local_dates is None else "cache_hits")
+        return local_dates
+
+    def _store(self, key: tuple[str, str], generation: int, local_dates: frozenset[date]):
+        with self._lock:
+            # do not store if the cache was cleared while loading
+            if generation == self._generation:
+                self._registry[key] = local_dates
+
+    def clear(self, country: str | None = None) -> None:
+        """Clears the cache for one country or for all countries
+        and bumps the shared version, if any.
+
+        Ignored in this thread within `deferred`.
+        """
+        if self.is_deferred:
+            return
+        snapshot = get_calendar_snapshot()
+        with self._lock:
+            self._generation += 1
+            if snapshot:
+                self._stale_snapshots.add(snapshot.key)
+            self._snapshot_checked = None
+            if country is None:
+                self._registry = {}
+            else:
+                self._registry = {k: v for k, v in self._registry.items() if k[1] != country}
+        if shared := get_shared_holiday_cache():
+            self._set_version(shared.bump())
+
+    @property
+    def is_deferred(self) -> bool:
+        """Returns True if within `deferred` in this thread."""
+        return bool(getattr(self._local, "deferred", 0))
+
+    @contextmanager
+    def deferred(self, using: str | None = None) -> Iterator[None]:
+        """Ignores clear() in this thread within the block and then
+        clears the whole cache once when the current transaction
+        commits, or immediately if not in a transaction.
+
+        For example:
+            with transaction.atomic(), holiday_cache.deferred():
+                ...
+        """
+        self._local.deferred = getattr(self._local, "deferred", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.deferred -= 1
+        if not self._local.deferred:
+            transaction.on_commit(self.clear, using=using)
+
+
+holiday_cache = HolidayCache()
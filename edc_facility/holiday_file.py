@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from django.conf import settings
+
+FIELDNAMES = ["local_date", "label", "country"]
+GZIP_MAGIC = b"\x1f\x8b"
+CACHE_VERSION = 1
+
+
+def open_holiday_file(path: str | Path) -> TextIO:
+    """Returns the holiday file opened for reading as text.
+
+    Gzip-compressed files are detected and decompressed as read.
+    """
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rt", newline="")
+    return open(path, "r", newline="")
+
+
+def iter_holiday_file(path: str | Path) -> Iterator[tuple[int, dict]]:
+    """Yields (line number, row) for each holiday in the file,
+    reading one row at a time.
+
+    The header row, if any, is skipped. See `is_header`.
+    """
+    with open_holiday_file(path) as f:
+        reader = csv.DictReader(f, fieldnames=FIELDNAMES)
+        for row in reader:
+            if reader.line_num == 1 and is_header(row):
+                continue
+            yield reader.line_num, row
+
+
+def is_header(row: dict) -> bool:
+    """Returns True if the first row of the file is a header.
+
+    Columns are read by position, so any column names are
+    accepted. The row is a header unless its first field starts
+    with a digit, as a date does. An invalid date on the first row
+    of a file without a header is still reported.
+    """
+    return not (row["local_date"] or "")[:1].isdigit()
+
+
+def get_holiday_file_cache_path() -> Path | None:
+    """Returns the path of the on-disk cache of the countries in
+    holiday files or None if the cache is disabled.
+
+    Set `settings.EDC_FACILITY_HOLIDAY_FILE_CACHE` to a path or to
+    None to disable. Defaults to a file in the cache directory of
+    the user, `$XDG_CACHE_HOME/edc_facility` or
+    `~/.cache/edc_facility`, or None if there is no home directory.
+    """
+    try:
+        path = settings.EDC_FACILITY_HOLIDAY_FILE_CACHE
+    except AttributeError:
+        try:
+            cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        except RuntimeError:
+            return None
+        path = cache_dir / "edc_facility" / "holiday_file_cache.json"
+    return Path(path).expanduser() if path else None
+
+
+def get_file_digest(path: str | Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def read_holiday_file_cache(cache_path: Path) -> dict:
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache
+
+
+def write_holiday_file_cache(cache_path: Path, cache: dict) -> None:
+    """Writes the cache atomically. Failures are ignored, for
+    example, on a read-only filesystem.
+    """
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=cache_path.parent, prefix=f".{cache_path.name}.", delete=False
+        ) as f:
+            json.dump(cache, f)
+        os.replace(f.name, cache_path)
+    except OSError:
+        pass
+
+
+def get_holiday_file_countries(path: str | Path) -> frozenset[str]:
+    """Returns the set of countries in the holiday file. A row
+    without a country is counted as "".
+
+    The result is kept in an on-disk cache keyed by the file's
+    path and fingerprinted by its mtime, size and sha256 hash.
+    If the mtime and size are unchanged, the file is not read. If
+    only the mtime changed, the file is hashed but not parsed.
+    """
+    path = Path(path).expanduser().resolve()
+    stat = path.stat()
+    cache_path = get_holiday_file_cache_path()
+    cache = read_holiday_file_cache(cache_path) if cache_path else {}
+    entry = cache.get("files", {}).get(str(path))
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return frozenset(entry["countries"])
+    digest = get_file_digest(path)
+    if entry and entry["size"] == stat.st_size and entry["sha256"] == digest:
+        countries = frozenset(entry["countries"])
+    else:
+        countries = frozenset(row["country"] or "" for _, row in iter_holiday_file(path))
+    if cache_path:
+        cache = {"version": CACHE_VERSION, "files": cache.get("files", {})}
+        cache["files"][str(path)] = dict(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            sha256=digest,
+            countries=sorted(countries),
+        )
+        write_holiday_file_cache(cache_path, cache)
+    return countries
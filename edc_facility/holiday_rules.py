@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from types import MappingProxyType
+
+from dateutil.easter import easter
+from dateutil.relativedelta import MO, relativedelta
+from dateutil.relativedelta import weekday as weekday_cls
+from django.conf import settings
+
+
+class HolidayRule(ABC):
+    """Base class for a rule that generates the holidays of a year.
+
+    Rules are immutable and hashable so expanded years can be
+    memoized. See `expand_rules`.
+    """
+
+    name: str
+
+    @abstractmethod
+    def dates(self, year: int) -> list[tuple[date, str]]:
+        """Returns a list of (local_date, name) for the year."""
+
+    def observed_dates(self, year: int, taken: set[date]) -> list[tuple[date, str]]:
+        """Returns a list of (local_date, name) observed in lieu of
+        holidays of the year, given the dates `taken` by the
+        holidays of all rules (Default: none).
+        """
+        return []
+
+
+@dataclass(frozen=True)
+class FixedDate(HolidayRule):
+    """A holiday on the same month and day every year.
+
+    For example, FixedDate(12, 25, "Christmas Day").
+    """
+
+    month: int
+    day: int
+    name: str
+
+    def dates(self, year: int) -> list[tuple[date, str]]:
+        return [(date(year, self.month, self.day), self.name)]
+
+
+@dataclass(frozen=True)
+class EasterRelative(HolidayRule):
+    """A holiday a number of days before or after Easter Sunday.
+
+    For example, EasterRelative(-2, "Good Friday").
+    """
+
+    days: int
+    name: str
+
+    def dates(self, year: int) -> list[tuple[date, str]]:
+        return [(easter(year) + timedelta(days=self.days), self.name)]
+
+
+@dataclass(frozen=True)
+class NthWeekday(HolidayRule):
+    """A holiday on the nth weekday of a month, counting from the
+    end of the month if `n` is negative, plus `days`.
+
+    For example, NthWeekday(2, MO, 3, "Presidents' Day") for the
+    third Monday of February.
+    """
+
+    month: int
+    weekday: weekday_cls | int
+    n: int
+    name: str
+    days: int = 0
+
+    def dates(self, year: int) -> list[tuple[date, str]]:
+        weekday = getattr(self.weekday, "weekday", self.weekday)
+        if self.n > 0:
+            delta = relativedelta(day=1, weekday=weekday_cls(weekday)(self.n))
+        else:
+            delta = relativedelta(day=31, weekday=weekday_cls(weekday)(self.n))
+        return [(date(year, self.month, 1) + delta + timedelta(days=self.days), self.name)]
+
+
+@dataclass(frozen=True)
+class ObservedOnMonday(HolidayRule):
+    """Adds the following Monday as a holiday where the holiday of
+    a rule falls on one of `weekdays` (Default: Sunday).
+
+    If the Monday is already a holiday, for example Boxing Day
+    after Christmas on a Sunday, the next free weekday is observed
+    instead. See `expand_rules`.
+
+    For example, ObservedOnMonday(FixedDate(1, 1, "New Year"),
+    observed_name="Public Holiday").
+    """
+
+    rule: HolidayRule
+    observed_name: str | None = None
+    weekdays: tuple[int, ...] = (6,)
+
+    @property
+    def name(self) -> str:
+        return self.rule.name
+
+    def dates(self, year: int) -> list[tuple[date, str]]:
+        return self.rule.dates(year)
+
+    def observed_dates(self, year: int, taken: set[date]) -> list[tuple[date, str]]:
+        taken = set(taken)
+        dates = []
+        for local_date, name in self.rule.dates(year):
+            if local_date.weekday() in self.weekdays:
+                observed_date = local_date + relativedelta(weekday=MO)
+                while observed_date in taken or observed_date.weekday() > 4:
+                    observed_date += timedelta(days=1)
+                taken.add(observed_date)
+                dates.append((observed_date, self.observed_name or f"{name} (observed)"))
+        return dates
+
+
+def get_holiday_rules(country: str) -> tuple[HolidayRule, ...]:
+    """Returns the holiday rules for this country from
+    `settings.EDC_FACILITY_HOLIDAY_RULES`, if any.
+
+    For example:
+        EDC_FACILITY_HOLIDAY_RULES = {
+            "botswana": [FixedDate(1, 1, "New Year"), EasterRelative(-2, "Good Friday")]
+        }
+    """
+    rules = getattr(settings, "EDC_FACILITY_HOLIDAY_RULES", None) or {}
+    return tuple(rules.get(country) or [])
+
+
+def get_holiday_rules_years() -> tuple[int, int]:
+    """Returns the number of years before and after the current
+    year for which rules are expanded into the holiday dates used
+    by `Facility`.
+    """
+    return getattr(settings, "EDC_FACILITY_HOLIDAY_RULES_YEARS", (5, 25))
+
+
+@lru_cache(maxsize=1024)
+def expand_rules(rules: tuple[HolidayRule, ...], year: int) -> MappingProxyType:
+    """Returns a read-only mapping of {local_date: name} for the
+    year, memoized per rules and year.
+
+    Days observed in lieu are added after the holidays of all
+    rules, so they do not fall on another holiday. Where rules
+    generate the same date, the first rule wins.
+    """
+    local_dates: dict[date, str] = {}
+    for rule in rules:
+        for local_date, name in rule.dates(year):
+            local_dates.setdefault(local_date, name)
+    taken = set(local_dates)
+    for rule in rules:
+        for local_date, name in rule.observed_dates(year, taken):
+            local_dates.setdefault(local_date, name)
+            taken.add(local_date)
+    return MappingProxyType(local_dates)
+
+
+def expand_rules_for_years(
+    rules: tuple[HolidayRule, ...], start_year: int, end_year: int
+) -> dict[date, str]:
+    """Returns {local_date: name} for the years from start_year to
+    end_year inclusive.
+    """
+    local_dates: dict[date, str] = {}
+    for year in range(start_year, end_year + 1):
+        local_dates.update(expand_rules(rules, year))
+    return local_dates
+
+
+@lru_cache(maxsize=32)
+def with_rule_dates(
+    local_dates: frozenset[date],
+    rules: tuple[HolidayRule, ...],
+    start_year: int,
+    end_year: int,
+) -> frozenset[date]:
+    """Returns the union of the local dates and the dates of the
+    rules for the years from start_year to end_year inclusive,
+    memoized.
+    """
+    return local_dates.union(expand_rules_for_years(rules, start_year, end_year))
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import TYPE_CHECKING
+import heapq
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Iterable
+from zoneinfo import ZoneInfo
 
 from django.apps import apps as django_apps
 from django.conf import settings
@@ -9,11 +11,23 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import QuerySet
 from edc_sites.site import sites as site_sites
 from edc_sites.utils import get_site_model_cls
+from edc_utils import get_utcnow
 from edc_utils.date import to_local
 from multisite.exceptions import MultisiteSiteDoesNotExist
 
+from .engines import as_utc
 from .exceptions import FacilityCountryError, FacilitySiteError, HolidayError
+from .holiday_cache import holiday_cache
+from .holiday_rules import (
+    HolidayRule,
+    expand_rules,
+    expand_rules_for_years,
+    get_holiday_rules,
+    get_holiday_rules_years,
+    with_rule_dates,
+)
 from .holidays_disabled import holidays_disabled
+from .instrumentation import instrumented
 
 if TYPE_CHECKING:
     from django.contrib.sites.models import Site
@@ -27,7 +41,6 @@ class Holidays:
     model: str = "edc_facility.holiday"
 
     def __init__(self, site: Site = None) -> None:
-        self._holidays = None
         self.model_cls = django_apps.get_model(self.model)
         self._site: Site | None = site
 
@@ -45,22 +58,52 @@ class Holidays:
         return [obj.local_date for obj in self.holidays]
 
     @property
-    def site(self) -> Site | None:
-        """Returns the Site model instance."""
-        if not self._site:
-            try:
-                self._site = get_site_model_cls().objects.get_current()
-            except ObjectDoesNotExist as e:
-                raise FacilitySiteError(
-                    f"Unable to determine site. Cannot lookup holidays. "
-                    f"settings.SITE_ID={settings.SITE_ID}. Got {e}"
-                )
-            except MultisiteSiteDoesNotExist as e:
-                raise FacilitySiteError(
-                    f"Unable to determine site. Cannot lookup holidays. "
-                    f"settings.SITE_ID={settings.SITE_ID}. Got MultisiteSiteDoesNotExist({e})."
-                )
-        return self._site
+    def site(self) -> Site:
+        """Returns the Site model instance.
+
+        If not set when instantiated, the current site is looked up
+        on each access so that one instance may be shared across
+        sites.
+        """
+        if self._site:
+            return self._site
+        try:
+            return get_site_model_cls().objects.get_current()
+        except ObjectDoesNotExist as e:
+            raise FacilitySiteError(
+                f"Unable to determine site. Cannot lookup holidays. "
+                f"settings.SITE_ID={settings.SITE_ID}. Got {e}"
+            )
+        except MultisiteSiteDoesNotExist as e:
+            raise FacilitySiteError(
+                f"Unable to determine site. Cannot lookup holidays. "
+                f"settings.SITE_ID={settings.SITE_ID}. Got MultisiteSiteDoesNotExist({e})."
+            )
+
+    async def asite(self) -> Site:
+        """Returns the Site model instance, see `site`.
+
+        The current site is read from the sites framework cache
+        and, if not cached, queried with the async ORM.
+        """
+        from django.contrib.sites import models as sites_models
+
+        if self._site:
+            return self._site
+        site_id = settings.SITE_ID
+        try:
+            return sites_models.SITE_CACHE[site_id]
+        except KeyError:
+            pass
+        try:
+            site = await get_site_model_cls().objects.aget(pk=site_id)
+        except ObjectDoesNotExist as e:
+            raise FacilitySiteError(
+                f"Unable to determine site. Cannot lookup holidays. "
+                f"settings.SITE_ID={settings.SITE_ID}. Got {e}"
+            )
+        sites_models.SITE_CACHE[site_id] = site
+        return site
 
     @property
     def country(self) -> str:
@@ -68,30 +111,207 @@ class Holidays:
 
         Requires SiteProfile from edc_sites to be updated.
         """
-        country = site_sites.get(self.site.id).country
+        return self.get_country(self.site)
+
+    async def acountry(self) -> str:
+        return self.get_country(await self.asite())
+
+    @staticmethod
+    def get_country(site: Site) -> str:
+        country = site_sites.get(site.id).country
         if not country:
             raise FacilityCountryError("Unable to determine country.")
         return country
 
     @property
     def holidays(self) -> QuerySet:
-        """Returns a holiday model instance for this country."""
-        if not self._holidays:
-            if holidays_disabled():
-                self._holidays = self.model_cls.objects.none()
-            else:
-                if not self.model_cls.objects.filter(country=self.country).exists():
-                    raise HolidayError(
-                        f"No holidays found for '{self.country}. See {self.model}."
-                    )
-            self._holidays = self.model_cls.objects.filter(country=self.country)
-        return self._holidays
+        """Returns a queryset of holiday model instances for the
+        country of the site.
 
+        Not cached on the instance since the site, and so the
+        country, may change between calls.
+        """
+        if holidays_disabled():
+            return self.model_cls.objects.none()
+        country = self.country
+        if not self.model_cls.objects.filter(country=country).exists():
+            raise HolidayError(f"No holidays found for '{country}. See {self.model}.")
+        return self.model_cls.objects.filter(country=country)
+
+    async def aholidays(self) -> QuerySet:
+        """Returns a queryset of holiday model instances for the
+        country of the site, see `holidays`.
+
+        Iterate the queryset with `async for`.
+        """
+        if holidays_disabled():
+            return self.model_cls.objects.none()
+        country = await self.acountry()
+        if not await self.model_cls.objects.filter(country=country).aexists():
+            raise HolidayError(f"No holidays found for '{country}. See {self.model}.")
+        return self.model_cls.objects.filter(country=country)
+
+    @property
+    def rules(self) -> tuple[HolidayRule, ...]:
+        """Returns the holiday rules for this country, if any."""
+        return get_holiday_rules(self.country)
+
+    @property
+    def cached_local_dates(self) -> frozenset[date]:
+        """Returns the cached frozenset of local dates for this
+        country.
+
+        If the country has holiday rules, includes the dates of the
+        rules for the years of `get_holiday_rules_years`.
+
+        See also `holiday_cache`.
+        """
+        return self.with_rule_dates(
+            holiday_cache.get(self.model_cls, self.country), self.rules
+        )
+
+    async def acached_local_dates(self) -> frozenset[date]:
+        """Returns the cached frozenset of local dates for this
+        country, see `cached_local_dates`.
+
+        Shares `holiday_cache` with the sync path.
+        """
+        country = await self.acountry()
+        return self.with_rule_dates(
+            await holiday_cache.aget(self.model_cls, country), get_holiday_rules(country)
+        )
+
+    @staticmethod
+    def with_rule_dates(
+        local_dates: frozenset[date], rules: tuple[HolidayRule, ...]
+    ) -> frozenset[date]:
+        """Returns the local dates including the dates of the rules
+        for the years of `get_holiday_rules_years`, if any.
+        """
+        if rules:
+            years_before, years_after = get_holiday_rules_years()
+            year = get_utcnow().year
+            local_dates = with_rule_dates(
+                local_dates, rules, year - years_before, year + years_after
+            )
+        return local_dates
+
+    def local_dates_for_years(self, start_year: int, end_year: int) -> frozenset[date]:
+        """Returns a frozenset of local dates for the years from
+        start_year to end_year inclusive, including the dates of
+        the holiday rules for those years.
+        """
+        return frozenset(
+            local_date
+            for local_date in holiday_cache.get(self.model_cls, self.country)
+            if start_year <= local_date.year <= end_year
+        ).union(expand_rules_for_years(self.rules, start_year, end_year))
+
+    def between(self, start: date, end: date) -> list[date]:
+        """Returns the local dates of holidays from start to end
+        inclusive, in order, including the dates of the holiday
+        rules for those years.
+
+        Dates are streamed from one range query on `country` and
+        `local_date` and merged in order with the dates of the rules,
+        not loaded into the holiday cache. See
+        `HolidayManager.local_dates_between`.
+        """
+        rule_dates = sorted(
+            local_date
+            for local_date in expand_rules_for_years(self.rules, start.year, end.year)
+            if start <= local_date <= end
+        )
+        local_dates: list[date] = []
+        for local_date in heapq.merge(
+            self.model_cls.objects.local_dates_between(self.country, start, end), rule_dates
+        ):
+            if not local_dates or local_date != local_dates[-1]:
+                local_dates.append(local_date)
+        return local_dates
+
+    @instrumented("Holidays.is_holiday")
     def is_holiday(self, utc_datetime=None) -> bool:
-        """Returns True if the UTC datetime is a holiday."""
-        local_date = to_local(utc_datetime).date()
-        try:
-            self.model_cls.objects.get(country=self.country, local_date=local_date)
-        except ObjectDoesNotExist:
-            return False
-        return True
+        """Returns True if the UTC datetime is a holiday.
+
+        Holiday rules are expanded for the year of the date as
+        needed.
+        """
+        return self.is_holiday_on(
+            to_local(utc_datetime).date(), self.cached_local_dates, self.rules
+        )
+
+    @instrumented("Holidays.ais_holiday")
+    async def ais_holiday(self, utc_datetime=None) -> bool:
+        """Returns True if the UTC datetime is a holiday, see
+        `is_holiday`.
+        """
+        country = await self.acountry()
+        return self.is_holiday_on(
+            to_local(utc_datetime).date(),
+            await self.acached_local_dates(),
+            get_holiday_rules(country),
+        )
+
+    @staticmethod
+    def is_holiday_on(
+        local_date: date, local_dates: frozenset[date], rules: tuple[HolidayRule, ...]
+    ) -> bool:
+        return local_date in local_dates or (
+            bool(rules) and local_date in expand_rules(rules, local_date.year)
+        )
+
+    @instrumented("Holidays.holidays_in")
+    def holidays_in(self, values: Iterable[datetime | date]) -> frozenset[date]:
+        """Returns the local dates of `values` that are holidays,
+        with at most one query for the country's holidays.
+
+        Datetimes are converted to local dates. A naive datetime is
+        taken as UTC. Dates are taken as local dates.
+
+        For example:
+            holiday_dates = holidays.holidays_in(appt_datetimes)
+            [to_local(dt).date() in holiday_dates for dt in appt_datetimes]
+        """
+        return self.filter_holidays(
+            self.to_local_dates(values), self.cached_local_dates, self.rules
+        )
+
+    @instrumented("Holidays.aholidays_in")
+    async def aholidays_in(self, values: Iterable[datetime | date]) -> frozenset[date]:
+        """Returns the local dates of `values` that are holidays, see
+        `holidays_in`.
+        """
+        country = await self.acountry()
+        return self.filter_holidays(
+            self.to_local_dates(values),
+            await self.acached_local_dates(),
+            get_holiday_rules(country),
+        )
+
+    @staticmethod
+    def to_local_dates(values: Iterable[datetime | date]) -> set[date]:
+        """Returns the set of local dates of datetimes or dates,
+        looking up the local timezone once.
+        """
+        tz = ZoneInfo(settings.TIME_ZONE)
+        return {
+            as_utc(value).astimezone(tz).date() if isinstance(value, datetime) else value
+            for value in values
+        }
+
+    @staticmethod
+    def filter_holidays(
+        local_dates: set[date], holiday_dates: frozenset[date], rules: tuple[HolidayRule, ...]
+    ) -> frozenset[date]:
+        """Returns the local dates that are in `holiday_dates` or,
+        for years outside of the cached years, generated by `rules`.
+        """
+        found = local_dates.intersection(holiday_dates)
+        if rules:
+            found.update(
+                local_date
+                for local_date in local_dates - found
+                if local_date in expand_rules(rules, local_date.year)
+            )
+        return frozenset(found)
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
-import csv
 import sys
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Type
+from typing import TYPE_CHECKING, Iterator, Type
 
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import transaction
+from django.db import connection, transaction
 from edc_sites.site import sites
 from edc_utils import get_utcnow
-from tqdm import tqdm
 
+from .calendar_snapshot import build_calendar_snapshot_on_commit
 from .exceptions import HolidayFileNotFoundError, HolidayImportError
-from .utils import get_holiday_model_cls
+from .holiday_cache import holiday_cache
+from .holiday_file import iter_holiday_file
+from .holiday_rules import expand_rules_for_years, get_holiday_rules
 
 if TYPE_CHECKING:
     from .models import Holiday
@@ -22,12 +24,36 @@ if TYPE_CHECKING:
 LOCAL_DATE = 0
 LABEL = 1
 COUNTRY = 2
+CHUNK_SIZE = 500
 
 
-def import_holidays(verbose: bool | None = None, test: bool | None = None) -> None:
+def import_holidays(
+    verbose: bool | None = None,
+    test: bool | None = None,
+    incremental: bool | None = None,
+    dry_run: bool | None = None,
+) -> HolidayDiff | None:
+    """Replaces all holidays with those in `settings.HOLIDAY_FILE`.
+
+    The table is replaced in one transaction so readers see either
+    the old or the new holidays, never an empty or partial table.
+    In-process holiday caches are cleared once, after the
+    transaction commits.
+
+    If `incremental` is True, only the differences between the file
+    and the table are applied and the HolidayDiff is returned. If
+    `dry_run` is True, the HolidayDiff is returned but not applied.
+
+    If a calendar snapshot is set, it is rebuilt after the
+    transaction commits. See `build_calendar_snapshot`.
+    """
+    from .utils import get_holiday_model_cls  # avoid importing Facility on startup
+
     model_cls = get_holiday_model_cls()
     if test:
-        import_for_tests(model_cls)
+        with transaction.atomic(), holiday_cache.deferred():
+            import_for_tests(model_cls)
+        build_calendar_snapshot_on_commit()
     else:
         path = settings.HOLIDAY_FILE
         try:
@@ -41,48 +67,276 @@ def import_holidays(verbose: bool | None = None, test: bool | None = None) -> No
             sys.stdout.write(
                 f"\nImporting holidays from '{path}' into {model_cls._meta.label_lower}\n"
             )
-        model_cls.objects.all().delete()
-
-        recs = check_for_duplicates_in_file(path)
-
-        import_file(path, recs, model_cls)
+        if incremental or dry_run:
+            diff = diff_holidays(path, model_cls)
+            if not dry_run:
+                apply_holiday_diff(diff, model_cls, verbose=verbose)
+                if diff:
+                    build_calendar_snapshot_on_commit()
+            return diff
+        with transaction.atomic(), holiday_cache.deferred():
+            bulk_delete(model_cls)
+            import_file(path, model_cls, verbose=verbose)
+        build_calendar_snapshot_on_commit()
 
         if verbose:
             sys.stdout.write("Done.\n")
+    return None
+
+
+@dataclass
+class HolidayDiff:
+    """The differences between a holiday file and the table.
+
+    `updates` are (holiday, old name) tuples where the holiday has
+    the pk of the existing row and the name in the file.
+    """
+
+    inserts: list[Holiday] = field(default_factory=list)
+    updates: list[tuple[Holiday, str]] = field(default_factory=list)
+    deletes: list[Holiday] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def __str__(self):
+        return (
+            f"{len(self.inserts)} to insert, {len(self.updates)} to update, "
+            f"{len(self.deletes)} to delete."
+        )
+
+    def report(self) -> str:
+        """Returns the differences, one per line."""
+        lines = [f"+ {obj.local_date} {obj.country} {obj.name}" for obj in self.inserts]
+        lines.extend(
+            f"~ {obj.local_date} {obj.country} {old_name} -> {obj.name}"
+            for obj, old_name in self.updates
+        )
+        lines.extend(f"- {obj.local_date} {obj.country} {obj.name}" for obj in self.deletes)
+        lines.append(str(self))
+        return "\n".join(lines)
+
+
+def diff_holidays(path: str, model_cls: Type[Holiday]) -> HolidayDiff:
+    """Returns the differences between the file and the table in
+    one pass over each.
+
+    Existing rows are hashed on (country, local_date) with one
+    query. Each row in the file is then looked up as it is read.
+    """
+    existing = {
+        (country, local_date): (pk, name)
+        for pk, country, local_date, name in model_cls.objects.values_list(
+            "pk", "country", "local_date", "name"
+        ).iterator()
+    }
+    diff = HolidayDiff()
+    for obj in iter_holidays_in_file(path, model_cls):
+        try:
+            pk, name = existing.pop((obj.country, obj.local_date))
+        except KeyError:
+            diff.inserts.append(obj)
+        else:
+            if name != obj.name:
+                obj.pk = pk
+                diff.updates.append((obj, name))
+    diff.deletes = [
+        model_cls(pk=pk, country=country, local_date=local_date, name=name)
+        for (country, local_date), (pk, name) in existing.items()
+    ]
+    return diff
+
+
+def apply_holiday_diff(
+    diff: HolidayDiff,
+    model_cls: Type[Holiday],
+    verbose: bool | None = None,
+    chunk_size: int | None = None,
+) -> None:
+    """Applies the differences in one transaction.
+
+    If there are no differences, nothing is written and holiday
+    caches are not cleared.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    start = time.perf_counter()
+    if diff:
+        with transaction.atomic(), holiday_cache.deferred():
+            model_cls.objects.bulk_create(diff.inserts, batch_size=chunk_size)
+            model_cls.objects.bulk_update(
+                [obj for obj, _ in diff.updates], ["name"], batch_size=chunk_size
+            )
+            pks = [obj.pk for obj in diff.deletes]
+            for index in range(0, len(pks), chunk_size):
+                bulk_delete(model_cls, pks[index : index + chunk_size])
+    if verbose:
+        sys.stdout.write(
+            f"Inserted {len(diff.inserts)}, updated {len(diff.updates)} and deleted "
+            f"{len(diff.deletes)} holidays in {time.perf_counter() - start:.2f}s.\n"
+        )
+
+
+def bulk_delete(model_cls: Type[Holiday], pks: list[int] | None = None) -> int:
+    """Deletes all rows, or the rows with these primary keys, with
+    one DELETE statement and returns the number of rows deleted.
+
+    Rows are not loaded and pre_delete / post_delete signals are not
+    sent, so use within `holiday_cache.deferred()`, which clears the
+    caches once on commit instead.
+    """
+    sql = f"DELETE FROM {connection.ops.quote_name(model_cls._meta.db_table)}"
+    if pks is not None:
+        if not pks:
+            return 0
+        pk_column = connection.ops.quote_name(model_cls._meta.pk.column)
+        sql = f"{sql} WHERE {pk_column} IN ({', '.join(['%s'] * len(pks))})"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, pks)
+        return cursor.rowcount
 
 
-def check_for_duplicates_in_file(path) -> list:
-    """Returns a list of records."""
-    with open(path, "r") as f:
-        reader = csv.DictReader(f, fieldnames=["local_date", "label", "country"])
-        recs = [(row["local_date"], row["country"]) for row in reader]
-    if len(recs) != len(list(set(recs))):
-        raise HolidayImportError("Invalid file. Duplicate dates detected for a country")
-    return recs
-
-
-def import_file(path: str, recs: list, model_cls: Holiday):
-    with open(path, "r") as f:
-        reader = csv.DictReader(f, fieldnames=["local_date", "label", "country"])
-        for index, row in tqdm(enumerate(reader), total=len(recs)):
-            if index == 0:
-                continue
-            try:
-                local_date = datetime.strptime(row["local_date"], "%Y-%m-%d").date()
-            except ValueError as e:
-                raise HolidayImportError(
-                    f"Invalid format when importing from " f"{path}. Got '{e}'"
-                )
-            else:
-                try:
-                    obj = model_cls.objects.get(country=row["country"], local_date=local_date)
-                except ObjectDoesNotExist:
-                    model_cls.objects.create(
-                        country=row["country"], local_date=local_date, name=row["label"]
-                    )
-                else:
-                    obj.name = row["label"]
-                    obj.save()
+def import_file(
+    path: str,
+    model_cls: Type[Holiday],
+    verbose: bool | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Upserts holidays from the file in one pass and in one
+    transaction and returns the number of rows imported.
+
+    Rows are written in chunks as the file is read. Existing
+    holidays for the same country and local date are renamed.
+
+    If any row is invalid the transaction is rolled back. See
+    `iter_holidays_in_file`.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    start = time.perf_counter()
+    count = 0
+    with transaction.atomic():
+        objs = []
+        for obj in iter_holidays_in_file(path, model_cls):
+            objs.append(obj)
+            if len(objs) == chunk_size:
+                count += upsert_holidays(model_cls, objs)
+                objs = []
+        count += upsert_holidays(model_cls, objs)
+    if verbose:
+        seconds = time.perf_counter() - start
+        sys.stdout.write(
+            f"Imported {count} holidays in {seconds:.2f}s "
+            f"({count / seconds if seconds else count:.0f} rows/s).\n"
+        )
+    return count
+
+
+def iter_holidays_in_file(path: str, model_cls: Type[Holiday]) -> Iterator[Holiday]:
+    """Yields an unsaved holiday model instance for each valid row
+    in the file, reading one row at a time.
+
+    Memory does not grow with the size of the file other than one
+    integer per holiday to detect duplicates.
+
+    Every invalid row is collected and reported in one
+    HolidayImportError raised after the last row.
+    """
+    errors: list[str] = []
+    # (country, local_date) as one int per holiday
+    countries: dict[str, int] = {}
+    keys: set[int] = set()
+    for line_num, row in iter_holiday_file(path):
+        try:
+            obj = get_holiday_from_row(model_cls, row)
+        except HolidayImportError as e:
+            errors.append(f"Line {line_num}: {e}")
+            continue
+        key = (
+            countries.setdefault(obj.country, len(countries)) << 32
+        ) | obj.local_date.toordinal()
+        if key in keys:
+            errors.append(
+                f"Line {line_num}: Duplicate date for country. "
+                f"Got '{obj.local_date}', '{obj.country}'."
+            )
+            continue
+        keys.add(key)
+        if not errors:
+            yield obj
+    if errors:
+        raise HolidayImportError(
+            f"Invalid holiday file. Got {len(errors)} errors in {path}.\n" + "\n".join(errors)
+        )
+
+
+def get_holiday_from_row(model_cls: Type[Holiday], row: dict) -> Holiday:
+    """Returns an unsaved holiday model instance for a row or
+    raises a HolidayImportError.
+    """
+    try:
+        local_date = datetime.strptime(row["local_date"] or "", "%Y-%m-%d").date()
+    except ValueError as e:
+        raise HolidayImportError(f"Invalid local_date. Got '{e}'")
+    if not row["country"]:
+        raise HolidayImportError("Invalid country. Got None.")
+    if not row["label"]:
+        raise HolidayImportError("Invalid label. Got None.")
+    return model_cls(country=row["country"], local_date=local_date, name=row["label"])
+
+
+def upsert_holidays(model_cls: Type[Holiday], objs: list[Holiday]) -> int:
+    """Inserts holidays, or renames existing holidays for the same
+    country and local date, with one query and returns the number
+    of rows.
+    """
+    if not objs:
+        return 0
+    opts = dict(update_conflicts=True, update_fields=["name"])
+    if connection.features.supports_update_conflicts_with_target:
+        opts.update(unique_fields=["country", "local_date"])
+    model_cls.objects.bulk_create(objs, **opts)
+    return len(objs)
+
+
+def materialize_holiday_rules(
+    country: str,
+    start_year: int,
+    end_year: int,
+    verbose: bool | None = None,
+    chunk_size: int | None = None,
+) -> int:
+    """Writes the holidays generated by the country's holiday rules
+    for the years from start_year to end_year inclusive to the
+    holiday table and returns the number of rows written.
+
+    Holidays are upserted in chunks in one transaction. In-process
+    holiday caches are cleared once, after the transaction commits.
+    """
+    from .utils import get_holiday_model_cls  # avoid importing Facility on startup
+
+    model_cls = get_holiday_model_cls()
+    rules = get_holiday_rules(country)
+    if not rules:
+        raise HolidayImportError(
+            f"No holiday rules for country. See settings.EDC_FACILITY_HOLIDAY_RULES. "
+            f"Got '{country}'."
+        )
+    chunk_size = chunk_size or CHUNK_SIZE
+    objs = [
+        model_cls(country=country, local_date=local_date, name=name)
+        for local_date, name in sorted(
+            expand_rules_for_years(rules, start_year, end_year).items()
+        )
+    ]
+    with transaction.atomic(), holiday_cache.deferred():
+        for index in range(0, len(objs), chunk_size):
+            upsert_holidays(model_cls, objs[index : index + chunk_size])
+    build_calendar_snapshot_on_commit()
+    if verbose:
+        sys.stdout.write(
+            f"Materialized {len(objs)} holidays for '{country}' "
+            f"from {start_year} to {end_year}.\n"
+        )
+    return len(objs)
 
 
 def import_for_tests(model_cls: Type[Holiday]):
@@ -106,6 +360,8 @@ def import_for_tests(model_cls: Type[Holiday]):
         [f"{year}-12-25", "Christmas Day", country],
         [f"{year}-12-26", "Boxing Day", country],
     ]
+    from tqdm import tqdm  # slow to import, so not imported on startup
+
     objs = []
     for index, row in tqdm(enumerate(rows), total=len(rows)):
         if index == 0:
@@ -121,5 +377,5 @@ def import_for_tests(model_cls: Type[Holiday]):
                 model_cls(country=row[COUNTRY], local_date=local_date, name=row[LABEL])
             )
     with transaction.atomic():
-        model_cls.objects.all().delete()
+        bulk_delete(model_cls)
         model_cls.objects.bulk_create(objs)
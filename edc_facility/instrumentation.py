@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from inspect import iscoroutinefunction
+from threading import Lock, local
+from time import perf_counter
+from typing import Callable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+# measurements of the instrumented calls in progress in this context
+_measurements: ContextVar[tuple[Measurement, ...]] = ContextVar(
+    "edc_facility_measurements", default=()
+)
+# lists collecting measurements in this context, see `instrument`
+_collectors: ContextVar[tuple[list, ...]] = ContextVar("edc_facility_collectors", default=())
+# per thread depth of `start_counting_queries`
+_counting = local()
+
+
+@dataclass
+class Measurement:
+    """The cost of one instrumented call.
+
+    `candidates` is the number of candidate days examined by the
+    search engine. `cache_hits` and `cache_misses` count lookups
+    in the `holiday_cache`. `queries` is the number of database
+    queries issued.
+
+    Counts of nested instrumented calls are included in the
+    counts of the outer call.
+    """
+
+    name: str
+    seconds: float = 0.0
+    queries: int = 0
+    candidates: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    context: dict = field(default_factory=dict)
+
+
+class SiteInstruments:
+    """A process-wide registry of callbacks that receive a
+    `Measurement` for each instrumented call.
+
+    Instrumentation is off unless a callback is registered or
+    `instrument` is in use. When off, instrumented calls only
+    check `active`.
+
+    For example, to feed a metrics client:
+        site_instruments.register(
+            lambda m: statsd.timing(f"edc_facility.{m.name}", m.seconds * 1000)
+        )
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: tuple[Callable[[Measurement], None], ...] = ()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(callbacks={len(self._callbacks)})"
+
+    @property
+    def active(self) -> bool:
+        return bool(self._callbacks or _collectors.get())
+
+    def register(self, callback: Callable[[Measurement], None]) -> None:
+        with self._lock:
+            if callback not in self._callbacks:
+                self._callbacks = (*self._callbacks, callback)
+
+    def unregister(self, callback: Callable[[Measurement], None]) -> None:
+        with self._lock:
+            self._callbacks = tuple(c for c in self._callbacks if c != callback)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._callbacks = ()
+
+    def emit(self, measurement: Measurement) -> None:
+        for collector in _collectors.get():
+            collector.append(measurement)
+        for callback in self._callbacks:
+            callback(measurement)
+
+
+site_instruments = SiteInstruments()
+
+
+def add_count(name: str, value: int = 1) -> None:
+    """Adds to a count of the instrumented calls in progress, if any.
+
+    For example, add_count("candidates", 3).
+    """
+    for measurement in _measurements.get():
+        setattr(measurement, name, getattr(measurement, name) + value)
+
+
+def count_query(execute, sql, params, many, context):
+    """An execute wrapper that counts the query for each
+    measurement in progress in the context of the query.
+    """
+    for measurement in _measurements.get():
+        measurement.queries += 1
+    return execute(sql, params, many, context)
+
+
+def start_counting_queries() -> None:
+    """Installs `count_query` on the database connections of this
+    thread, once however deeply nested.
+    """
+    depth = getattr(_counting, "depth", 0)
+    if not depth:
+        for connection in connections.all():
+            connection.execute_wrappers.append(count_query)
+    _counting.depth = depth + 1
+
+
+def stop_counting_queries() -> None:
+    _counting.depth -= 1
+    if not _counting.depth:
+        for connection in connections.all():
+            connection.execute_wrappers.remove(count_query)
+
+
+@contextmanager
+def measure(name: str, **context) -> Iterator[Measurement]:
+    """Measures the block as one call named `name`, counting the
+    queries issued on all database connections of this thread, and
+    emits the `Measurement` when the block exits.
+    """
+    measurement = Measurement(name=name, context=context)
+    token = _measurements.set((*_measurements.get(), measurement))
+    start = perf_counter()
+    start_counting_queries()
+    try:
+        yield measurement
+    finally:
+        stop_counting_queries()
+        measurement.seconds = perf_counter() - start
+        _measurements.reset(token)
+        site_instruments.emit(measurement)
+
+
+def instrumented(name: str) -> Callable:
+    """Decorates a method, or a coroutine function, to emit a
+    `Measurement` per call, if instrumentation is active.
+
+    For a coroutine function, queries are also counted on the
+    thread of `sync_to_async` used by the async ORM.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not site_instruments.active:
+                    return await func(*args, **kwargs)
+                with measure(name):
+                    await sync_to_async(start_counting_queries)()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        await sync_to_async(stop_counting_queries)()
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not site_instruments.active:
+                return func(*args, **kwargs)
+            with measure(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def instrument() -> Iterator[list[Measurement]]:
+    """Collects the measurements of instrumented calls made in this
+    thread within the block.
+
+    For example, to assert a query budget:
+        with instrument() as measurements:
+            facility.available_datetime(suggested_datetime=...)
+        assert measurements[-1].queries <= 1
+    """
+    measurements: list[Measurement] = []
+    token = _collectors.set((*_collectors.get(), measurements))
+    try:
+        yield measurements
+    finally:
+        _collectors.reset(token)
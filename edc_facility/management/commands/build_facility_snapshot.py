@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...calendar_snapshot import CalendarSnapshotError, build_calendar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a snapshot of the holiday table that workers on this host map "
+        "read-only instead of querying the database. "
+        "See settings.EDC_FACILITY_CALENDAR_SNAPSHOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Path of the snapshot (default: settings.EDC_FACILITY_CALENDAR_SNAPSHOT)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            path = build_calendar_snapshot(options["output"])
+        except CalendarSnapshotError as e:
+            raise CommandError(e)
+        self.stdout.write(f"Wrote calendar snapshot to '{path}'.")
@@ -6,8 +6,27 @@ from ...import_holidays import HolidayImportError, import_holidays
 class Command(BaseCommand):
     help = "Import country holidays"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Apply only the differences between the file and the table",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the differences between the file and the table without applying",
+        )
+
     def handle(self, *args, **options):
         try:
-            import_holidays(verbose=True)
+            # a dry run prints the diff summary only
+            diff = import_holidays(
+                verbose=not options["dry_run"],
+                incremental=options["incremental"],
+                dry_run=options["dry_run"],
+            )
         except HolidayImportError as e:
             raise CommandError(e)
+        if options["dry_run"]:
+            self.stdout.write(diff.report())
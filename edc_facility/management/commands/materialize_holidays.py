@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...import_holidays import HolidayImportError, materialize_holiday_rules
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the holidays generated by the holiday rules of each country "
+        "for a range of years to the holiday table. "
+        "See settings.EDC_FACILITY_HOLIDAY_RULES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("countries", nargs="+", help="Countries with holiday rules")
+        parser.add_argument("--start-year", type=int, required=True)
+        parser.add_argument("--end-year", type=int, required=True)
+
+    def handle(self, *args, **options):
+        for country in options["countries"]:
+            try:
+                materialize_holiday_rules(
+                    country, options["start_year"], options["end_year"], verbose=True
+                )
+            except HolidayImportError as e:
+                raise CommandError(e)
@@ -0,0 +1,95 @@
+import csv
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...exceptions import FacilityError
+from ...reschedule import (
+    AVAILABLE_DATETIME,
+    FacilitySnapshot,
+    chunked,
+    iter_available_datetimes,
+    read_rows,
+    to_request,
+)
+from ...utils import get_facility
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute available datetimes at a facility for suggested datetimes "
+        "read as CSV or JSON from a file or stdin. Rows need a 'suggested_datetime' "
+        "and may have 'forward_delta_days' and 'reverse_delta_days'. Rows are "
+        "written back in input order with an 'available_datetime'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("facility_name", help="Name of the facility")
+        parser.add_argument(
+            "--file", default="-", help="Path to the input file or '-' for stdin (default)"
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            default="csv",
+            help="Format of input and output (default: csv). JSON output is JSON lines.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Number of worker processes"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Rows sent to a worker at a time"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100_000,
+            help="Rows read and held in memory at a time (default: 100000)",
+        )
+        parser.add_argument(
+            "--schedule-on-holidays", action="store_true", help="Ignore holidays"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            facility = get_facility(options["facility_name"])
+            if options["file"] == "-":
+                self.reschedule(facility, sys.stdin, **options)
+            else:
+                with open(options["file"], "r") as f:
+                    self.reschedule(facility, f, **options)
+        except (FacilityError, OSError, ValueError) as e:
+            raise CommandError(e)
+
+    def reschedule(self, facility, stream, **options) -> None:
+        """Writes the rows read from the stream with an available
+        datetime, a batch of rows at a time.
+        """
+        writer = None
+        for rows in chunked(read_rows(stream, options["format"]), options["batch_size"]):
+            requests = [to_request(row) for row in rows]
+            snapshot = FacilitySnapshot.from_facility(
+                facility,
+                schedule_on_holidays=options["schedule_on_holidays"],
+                requests=requests,
+            )
+            for row, available_datetime in zip(
+                rows,
+                iter_available_datetimes(
+                    snapshot,
+                    requests,
+                    workers=options["workers"],
+                    chunk_size=options["chunk_size"],
+                ),
+            ):
+                row = {**row, AVAILABLE_DATETIME: available_datetime.isoformat()}
+                if options["format"] == "json":
+                    self.stdout.write(json.dumps(row))
+                else:
+                    if not writer:
+                        writer = csv.DictWriter(
+                            self.stdout, fieldnames=list(row), lineterminator="\n"
+                        )
+                        writer.writeheader()
+                    writer.writerow(row)
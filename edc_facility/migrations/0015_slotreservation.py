@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_facility", "0014_healthfacility_title_historicalhealthfacility_title"),
+        ("sites", "0002_alter_domain_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotReservation",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("facility_name", models.CharField(max_length=50)),
+                ("reserved_date", models.DateField()),
+                ("booked", models.PositiveIntegerField(default=0)),
+                (
+                    "site",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="sites.site",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Slot reservation",
+                "verbose_name_plural": "Slot reservations",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("facility_name", "site", "reserved_date"),
+                        name="edc_facility_slotreservation_facility_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("edc_facility", "0015_slotreservation"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="holiday",
+            name="edc_facilit_name_acd5e1_idx",
+        ),
+    ]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from heapq import heappop, heappush
+
+INFINITY = float("inf")
+
+
+class MinCostFlow:
+    """A min-cost max-flow solver for networks with integer
+    capacities and non-negative integer costs.
+
+    Uses the primal-dual method: each phase finds shortest path
+    distances with Dijkstra on reduced costs and then pushes a
+    maximum flow over the edges of zero reduced cost. The number
+    of phases is at most the number of distinct path costs, so
+    networks with small costs, such as days moved from a suggested
+    date, are solved in a few phases.
+
+    For example:
+        mcf = MinCostFlow(4)
+        edge = mcf.add_edge(0, 1, capacity=2, cost=1)
+        ...
+        flow, cost = mcf.solve(source=0, sink=3)
+        mcf.flow(edge)
+    """
+
+    def __init__(self, node_count: int) -> None:
+        self.graph: list[list[int]] = [[] for _ in range(node_count)]
+        self.to: list[int] = []
+        self.capacity: list[int] = []
+        self.cost: list[int] = []
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(nodes={len(self.graph)}, edges={len(self.to) // 2})"
+
+    def add_node(self) -> int:
+        self.graph.append([])
+        return len(self.graph) - 1
+
+    def add_edge(self, from_node: int, to_node: int, capacity: int, cost: int) -> int:
+        """Adds an edge and its residual edge and returns the edge id."""
+        edge = len(self.to)
+        self.to.extend([to_node, from_node])
+        self.capacity.extend([capacity, 0])
+        self.cost.extend([cost, -cost])
+        self.graph[from_node].append(edge)
+        self.graph[to_node].append(edge + 1)
+        return edge
+
+    def flow(self, edge: int) -> int:
+        """Returns the flow on an edge."""
+        return self.capacity[edge ^ 1]
+
+    def solve(self, source: int, sink: int) -> tuple[int, int]:
+        """Returns (flow, cost) for the maximum flow of minimum cost
+        from source to sink.
+        """
+        potential = [0] * len(self.graph)
+        total_flow = total_cost = 0
+        while True:
+            distance = self._shortest_paths(source, potential)
+            if distance[sink] == INFINITY:
+                break
+            for node, node_distance in enumerate(distance):
+                if node_distance != INFINITY:
+                    potential[node] += node_distance
+            flow = self._max_flow(source, sink, potential)
+            total_flow += flow
+            total_cost += flow * (potential[sink] - potential[source])
+        return total_flow, total_cost
+
+    def _shortest_paths(self, source: int, potential: list[int]) -> list[float]:
+        """Returns Dijkstra distances on reduced costs."""
+        graph, to, capacity, cost = self.graph, self.to, self.capacity, self.cost
+        distance = [INFINITY] * len(graph)
+        distance[source] = 0
+        heap = [(0, source)]
+        while heap:
+            node_distance, node = heappop(heap)
+            if node_distance > distance[node]:
+                continue
+            node_potential = potential[node]
+            for edge in graph[node]:
+                if capacity[edge] > 0:
+                    next_node = to[edge]
+                    next_distance = (
+                        node_distance + cost[edge] + node_potential - potential[next_node]
+                    )
+                    if next_distance < distance[next_node]:
+                        distance[next_node] = next_distance
+                        heappush(heap, (next_distance, next_node))
+        return distance
+
+    def _max_flow(self, source: int, sink: int, potential: list[int]) -> int:
+        """Returns the flow pushed from source to sink over edges of
+        zero reduced cost (Dinic's algorithm).
+        """
+        total_flow = 0
+        while True:
+            level = self._levels(source, potential)
+            if level[sink] < 0:
+                return total_flow
+            total_flow += self._blocking_flow(source, sink, potential, level)
+
+    def _levels(self, source: int, potential: list[int]) -> list[int]:
+        """Returns the BFS level of each node over admissible edges,
+        that is, edges with capacity and zero reduced cost.
+        """
+        graph, to, capacity, cost = self.graph, self.to, self.capacity, self.cost
+        level = [-1] * len(graph)
+        level[source] = 0
+        queue = [source]
+        for node in queue:
+            next_level = level[node] + 1
+            node_potential = potential[node]
+            for edge in graph[node]:
+                next_node = to[edge]
+                if (
+                    level[next_node] < 0
+                    and capacity[edge] > 0
+                    and cost[edge] + node_potential == potential[next_node]
+                ):
+                    level[next_node] = next_level
+                    queue.append(next_node)
+        return level
+
+    def _blocking_flow(
+        self, source: int, sink: int, potential: list[int], level: list[int]
+    ) -> int:
+        """Returns the flow pushed along level-increasing admissible
+        paths, searching paths iteratively.
+        """
+        graph, to, capacity, cost = self.graph, self.to, self.capacity, self.cost
+        total_flow = 0
+        pointer = [0] * len(graph)
+        path: list[int] = []
+        node = source
+        while True:
+            if node == sink:
+                flow = min(capacity[edge] for edge in path)
+                for edge in path:
+                    capacity[edge] -= flow
+                    capacity[edge ^ 1] += flow
+                total_flow += flow
+                path = []
+                node = source
+                continue
+            edges = graph[node]
+            index = pointer[node]
+            next_level = level[node] + 1
+            node_potential = potential[node]
+            while index < len(edges):
+                edge = edges[index]
+                if (
+                    capacity[edge] > 0
+                    and level[to[edge]] == next_level
+                    and cost[edge] + node_potential == potential[to[edge]]
+                ):
+                    break
+                index += 1
+            pointer[node] = index
+            if index < len(edges):
+                path.append(edges[index])
+                node = to[edges[index]]
+            elif node == source:
+                return total_flow
+            else:
+                # dead end, retreat
+                level[node] = -1
+                node = to[path.pop() ^ 1]
+                pointer[node] += 1
@@ -1,3 +1,5 @@
 from .health_facility import HealthFacility
 from .holiday import Holiday
 from .list_models import HealthFacilityTypes
+from .signals import holiday_on_post_delete, holiday_on_post_save
+from .slot_reservation import SlotReservation
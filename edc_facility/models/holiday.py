@@ -1,10 +1,34 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterator
+
 from django.conf import settings
 from django.db import models
-from django.db.models import Index, UniqueConstraint
+from django.db.models import UniqueConstraint
 from django.utils.translation import gettext as _
 from edc_utils import convert_php_dateformat
 
 
+class HolidayManager(models.Manager):
+    def local_dates_between(
+        self, country: str, start: date, end: date, chunk_size: int | None = None
+    ) -> Iterator[date]:
+        """Yields the local dates of the country's holidays from
+        start to end inclusive, in order, streamed from the database
+        in chunks.
+
+        Filters on `country` and a `local_date` range, the columns
+        of the unique constraint's index.
+        """
+        return (
+            self.filter(country=country, local_date__range=(start, end))
+            .order_by("local_date")
+            .values_list("local_date", flat=True)
+            .iterator(chunk_size=chunk_size or 2000)
+        )
+
+
 class Holiday(models.Model):
     id = models.BigAutoField(primary_key=True)
 
@@ -14,6 +38,8 @@ class Holiday(models.Model):
 
     name = models.CharField(max_length=50)
 
+    objects = HolidayManager()
+
     @property
     def label(self) -> str:
         return self.name
@@ -33,4 +59,3 @@ class Holiday(models.Model):
                 fields=["country", "local_date"], name="%(app_label)s_%(class)s_country_uniq"
             )
         ]
-        indexes = [Index(fields=["name", "country", "local_date"])]
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..calendar_snapshot import build_calendar_snapshot_on_commit
+from ..holiday_cache import holiday_cache
+from .holiday import Holiday
+
+
+def holiday_changed(country: str) -> None:
+    """Clears the holiday cache for the country and rebuilds the
+    calendar snapshot, if any, when the transaction commits.
+
+    Within `holiday_cache.deferred` the caller rebuilds the
+    snapshot, for example, `import_holidays`.
+    """
+    if not holiday_cache.is_deferred:
+        holiday_cache.clear(country=country)
+        build_calendar_snapshot_on_commit()
+
+
+@receiver(post_save, sender=Holiday, weak=False, dispatch_uid="holiday_on_post_save")
+def holiday_on_post_save(sender, instance, raw, **kwargs):
+    holiday_changed(instance.country)
+
+
+@receiver(post_delete, sender=Holiday, weak=False, dispatch_uid="holiday_on_post_delete")
+def holiday_on_post_delete(sender, instance, **kwargs):
+    holiday_changed(instance.country)
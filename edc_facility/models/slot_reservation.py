@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.contrib.sites.models import Site
+from django.db import models
+from django.db.models import F, UniqueConstraint
+from django.utils.translation import gettext as _
+
+
+class SlotReservationManager(models.Manager):
+    def reserve(
+        self,
+        facility_name: str,
+        site_id: int,
+        reserved_date: date,
+        capacity: int | None = None,
+    ) -> bool:
+        """Returns True if a slot was reserved on this date.
+
+        The row is created if it does not exist and `booked` is then
+        incremented with a single conditional UPDATE. The database
+        serializes concurrent updates on the row so `booked` never
+        exceeds `capacity`. No table locks are taken.
+
+        If `capacity` is None the slot is reserved unconditionally.
+        """
+        self.bulk_create(
+            [self._new_row(facility_name, site_id, reserved_date)], ignore_conflicts=True
+        )
+        return (
+            self._reservable(facility_name, site_id, reserved_date, capacity).update(
+                booked=F("booked") + 1
+            )
+            == 1
+        )
+
+    async def areserve(
+        self,
+        facility_name: str,
+        site_id: int,
+        reserved_date: date,
+        capacity: int | None = None,
+    ) -> bool:
+        """Returns True if a slot was reserved on this date, see
+        `reserve`.
+        """
+        await self.abulk_create(
+            [self._new_row(facility_name, site_id, reserved_date)], ignore_conflicts=True
+        )
+        return (
+            await self._reservable(facility_name, site_id, reserved_date, capacity).aupdate(
+                booked=F("booked") + 1
+            )
+            == 1
+        )
+
+    def _new_row(self, facility_name: str, site_id: int, reserved_date: date):
+        return self.model(
+            facility_name=facility_name, site_id=site_id, reserved_date=reserved_date, booked=0
+        )
+
+    def _reservable(
+        self, facility_name: str, site_id: int, reserved_date: date, capacity: int | None
+    ) -> models.QuerySet:
+        qs = self.filter(
+            facility_name=facility_name, site_id=site_id, reserved_date=reserved_date
+        )
+        if capacity is not None:
+            qs = qs.filter(booked__lt=capacity)
+        return qs
+
+    def release(self, facility_name: str, site_id: int, reserved_date: date) -> bool:
+        """Returns True if a reserved slot on this date was released."""
+        return (
+            self.filter(
+                facility_name=facility_name,
+                site_id=site_id,
+                reserved_date=reserved_date,
+                booked__gt=0,
+            ).update(booked=F("booked") - 1)
+            == 1
+        )
+
+
+class SlotReservation(models.Model):
+    """A ledger of reserved slots per facility, site and day.
+
+    See `SlotReservationManager.reserve`.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+
+    facility_name = models.CharField(max_length=50)
+
+    site = models.ForeignKey(Site, on_delete=models.PROTECT, related_name="+")
+
+    reserved_date = models.DateField()
+
+    booked = models.PositiveIntegerField(default=0)
+
+    objects = SlotReservationManager()
+
+    def __str__(self):
+        return f"{self.facility_name} on {self.reserved_date}: {self.booked}"
+
+    class Meta:
+        verbose_name = _("Slot reservation")
+        verbose_name_plural = _("Slot reservations")
+        constraints = [
+            UniqueConstraint(
+                fields=["facility_name", "site", "reserved_date"],
+                name="%(app_label)s_%(class)s_facility_uniq",
+            )
+        ]
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Iterable, Iterator, TextIO
+from zoneinfo import ZoneInfo
+
+import django
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.utils.module_loading import import_string
+
+from .exceptions import FacilityError
+from .facility import Facility
+from .taken_dates import TakenDates
+
+if TYPE_CHECKING:
+    from django.contrib.sites.models import Site
+
+SUGGESTED_DATETIME = "suggested_datetime"
+FORWARD_DELTA_DAYS = "forward_delta_days"
+REVERSE_DELTA_DAYS = "reverse_delta_days"
+AVAILABLE_DATETIME = "available_datetime"
+
+
+@dataclass(frozen=True)
+class FacilitySnapshot:
+    """A picklable snapshot of a facility, its holiday calendar and
+    the dates not available for booking.
+
+    Used to resolve suggested datetimes in worker processes without
+    querying the database. Requests are resolved independently of
+    one another, as with `available_datetimes(update_taken=False)`.
+
+    The facility is rebuilt from the dotted path of its class, so
+    overrides in a `Facility` subclass, such as `open_slot_on`, are
+    kept. The class must be importable by the worker processes.
+    """
+
+    name: str
+    days: tuple[int, ...]
+    slots: tuple[int, ...]
+    best_effort_available_datetime: bool
+    engine: str
+    holiday_dates: frozenset[date] | None
+    unavailable_ordinals: frozenset[int]
+    facility_cls: str = "edc_facility.facility.Facility"
+
+    @classmethod
+    def from_facility(
+        cls,
+        facility: Facility,
+        taken_datetimes: list[datetime] | TakenDates | None = None,
+        schedule_on_holidays: bool | None = None,
+        site: Site | None = None,
+        requests: list[tuple[datetime, relativedelta | None, relativedelta | None]] = None,
+    ) -> FacilitySnapshot:
+        """Returns a snapshot of the facility for the given or
+        current site.
+
+        If slots are enforced, days at capacity within the windows
+        of `requests` are included with the taken dates.
+        """
+        facility_cls = get_facility_cls_path(facility)
+        unavailable_dates = TakenDates(facility.get_taken_dates(taken_datetimes))
+        slot_counter = facility.get_slot_counter(site)
+        if slot_counter and requests:
+            slot_counter.load(
+                min(
+                    (dt - (reverse_delta or relativedelta(months=0))).date()
+                    for dt, _, reverse_delta in requests
+                ),
+                max(
+                    (dt + (forward_delta or relativedelta(months=1))).date()
+                    for dt, forward_delta, _ in requests
+                ),
+            )
+            unavailable_dates.update(slot_counter.full_dates(facility.slots_by_weekday))
+        return cls(
+            name=facility.name,
+            days=tuple(d.weekday for d in facility.days),
+            slots=tuple(facility.slots),
+            best_effort_available_datetime=facility.best_effort_available_datetime,
+            engine=facility.engine.name,
+            holiday_dates=None if schedule_on_holidays else facility.get_holiday_dates(site),
+            unavailable_ordinals=frozenset(
+                TakenDates.to_ordinal(d) for d in unavailable_dates
+            ),
+            facility_cls=facility_cls,
+        )
+
+    def get_facility(self) -> Facility:
+        return import_string(self.facility_cls)(
+            name=self.name,
+            days=list(self.days),
+            slots=list(self.slots),
+            best_effort_available_datetime=self.best_effort_available_datetime,
+            engine=self.engine,
+        )
+
+    def get_taken_dates(self) -> TakenDates:
+        return TakenDates(date.fromordinal(ordinal) for ordinal in self.unavailable_ordinals)
+
+    def available_datetimes(
+        self,
+        requests: list[tuple[datetime, relativedelta | None, relativedelta | None]],
+        facility: Facility | None = None,
+        taken_dates: TakenDates | None = None,
+    ) -> list[datetime]:
+        """Returns a list of available datetimes, in order, without
+        querying the database.
+        """
+        facility = facility or self.get_facility()
+        taken_dates = self.get_taken_dates() if taken_dates is None else taken_dates
+        return [
+            facility._available_datetime(
+                suggested_datetime=suggested_datetime,
+                forward_delta=forward_delta,
+                reverse_delta=reverse_delta,
+                taken_dates=taken_dates,
+                holiday_dates=self.holiday_dates,
+            )
+            for suggested_datetime, forward_delta, reverse_delta in requests
+        ]
+
+
+def get_facility_cls_path(facility: Facility) -> str:
+    """Returns the dotted path of the facility's class or raises if
+    the class cannot be imported by that path.
+    """
+    facility_cls = type(facility)
+    path = f"{facility_cls.__module__}.{facility_cls.__qualname__}"
+    try:
+        imported_cls = import_string(path)
+    except ImportError:
+        imported_cls = None
+    if imported_cls is not facility_cls:
+        raise FacilityError(
+            f"Facility class must be importable by worker processes. Got {path}. "
+            f"See {repr(facility)}."
+        )
+    return path
+
+
+# per process state of a worker, see `init_worker`
+_worker: dict = {}
+
+
+def init_worker(snapshot: FacilitySnapshot) -> None:
+    """Initializes a worker process with the facility snapshot."""
+    if not django_apps.ready:
+        django.setup()
+    _worker.update(
+        snapshot=snapshot,
+        facility=snapshot.get_facility(),
+        taken_dates=snapshot.get_taken_dates(),
+    )
+
+
+def resolve_chunk(
+    requests: list[tuple[datetime, relativedelta | None, relativedelta | None]],
+) -> list[datetime]:
+    """Returns available datetimes for a chunk of requests in a
+    worker process.
+    """
+    return _worker["snapshot"].available_datetimes(
+        requests, facility=_worker["facility"], taken_dates=_worker["taken_dates"]
+    )
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_available_datetimes(
+    snapshot: FacilitySnapshot,
+    requests: list[tuple[datetime, relativedelta | None, relativedelta | None]],
+    workers: int | None = None,
+    chunk_size: int | None = None,
+) -> Iterator[datetime]:
+    """Yields available datetimes in the order of `requests`,
+    resolving chunks of requests across a pool of worker processes.
+
+    If `workers` is 1, requests are resolved in this process.
+    """
+    chunk_size = chunk_size or 1000
+    if workers == 1:
+        init_worker(snapshot)
+        for chunk in chunked(requests, chunk_size):
+            yield from resolve_chunk(chunk)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(snapshot,)
+    ) as executor:
+        for available_datetimes in executor.map(resolve_chunk, chunked(requests, chunk_size)):
+            yield from available_datetimes
+
+
+def read_rows(stream: TextIO, format: str | None = None) -> Iterator[dict]:
+    """Yields rows read from CSV, a JSON list or JSON lines.
+
+    CSV and JSON lines are read a line at a time. A JSON list is
+    read whole.
+    """
+    if format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    line = ""
+    for line in stream:
+        if line.strip():
+            break
+    if line.lstrip().startswith("["):
+        yield from json.loads(line + stream.read())
+        return
+    for line in chain([line], stream):
+        if line.strip():
+            yield json.loads(line)
+
+
+def to_request(row: dict) -> tuple[datetime, relativedelta | None, relativedelta | None]:
+    """Returns a (suggested_datetime, forward_delta, reverse_delta)
+    tuple for a row. Naive datetimes are in UTC.
+    """
+    try:
+        suggested_datetime = datetime.fromisoformat(row[SUGGESTED_DATETIME])
+    except (KeyError, TypeError, ValueError) as e:
+        raise FacilityError(f"Invalid {SUGGESTED_DATETIME}. Got {row}. {e}")
+    if not suggested_datetime.tzinfo:
+        suggested_datetime = suggested_datetime.replace(tzinfo=ZoneInfo("UTC"))
+    forward_delta, reverse_delta = None, None
+    if row.get(FORWARD_DELTA_DAYS) not in [None, ""]:
+        forward_delta = relativedelta(days=int(row[FORWARD_DELTA_DAYS]))
+    if row.get(REVERSE_DELTA_DAYS) not in [None, ""]:
+        reverse_delta = relativedelta(days=int(row[REVERSE_DELTA_DAYS]))
+    return suggested_datetime, forward_delta, reverse_delta
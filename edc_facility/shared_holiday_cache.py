@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_holiday_cache_alias() -> str | None:
+    """Returns the alias of the Django cache shared by the nodes of
+    a cluster for holiday dates, or None if not shared.
+
+    For example, EDC_FACILITY_HOLIDAY_CACHE_ALIAS = "default".
+    """
+    return getattr(settings, "EDC_FACILITY_HOLIDAY_CACHE_ALIAS", None)
+
+
+def get_holiday_cache_version_interval() -> float:
+    """Returns the number of seconds between reads of the shared
+    version by a process (Default: 5).
+    """
+    return getattr(settings, "EDC_FACILITY_HOLIDAY_CACHE_VERSION_INTERVAL", 5)
+
+
+class SharedHolidayCache:
+    """Holiday dates per country stored in a Django cache under a
+    version key.
+
+    Dates are stored as sorted date ordinals in a key that includes
+    the current version. `bump` changes the version so that every
+    node reloads from the model on next access. If the version key
+    is evicted, a new version is started from the current time.
+    """
+
+    version_key = "edc_facility.holidays.version"
+
+    def __init__(self, alias: str) -> None:
+        self.alias = alias
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(alias={self.alias})"
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_key(self, model: str, country: str, version: int) -> str:
+        return f"edc_facility.holidays.{model}.{country.replace(' ', '_')}.{version}"
+
+    def get_version(self) -> int:
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    async def aget_version(self) -> int:
+        version = await self.cache.aget(self.version_key)
+        if version is None:
+            await self.cache.aadd(self.version_key, time.time_ns(), timeout=None)
+            version = await self.cache.aget(self.version_key)
+        return version
+
+    def bump(self) -> int:
+        """Changes the version and returns the new version."""
+        try:
+            return self.cache.incr(self.version_key)
+        except ValueError:
+            return self.get_version()
+
+    def get(self, model: str, country: str, version: int) -> frozenset[date] | None:
+        ordinals = self.cache.get(self.get_key(model, country, version))
+        return None if ordinals is None else to_local_dates(ordinals)
+
+    async def aget(self, model: str, country: str, version: int) -> frozenset[date] | None:
+        ordinals = await self.cache.aget(self.get_key(model, country, version))
+        return None if ordinals is None else to_local_dates(ordinals)
+
+    def set(self, model: str, country: str, version: int, local_dates: frozenset[date]):
+        self.cache.set(self.get_key(model, country, version), to_ordinals(local_dates))
+
+    async def aset(self, model: str, country: str, version: int, local_dates: frozenset[date]):
+        await self.cache.aset(self.get_key(model, country, version), to_ordinals(local_dates))
+
+
+def to_ordinals(local_dates: frozenset[date]) -> list[int]:
+    return sorted(d.toordinal() for d in local_dates)
+
+
+def to_local_dates(ordinals: list[int]) -> frozenset[date]:
+    return frozenset(date.fromordinal(ordinal) for ordinal in ordinals)
+
+
+def get_shared_holiday_cache() -> SharedHolidayCache | None:
+    alias = get_holiday_cache_alias()
+    return SharedHolidayCache(alias) if alias else None
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from threading import Lock
+from types import MappingProxyType
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .exceptions import FacilityError
+from .facility import Facility
+
+
+class SiteFacilities:
+    """A process-wide registry of `Facility` instances.
+
+    Facilities are compiled once from `EDC_FACILITY_DEFINITIONS` and
+    shared. The registry is rebuilt only if the definitions change.
+    """
+
+    def __init__(self) -> None:
+        self._registry: MappingProxyType[str, Facility] | None = None
+        self._definitions: dict | None = None
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    @property
+    def registry(self) -> MappingProxyType[str, Facility]:
+        """Returns a read-only mapping of facility name to `Facility`,
+        compiling the definitions if not yet compiled or if changed.
+        """
+        from .utils import get_facility_definitions  # avoid circular import
+
+        definitions = get_facility_definitions()
+        registry = self._registry
+        if registry is None or definitions is not self._definitions:
+            with self._lock:
+                registry = MappingProxyType(
+                    {k: Facility(name=k, **v) for k, v in definitions.items()}
+                )
+                self._registry = registry
+                self._definitions = definitions
+        return registry
+
+    def get(self, name: str) -> Facility:
+        """Returns the shared facility instance for this name,
+        if it exists, or raises.
+        """
+        registry = self.registry
+        try:
+            return registry[name]
+        except KeyError:
+            raise FacilityError(
+                f"Facility '{name}' does not exist. Expected one of {dict(registry)}."
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._registry = None
+            self._definitions = None
+
+
+site_facilities = SiteFacilities()
+
+
+@receiver(setting_changed, weak=False, dispatch_uid="reset_site_facilities")
+def reset_site_facilities(setting, **kwargs):
+    if setting in ["EDC_FACILITY_DEFINITIONS", "EDC_FACILITY_HOLIDAY_MODEL"]:
+        site_facilities.reset()
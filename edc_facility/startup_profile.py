@@ -0,0 +1,128 @@
+"""Reports the import time of edc_facility and its heavy imports
+and the time of django.setup() and of edc_facility's
+AppConfig.ready().
+
+Each measurement is made in a fresh interpreter so that modules
+already imported are not counted as free. Requires
+DJANGO_SETTINGS_MODULE for the setup and ready() measurements.
+
+For example:
+    DJANGO_SETTINGS_MODULE=myproject.settings python -m edc_facility.startup_profile
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess  # nosec B404
+import sys
+from statistics import median
+
+MODULES = [
+    "arrow",
+    "dateutil.relativedelta",
+    "tqdm",
+    "edc_facility",
+    "edc_facility.facility",
+    "edc_facility.import_holidays",
+]
+
+IMPORT_SCRIPT = """
+import json, sys
+from importlib import import_module
+from time import perf_counter
+start = perf_counter()
+import_module(sys.argv[1])
+print(json.dumps({"seconds": perf_counter() - start}))
+"""
+
+SETUP_SCRIPT = """
+import json, sys
+from time import perf_counter
+import django
+import edc_facility.apps
+timings = {}
+ready = edc_facility.apps.AppConfig.ready
+def timed_ready(self):
+    start = perf_counter()
+    ready(self)
+    timings["edc_facility AppConfig.ready()"] = perf_counter() - start
+edc_facility.apps.AppConfig.ready = timed_ready
+start = perf_counter()
+django.setup()
+timings["django.setup()"] = perf_counter() - start
+timings["heavy modules imported after setup"] = sorted(
+    m for m in ["arrow", "tqdm", "edc_facility.facility"] if m in sys.modules
+)
+print(json.dumps(timings))
+"""
+
+
+def run_script(script: str, *args: str) -> dict:
+    completed = subprocess.run(  # nosec B603
+        [sys.executable, "-c", script, *args],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if completed.returncode:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(completed.returncode)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def profile_imports(repeat: int) -> dict[str, float]:
+    """Returns the median import time in seconds of each module."""
+    return {
+        module: median(run_script(IMPORT_SCRIPT, module)["seconds"] for _ in range(repeat))
+        for module in MODULES
+    }
+
+
+def profile_setup(repeat: int) -> dict:
+    """Returns the median time in seconds of django.setup() and
+    of edc_facility's AppConfig.ready().
+    """
+    runs = [run_script(SETUP_SCRIPT) for _ in range(repeat)]
+    timings = {
+        name: median(run[name] for run in runs)
+        for name in ["django.setup()", "edc_facility AppConfig.ready()"]
+        if name in runs[0]
+    }
+    timings["heavy modules imported after setup"] = runs[0][
+        "heavy modules imported after setup"
+    ]
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m edc_facility.startup_profile", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Fresh interpreters per measurement"
+    )
+    parser.add_argument("--json", action="store_true", help="Write the report as JSON")
+    options = parser.parse_args(argv)
+    report = {"imports": profile_imports(options.repeat)}
+    if os.environ.get("DJANGO_SETTINGS_MODULE"):
+        report["setup"] = profile_setup(options.repeat)
+    if options.json:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+        return
+    sys.stdout.write(f"Median of {options.repeat} fresh interpreters\n")
+    for name, seconds in report["imports"].items():
+        sys.stdout.write(f"  import {name:<32} {seconds * 1000:8.1f} ms\n")
+    if "setup" not in report:
+        sys.stdout.write("  Set DJANGO_SETTINGS_MODULE to profile django.setup().\n")
+        return
+    for name, value in report["setup"].items():
+        if isinstance(value, float):
+            sys.stdout.write(f"  {name:<39} {value * 1000:8.1f} ms\n")
+        else:
+            sys.stdout.write(f"  {name:<39} {', '.join(value) or 'none'}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import csv
 from pathlib import Path
 
 from django.conf import settings
@@ -6,6 +5,8 @@ from django.core.checks import Error, Warning
 from django.core.management import color_style
 from edc_sites.site import sites
 
+from .holiday_file import get_holiday_file_countries
+
 style = color_style()
 
 
@@ -31,21 +32,41 @@ def holiday_path_check(app_configs, **kwargs):
 
 
 def holiday_country_check(app_configs, **kwargs):
+    """Checks the countries in the holiday file against the
+    countries of the registered sites, reporting all unknown and
+    all missing countries.
+
+    See also `get_holiday_file_countries`.
+    """
     errors = []
     holiday_path = Path(settings.HOLIDAY_FILE).expanduser()
     if sites.all():
-        with holiday_path.open(mode="r") as f:
-            reader = csv.DictReader(f, fieldnames=["local_date", "label", "country"])
-            next(reader, None)
-            for row in reader:
-                if row["country"] not in sites.countries:
-                    errors.append(
-                        Warning(
-                            "Holiday file has no records for country! Sites are registered "
-                            f"for these countries: `{'`, `'.join(sites.countries)}`. Got "
-                            f"`{row['country']}`\n",
-                            id="edc_facility.W002",
-                        )
-                    )
-                    break
+        holiday_countries = get_holiday_file_countries(holiday_path)
+        site_countries = set(sites.countries)
+        if "" in holiday_countries:
+            errors.append(
+                Warning(
+                    "Holiday file has records without a country! "
+                    f"See settings.HOLIDAY_FILE={holiday_path}.\n",
+                    id="edc_facility.W004",
+                )
+            )
+        if unknown_countries := sorted(holiday_countries - site_countries - {""}):
+            errors.append(
+                Warning(
+                    "Holiday file has records for unknown countries! Sites are registered "
+                    f"for these countries: `{'`, `'.join(sorted(site_countries))}`. Got "
+                    f"`{'`, `'.join(unknown_countries)}`\n",
+                    id="edc_facility.W002",
+                )
+            )
+        if missing_countries := sorted(site_countries - holiday_countries):
+            errors.append(
+                Warning(
+                    "Holiday file has no records for countries of registered sites! "
+                    f"Got `{'`, `'.join(missing_countries)}`. "
+                    f"See settings.HOLIDAY_FILE={holiday_path}.\n",
+                    id="edc_facility.W003",
+                )
+            )
     return errors
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+
+class TakenDates:
+    """An index of taken dates held as a set of date ordinals.
+
+    Build once from a list of datetimes and pass to
+    `Facility.available_arr` or `Facility.available_datetimes` as
+    `taken_datetimes`. Extend incrementally with `add` as
+    appointments are booked.
+
+    Datetimes are indexed by their date as given, that is, without
+    timezone conversion.
+    """
+
+    def __init__(self, taken_datetimes: Iterable[datetime | date] | None = None) -> None:
+        self._ordinals: set[int] = set()
+        self.update(taken_datetimes or [])
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={len(self)})"
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __contains__(self, value: datetime | date) -> bool:
+        return self.to_ordinal(value) in self._ordinals
+
+    def __iter__(self) -> Iterator[date]:
+        for ordinal in sorted(self._ordinals):
+            yield date.fromordinal(ordinal)
+
+    @property
+    def ordinals(self) -> frozenset[int]:
+        """Returns the taken dates as date ordinals."""
+        return frozenset(self._ordinals)
+
+    @staticmethod
+    def to_ordinal(value: datetime | date) -> int:
+        return value.date().toordinal() if isinstance(value, datetime) else value.toordinal()
+
+    def add(self, value: datetime | date) -> None:
+        self._ordinals.add(self.to_ordinal(value))
+
+    def update(self, values: Iterable[datetime | date]) -> None:
+        self._ordinals.update(self.to_ordinal(value) for value in values)
+
+    def discard(self, value: datetime | date) -> None:
+        self._ordinals.discard(self.to_ordinal(value))
+
+    def copy(self) -> TakenDates:
+        taken_dates = self.__class__()
+        taken_dates._ordinals = set(self._ordinals)
+        return taken_dates
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+from tempfile import gettempdir
+
+from .test_settings import *  # noqa: F401,F403
+
+# benchmarks run on a local, file-based SQLite database
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(Path(gettempdir()) / "edc_facility_benchmarks.sqlite3"),
+        "TEST": {"NAME": str(Path(gettempdir()) / "edc_facility_benchmarks.sqlite3")},
+    }
+}
+# encryption keys are created in a temp folder, as for runtests.py
+DJANGO_CRYPTO_FIELDS_TEST_MODULE = sys.argv[0]
+AUTO_CREATE_KEYS = True
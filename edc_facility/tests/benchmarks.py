@@ -0,0 +1,293 @@
+"""A benchmark suite for availability, holiday lookup and holiday
+import, run on a local SQLite database.
+
+Results are written as JSON. Compare two results to flag
+regressions.
+
+For example:
+    python runbenchmarks.py --output before.json
+    python runbenchmarks.py --output after.json
+    python runbenchmarks.py --compare before.json after.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess  # nosec B404
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable
+from zoneinfo import ZoneInfo
+
+BASE_DIR = Path(__file__).parent.parent.parent
+IMPORT_ROWS = [1_000, 100_000, 1_000_000]
+THRESHOLD = 0.10
+WEEKDAY_SETS = {"mo-fr": [0, 1, 2, 3, 4], "tu-th": [1, 3], "we": [2]}
+
+
+def timeit(func: Callable, number: int, repeat: int) -> dict:
+    """Returns the min and median seconds per call of `repeat`
+    runs of `number` calls.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((perf_counter() - start) / number)
+    return dict(min=min(timings), median=median(timings), number=number, repeat=repeat)
+
+
+def bench_available_arr(repeat: int) -> dict[str, dict]:
+    """Returns timings of `Facility.available_arr` for narrow and
+    wide windows and for each weekday set.
+
+    The wide window has most days around the suggested date taken
+    so that many candidates are examined.
+    """
+    from dateutil.relativedelta import relativedelta
+
+    from edc_facility.facility import Facility
+    from edc_facility.taken_dates import TakenDates
+
+    suggested_datetime = datetime(2017, 4, 14, 9, 0, tzinfo=ZoneInfo("UTC"))
+    windows = {
+        "narrow": (relativedelta(days=7), relativedelta(days=0), TakenDates()),
+        "wide": (
+            relativedelta(days=365),
+            relativedelta(days=180),
+            TakenDates(
+                suggested_datetime.date() + timedelta(days=n)
+                for n in range(-120, 120)
+                if n % 29
+            ),
+        ),
+    }
+    results = {}
+    for weekdays_name, weekdays in WEEKDAY_SETS.items():
+        facility = Facility(name="benchmark", days=weekdays)
+        for window_name, (forward_delta, reverse_delta, taken_dates) in windows.items():
+            results[f"available_arr[{window_name},{weekdays_name}]"] = timeit(
+                lambda: facility.available_arr(
+                    suggested_datetime=suggested_datetime,
+                    forward_delta=forward_delta,
+                    reverse_delta=reverse_delta,
+                    taken_datetimes=taken_dates,
+                ),
+                number=500,
+                repeat=repeat,
+            )
+    return results
+
+
+def bench_is_holiday(repeat: int) -> dict[str, dict]:
+    """Returns timings of `Holidays.is_holiday` with the holiday
+    cache warm (hot) and cleared before each call (cold).
+    """
+    from edc_facility.holiday_cache import holiday_cache
+    from edc_facility.holidays import Holidays
+
+    holidays = Holidays()
+    utc_datetime = datetime(2017, 4, 14, 9, 0, tzinfo=ZoneInfo("UTC"))
+    holidays.is_holiday(utc_datetime)
+
+    def cold():
+        holiday_cache.clear()
+        holidays.is_holiday(utc_datetime)
+
+    return {
+        "is_holiday[hot]": timeit(
+            lambda: holidays.is_holiday(utc_datetime), number=5000, repeat=repeat
+        ),
+        "is_holiday[cold]": timeit(cold, number=200, repeat=repeat),
+    }
+
+
+def bench_get_facility(repeat: int) -> dict[str, dict]:
+    from edc_facility.utils import get_facility
+
+    get_facility("5-day-clinic")
+    return {
+        "get_facility": timeit(
+            lambda: get_facility("5-day-clinic"), number=10000, repeat=repeat
+        )
+    }
+
+
+def write_holiday_file(path: Path, rows: int) -> None:
+    """Writes a holiday file of unique (country, local_date) rows."""
+    start = date(1900, 1, 1)
+    with open(path, "w") as f:
+        f.write("local_date,label,country\n")
+        for n in range(rows):
+            local_date = start + timedelta(days=n % 20_000)
+            f.write(f"{local_date.isoformat()},Holiday {n},country-{n // 20_000}\n")
+
+
+def bench_import_holidays(import_rows: list[int]) -> dict[str, dict]:
+    """Returns timings of `import_holidays` for holiday files of
+    each number of rows.
+    """
+    from django.test.utils import override_settings
+
+    from edc_facility.import_holidays import import_holidays
+
+    results = {}
+    with TemporaryDirectory() as folder:
+        for rows in import_rows:
+            path = Path(folder) / f"holidays-{rows}.csv"
+            write_holiday_file(path, rows)
+            with override_settings(HOLIDAY_FILE=path):
+                start = perf_counter()
+                import_holidays()
+                seconds = perf_counter() - start
+            results[f"import_holidays[{rows}]"] = dict(
+                min=seconds, median=seconds, number=1, repeat=1, rows_per_second=rows / seconds
+            )
+    return results
+
+
+def get_meta() -> dict:
+    import django
+
+    try:
+        commit = subprocess.run(  # nosec B603 B607
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return dict(
+        created=datetime.now(ZoneInfo("UTC")).isoformat(),
+        commit=commit,
+        python=platform.python_version(),
+        django=django.get_version(),
+        sqlite=sqlite3.sqlite_version,
+        platform=platform.platform(),
+    )
+
+
+def run(repeat: int, import_rows: list[int]) -> dict:
+    """Returns the benchmark results run against a new test
+    database.
+    """
+    import django
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings
+
+    django.setup()
+    from edc_sites.site import sites
+    from edc_sites.tests import SiteTestCaseMixin
+    from edc_sites.utils import add_or_update_django_sites
+
+    from edc_facility.import_holidays import import_holidays
+
+    runner = DiscoverRunner(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        with override_settings(SITE_ID=20):
+            sites.initialize()
+            sites.register(*SiteTestCaseMixin.get_default_sites())
+            add_or_update_django_sites()
+            import_holidays()
+            results = {}
+            for bench in [bench_available_arr, bench_is_holiday, bench_get_facility]:
+                results.update(bench(repeat))
+            results.update(bench_import_holidays(import_rows))
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+    return dict(meta=get_meta(), results=results)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """Returns a row per benchmark in both results with the ratio
+    of the current to the baseline median.
+
+    A benchmark is a regression if the ratio is greater than
+    1 + `threshold`.
+    """
+    rows = []
+    for name, timing in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = timing["median"] / baseline["results"][name]["median"]
+        rows.append(
+            dict(
+                name=name,
+                baseline=baseline["results"][name]["median"],
+                current=timing["median"],
+                ratio=ratio,
+                regression=ratio > 1 + threshold,
+            )
+        )
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="runbenchmarks.py", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--output", help="Path of the JSON results (default: stdout)")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Compare two JSON results. Exits 1 if any benchmark regressed.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help=f"Slowdown of the median flagged as a regression (default: {THRESHOLD})",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument(
+        "--import-rows",
+        type=int,
+        nargs="+",
+        default=IMPORT_ROWS,
+        help=f"Rows of each holiday file imported (default: {IMPORT_ROWS})",
+    )
+    options = parser.parse_args(argv)
+    if options.compare:
+        with open(options.compare[0]) as f:
+            baseline = json.load(f)
+        with open(options.compare[1]) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, options.threshold)
+        sys.stdout.write(f"{'benchmark':<36} {'baseline':>10} {'current':>10}  ratio\n")
+        for row in rows:
+            sys.stdout.write(
+                f"{row['name']:<36} {format_seconds(row['baseline']):>10} "
+                f"{format_seconds(row['current']):>10} {row['ratio']:6.2f}x"
+                f"{'  REGRESSION' if row['regression'] else ''}\n"
+            )
+        return 1 if any(row["regression"] for row in rows) else 0
+    report = run(options.repeat, options.import_rows)
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    for name, timing in report["results"].items():
+        sys.stderr.write(f"{name:<36} {format_seconds(timing['median']):>10}\n")
+    return 0
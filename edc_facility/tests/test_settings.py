@@ -21,6 +21,7 @@ project_settings = DefaultTestSettings(
         "edc_sites.E002",
     ],
     EDC_SITES_AUTODISCOVER_SITES=False,
+    EDC_FACILITY_HOLIDAY_FILE_CACHE=None,
     SUBJECT_VISIT_MODEL="edc_visit_tracking.subjectvisit",
     INSTALLED_APPS=[
         "django.contrib.admin",
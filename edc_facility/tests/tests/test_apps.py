@@ -0,0 +1,40 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.test import TestCase
+from django.test.utils import override_settings
+
+import edc_facility
+from edc_facility.facility import Facility
+from edc_facility.site_facilities import site_facilities
+from edc_facility.startup_profile import main
+
+
+class TestApps(TestCase):
+    def test_ready_is_quiet_and_lazy(self):
+        site_facilities.reset()
+        with patch("sys.stdout", new_callable=StringIO) as stdout:
+            django_apps.get_app_config("edc_facility").ready()
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIsNone(site_facilities._registry)
+
+    @override_settings(EDC_FACILITY_STARTUP_BANNER=True)
+    def test_ready_with_banner(self):
+        with patch("sys.stdout", new_callable=StringIO) as stdout:
+            django_apps.get_app_config("edc_facility").ready()
+        self.assertIn("Loading Edc Facility", stdout.getvalue())
+        self.assertIn("5-Day-Clinic", stdout.getvalue())
+
+    def test_lazy_package_attributes(self):
+        self.assertIs(edc_facility.Facility, Facility)
+        self.assertTrue(callable(edc_facility.import_holidays))
+        with self.assertRaises(AttributeError):
+            edc_facility.blah  # noqa: B018
+
+    def test_startup_profile(self):
+        with patch("edc_facility.startup_profile.MODULES", ["dateutil.relativedelta"]):
+            with patch.dict("os.environ", {"DJANGO_SETTINGS_MODULE": ""}):
+                with patch("sys.stdout", new_callable=StringIO) as stdout:
+                    main(["--repeat", "1"])
+        self.assertIn("import dateutil.relativedelta", stdout.getvalue())
@@ -0,0 +1,154 @@
+from datetime import date, datetime
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import sync_to_async
+from dateutil.relativedelta import FR, MO, TH, TU, WE, relativedelta
+from django.contrib.sites.models import Site
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_appointment.models import Appointment
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.capacity import SlotCounter
+from edc_facility.exceptions import FacilitySiteError
+from edc_facility.facility import Facility
+from edc_facility.holiday_cache import holiday_cache
+from edc_facility.holidays import Holidays
+from edc_facility.import_holidays import import_holidays
+from edc_facility.instrumentation import instrument
+from edc_facility.models import SlotReservation
+
+utc = ZoneInfo("UTC")
+
+
+@override_settings(SITE_ID=20)
+class TestAsync(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        holiday_cache.clear()
+        self.facility = Facility(
+            name="clinic", days=[MO, TU, WE, TH, FR], slots=[100, 100, 100, 100, 100]
+        )
+
+    async def test_aavailable_arr_matches_available_arr(self):
+        for suggested_datetime in [
+            datetime(2017, 1, 7, 9, tzinfo=utc),
+            datetime(2017, 7, 1, 9, tzinfo=utc),  # Sir Seretse Khama Day
+            datetime(2017, 9, 30, 9, tzinfo=utc),  # Botswana Day
+            datetime(2017, 12, 25, 9, tzinfo=utc),
+        ]:
+            with self.subTest(suggested_datetime=suggested_datetime):
+                self.assertEqual(
+                    await self.facility.aavailable_arr(suggested_datetime),
+                    await sync_to_async(self.facility.available_arr)(suggested_datetime),
+                )
+
+    async def test_aavailable_arr_instrumented(self):
+        with instrument() as measurements:
+            await self.facility.aavailable_arr(datetime(2017, 1, 9, tzinfo=utc))
+        self.assertEqual(
+            [m.name for m in measurements],
+            ["Facility.aavailable_datetime", "Facility.aavailable_arr"],
+        )
+
+    async def test_ais_holiday(self):
+        holidays = Holidays()
+        self.assertTrue(await holidays.ais_holiday(datetime(2017, 9, 30, tzinfo=utc)))
+        self.assertFalse(await holidays.ais_holiday(datetime(2017, 9, 29, tzinfo=utc)))
+
+    async def test_shares_holiday_cache(self):
+        holidays = Holidays()
+        with instrument() as measurements:
+            await holidays.ais_holiday(datetime(2017, 9, 30, tzinfo=utc))
+            await holidays.ais_holiday(datetime(2017, 9, 30, tzinfo=utc))
+        self.assertEqual(len(holiday_cache), 1)
+        self.assertEqual(
+            [(m.name, m.cache_misses, m.cache_hits) for m in measurements],
+            [("Holidays.ais_holiday", 1, 0), ("Holidays.ais_holiday", 0, 1)],
+        )
+        self.assertEqual(measurements[-1].queries, 0)
+        # the sync path reads the entry loaded by the async path
+        self.assertIs(
+            await holidays.acached_local_dates(),
+            await sync_to_async(lambda: holidays.cached_local_dates)(),
+        )
+
+    async def test_ais_holiday_counts_queries(self):
+        holidays = Holidays()
+        await holidays.acountry()
+        with instrument() as measurements:
+            self.assertTrue(await holidays.ais_holiday(datetime(2017, 9, 30, tzinfo=utc)))
+            self.assertTrue(await holidays.ais_holiday(datetime(2017, 9, 30, tzinfo=utc)))
+        # the same as the sync path, see test_instrumentation
+        self.assertEqual([m.queries for m in measurements], [1, 0])
+        self.assertEqual(measurements[0].cache_misses, 1)
+
+    async def test_aholidays(self):
+        holidays = Holidays()
+        local_dates = [obj.local_date async for obj in await holidays.aholidays()]
+        self.assertIn(date(2017, 9, 30), local_dates)
+
+    @override_settings(SITE_ID=2)
+    async def test_bad_site(self):
+        with self.assertRaises(FacilitySiteError):
+            await Holidays().ais_holiday(datetime(2017, 9, 30, tzinfo=utc))
+
+    async def test_aavailable_datetime_reserve(self):
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[1, 1, 1])
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=utc)
+        available_datetimes = [
+            await facility.aavailable_datetime(
+                suggested_datetime=suggested_datetime,
+                forward_delta=relativedelta(days=10),
+                reserve=True,
+            )
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            [dt.date() for dt in available_datetimes],
+            [date(2017, 3, 6), date(2017, 3, 8), date(2017, 3, 10)],
+        )
+        self.assertEqual(await SlotReservation.objects.acount(), 3)
+
+    @override_settings(EDC_FACILITY_BOOKING_MODEL="edc_appointment.appointment")
+    async def test_aavailable_datetime_skips_full_days(self):
+        site = await Site.objects.aget(id=20)
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=utc)  # MO
+        await Appointment.objects.abulk_create(
+            [
+                Appointment(
+                    id=uuid4(),
+                    subject_identifier=f"clinic-{i}",
+                    visit_schedule_name="visit_schedule",
+                    schedule_name="schedule",
+                    facility_name="clinic",
+                    appt_datetime=suggested_datetime,
+                    appt_reason="scheduled",
+                    visit_code="1000",
+                    timepoint=0,
+                    site=site,
+                )
+                for i in range(2)
+            ]
+        )
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[2, 2, 2])
+        self.assertEqual(
+            await facility.aavailable_datetime(suggested_datetime=suggested_datetime),
+            datetime(2017, 3, 8, 9, tzinfo=utc),
+        )
+        slot_counter = SlotCounter(facility_name="clinic", site_id=site.id)
+        await slot_counter.aload(date(2017, 3, 1), date(2017, 4, 1))
+        self.assertEqual(slot_counter.count(date(2017, 3, 6)), 2)
+
+    async def test_aholidays_in(self):
+        values = [datetime(2017, 9, 30, tzinfo=utc), date(2017, 9, 29)]
+        self.assertEqual(await Holidays().aholidays_in(values), frozenset([date(2017, 9, 30)]))
@@ -0,0 +1,27 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.test import TestCase
+
+from edc_facility.holiday_file import iter_holiday_file
+from edc_facility.import_holidays import import_file
+from edc_facility.models import Holiday
+from edc_facility.tests.benchmarks import compare, write_holiday_file
+
+
+class TestBenchmarks(TestCase):
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+        current = {
+            "results": {"a": {"median": 1.05}, "b": {"median": 1.5}, "c": {"median": 1.0}}
+        }
+        rows = compare(baseline, current, threshold=0.1)
+        self.assertEqual([row["name"] for row in rows], ["a", "b"])
+        self.assertEqual([row["regression"] for row in rows], [False, True])
+
+    def test_write_holiday_file(self):
+        with TemporaryDirectory() as folder:
+            path = Path(folder) / "holidays.csv"
+            write_holiday_file(path, 25_000)
+            self.assertEqual(len(list(iter_holiday_file(path))), 25_000)
+            self.assertEqual(import_file(path, Holiday), 25_000)
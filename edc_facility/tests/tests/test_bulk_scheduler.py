@@ -0,0 +1,133 @@
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import FR, MO, WE, relativedelta
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.exceptions import FacilityError
+from edc_facility.facility import Facility
+from edc_facility.import_holidays import import_holidays
+from edc_facility.min_cost_flow import MinCostFlow
+
+
+class TestMinCostFlow(TestCase):
+    def test_min_cost_flow(self):
+        # two sources of 2 units each, two sinks of 2 slots each
+        mcf = MinCostFlow(6)
+        mcf.add_edge(0, 2, 2, 0)
+        mcf.add_edge(0, 3, 2, 0)
+        a_x = mcf.add_edge(2, 4, 2, 0)
+        a_y = mcf.add_edge(2, 5, 2, 1)
+        b_x = mcf.add_edge(3, 4, 2, 0)
+        b_y = mcf.add_edge(3, 5, 2, 5)
+        mcf.add_edge(4, 1, 2, 0)
+        mcf.add_edge(5, 1, 2, 0)
+        self.assertEqual(mcf.solve(0, 1), (4, 2))
+        self.assertEqual(
+            [mcf.flow(a_x), mcf.flow(a_y), mcf.flow(b_x), mcf.flow(b_y)], [0, 2, 2, 0]
+        )
+
+    def test_min_cost_flow_not_enough_capacity(self):
+        mcf = MinCostFlow(3)
+        mcf.add_edge(0, 2, 5, 0)
+        mcf.add_edge(2, 1, 3, 2)
+        self.assertEqual(mcf.solve(0, 1), (3, 6))
+
+
+@override_settings(SITE_ID=20)
+class TestBulkScheduler(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        self.facility = Facility(name="clinic", days=[MO, WE, FR], slots=[1, 1, 1])
+        # a Monday
+        self.suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))
+
+    def test_assign_minimizes_total_deviation(self):
+        requests = [
+            (self.suggested_datetime, relativedelta(days=3), None),
+            (self.suggested_datetime, relativedelta(days=1), None),
+        ]
+        # one at a time, the second request has no open day
+        facility = Facility(
+            name="clinic",
+            days=[MO, WE, FR],
+            slots=[1, 1, 1],
+            best_effort_available_datetime=False,
+        )
+        self.assertRaises(FacilityError, facility.available_datetimes, requests)
+        self.assertEqual(
+            facility.assign_datetimes(requests),
+            [
+                self.suggested_datetime + timedelta(days=2),
+                self.suggested_datetime,
+            ],
+        )
+
+    def test_assign_respects_slots(self):
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[2, 2, 2])
+        available_datetimes = facility.assign_datetimes(
+            [(self.suggested_datetime, relativedelta(days=14), None)] * 10
+        )
+        self.assertEqual(
+            sorted(dt.date() for dt in available_datetimes),
+            [
+                date(2017, 3, 6),
+                date(2017, 3, 6),
+                date(2017, 3, 8),
+                date(2017, 3, 8),
+                date(2017, 3, 10),
+                date(2017, 3, 10),
+                date(2017, 3, 13),
+                date(2017, 3, 13),
+                date(2017, 3, 15),
+                date(2017, 3, 15),
+            ],
+        )
+        self.assertTrue(
+            all(dt.time() == self.suggested_datetime.time() for dt in available_datetimes)
+        )
+
+    def test_assign_skips_holidays_and_taken(self):
+        # 2017-04-14 Good Friday, 2017-04-17 Easter Monday
+        suggested_datetime = datetime(2017, 4, 14, 9, tzinfo=ZoneInfo("UTC"))
+        available_datetimes = self.facility.assign_datetimes(
+            [(suggested_datetime, relativedelta(days=8), relativedelta(days=0))] * 2,
+            taken_datetimes=[datetime(2017, 4, 19, 9, tzinfo=ZoneInfo("UTC"))],
+        )
+        # one slot on 2017-04-21, the other falls back to the suggested date
+        self.assertEqual(
+            sorted(dt.date() for dt in available_datetimes),
+            [date(2017, 4, 14), date(2017, 4, 21)],
+        )
+
+    def test_assign_single_request_same_as_available_arr(self):
+        for days in range(7):
+            suggested_datetime = self.suggested_datetime + timedelta(days=days)
+            self.assertEqual(
+                self.facility.assign_datetimes([(suggested_datetime, None, None)]),
+                [self.facility.available_arr(suggested_datetime).datetime],
+            )
+
+    def test_assign_not_enough_slots(self):
+        requests = [(self.suggested_datetime, relativedelta(days=1), None)] * 2
+        self.assertEqual(
+            self.facility.assign_datetimes(requests),
+            [self.suggested_datetime, self.suggested_datetime],
+        )
+        facility = Facility(
+            name="clinic",
+            days=[MO, WE, FR],
+            slots=[1, 1, 1],
+            best_effort_available_datetime=False,
+        )
+        self.assertRaises(FacilityError, facility.assign_datetimes, requests)
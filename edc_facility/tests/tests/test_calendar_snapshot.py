@@ -0,0 +1,179 @@
+from datetime import date, datetime
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from zoneinfo import ZoneInfo
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.calendar_snapshot import (
+    CalendarSnapshot,
+    build_calendar_snapshot,
+    get_calendar_snapshot,
+    write_calendar_snapshot,
+)
+from edc_facility.exceptions import CalendarSnapshotError
+from edc_facility.holiday_cache import holiday_cache
+from edc_facility.holidays import Holidays
+from edc_facility.import_holidays import import_holidays
+from edc_facility.models import Holiday
+
+
+@override_settings(SITE_ID=20)
+class TestCalendarSnapshot(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        holiday_cache.clear()
+        self.folder = TemporaryDirectory()
+        self.path = Path(self.folder.name) / "calendar.bin"
+
+    def tearDown(self):
+        holiday_cache.clear()
+        self.folder.cleanup()
+
+    def test_write_and_read(self):
+        write_calendar_snapshot(
+            self.path,
+            "edc_facility.holiday",
+            {"botswana": [date(2017, 9, 30), date(2017, 1, 1)], "malawi": []},
+        )
+        snapshot = CalendarSnapshot(self.path)
+        self.assertEqual(snapshot.model, "edc_facility.holiday")
+        self.assertEqual(snapshot.countries, ["botswana", "malawi"])
+        self.assertEqual(
+            list(snapshot.ordinals("botswana")),
+            [date(2017, 1, 1).toordinal(), date(2017, 9, 30).toordinal()],
+        )
+        self.assertEqual(
+            snapshot.local_dates("botswana"), frozenset([date(2017, 1, 1), date(2017, 9, 30)])
+        )
+        self.assertTrue(snapshot.is_holiday("botswana", date(2017, 9, 30)))
+        self.assertFalse(snapshot.is_holiday("botswana", date(2017, 9, 29)))
+        self.assertFalse(snapshot.is_holiday("malawi", date(2017, 9, 30)))
+        self.assertTrue(snapshot.ordinals("botswana").readonly)
+
+    def test_invalid_file(self):
+        self.path.write_bytes(b"blah")
+        self.assertRaises(CalendarSnapshotError, CalendarSnapshot, self.path)
+        self.assertIsNone(get_calendar_snapshot(self.path))
+        self.assertIsNone(get_calendar_snapshot(Path(self.folder.name) / "missing.bin"))
+
+    def test_build_calendar_snapshot_not_set(self):
+        self.assertRaises(CalendarSnapshotError, build_calendar_snapshot)
+
+    def test_holidays_read_from_snapshot(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            holidays = Holidays()
+            with self.assertNumQueries(0):
+                self.assertTrue(
+                    holidays.is_holiday(datetime(2017, 9, 30, tzinfo=ZoneInfo("UTC")))
+                )
+            self.assertEqual(
+                holidays.cached_local_dates,
+                frozenset(
+                    Holiday.objects.filter(country="botswana").values_list(
+                        "local_date", flat=True
+                    )
+                ),
+            )
+
+    def test_stale_snapshot_not_read_after_change(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            Holiday.objects.create(
+                country="botswana", local_date=date(2017, 9, 29), name="extra"
+            )
+            holidays = Holidays()
+            self.assertTrue(
+                holidays.is_holiday(datetime(2017, 9, 29, 12, tzinfo=ZoneInfo("UTC")))
+            )
+            # rebuilt snapshot is read again
+            build_calendar_snapshot()
+            holiday_cache._registry = {}
+            self.assertIn(date(2017, 9, 29), get_calendar_snapshot().local_dates("botswana"))
+            with self.assertNumQueries(0):
+                self.assertTrue(
+                    holidays.is_holiday(datetime(2017, 9, 29, 12, tzinfo=ZoneInfo("UTC")))
+                )
+
+    def test_snapshot_rebuilt_on_save_and_delete(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            with self.captureOnCommitCallbacks(execute=True):
+                obj = Holiday.objects.create(
+                    country="botswana", local_date=date(2017, 9, 29), name="extra"
+                )
+            self.assertTrue(get_calendar_snapshot().is_holiday("botswana", date(2017, 9, 29)))
+            with self.captureOnCommitCallbacks(execute=True):
+                obj.delete()
+            self.assertFalse(get_calendar_snapshot().is_holiday("botswana", date(2017, 9, 29)))
+
+    def test_snapshot_not_rebuilt_on_save_within_deferred(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            with self.captureOnCommitCallbacks(execute=True):
+                with holiday_cache.deferred():
+                    Holiday.objects.create(
+                        country="botswana", local_date=date(2017, 9, 29), name="extra"
+                    )
+            self.assertFalse(get_calendar_snapshot().is_holiday("botswana", date(2017, 9, 29)))
+
+    def test_snapshot_rebuilt_by_other_process(self):
+        utc_datetime = datetime(2017, 9, 29, 12, tzinfo=ZoneInfo("UTC"))
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            holidays = Holidays()
+            self.assertFalse(holidays.is_holiday(utc_datetime))
+            # changed and rebuilt elsewhere, no signals in this process
+            Holiday.objects.bulk_create(
+                [Holiday(country="botswana", local_date=utc_datetime.date(), name="extra")]
+            )
+            build_calendar_snapshot()
+            # not checked again within the interval
+            self.assertFalse(holidays.is_holiday(utc_datetime))
+            with override_settings(EDC_FACILITY_HOLIDAY_CACHE_VERSION_INTERVAL=0):
+                with self.assertNumQueries(0):
+                    self.assertTrue(holidays.is_holiday(utc_datetime))
+
+    def test_import_holidays_rebuilds_snapshot(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            with self.captureOnCommitCallbacks(execute=True):
+                import_holidays()
+            snapshot = get_calendar_snapshot()
+            self.assertEqual(
+                sorted(snapshot.countries),
+                sorted(Holiday.objects.values_list("country", flat=True).distinct()),
+            )
+
+    def test_import_holidays_for_tests_rebuilds_snapshot(self):
+        with override_settings(EDC_FACILITY_CALENDAR_SNAPSHOT=str(self.path)):
+            build_calendar_snapshot()
+            with self.captureOnCommitCallbacks(execute=True):
+                import_holidays(test=True)
+            snapshot = get_calendar_snapshot()
+            self.assertEqual(
+                snapshot.local_dates("botswana"),
+                frozenset(
+                    Holiday.objects.filter(country="botswana").values_list(
+                        "local_date", flat=True
+                    )
+                ),
+            )
+
+    def test_build_facility_snapshot_command(self):
+        out = StringIO()
+        call_command("build_facility_snapshot", "--output", str(self.path), stdout=out)
+        self.assertIn("Wrote calendar snapshot", out.getvalue())
+        self.assertIn("botswana", CalendarSnapshot(self.path).countries)
@@ -0,0 +1,171 @@
+from datetime import date, datetime
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import FR, MO, WE
+from django.contrib.sites.models import Site
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_appointment.models import Appointment
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.capacity import SlotCounter
+from edc_facility.facility import Facility
+from edc_facility.import_holidays import import_holidays
+
+
+@override_settings(SITE_ID=20, EDC_FACILITY_BOOKING_MODEL="edc_appointment.appointment")
+class TestCapacity(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        self.site = Site.objects.get(id=20)
+        self.facility = Facility(name="clinic", days=[MO, WE, FR], slots=[2, 2, 2])
+
+    def book(self, dt: datetime, count: int, facility_name: str | None = None, site=None):
+        Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    id=uuid4(),
+                    subject_identifier=f"{facility_name}-{dt.isoformat()}-{i}",
+                    visit_schedule_name="visit_schedule",
+                    schedule_name="schedule",
+                    facility_name=facility_name or self.facility.name,
+                    appt_datetime=dt,
+                    appt_reason="scheduled",
+                    visit_code="1000",
+                    timepoint=0,
+                    site=site or self.site,
+                )
+                for i in range(count)
+            ]
+        )
+
+    def test_slot_counter(self):
+        self.book(datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC")), 2)
+        self.book(datetime(2017, 3, 6, 15, tzinfo=ZoneInfo("UTC")), 1)
+        self.book(datetime(2017, 3, 8, 9, tzinfo=ZoneInfo("UTC")), 1)
+        self.book(datetime(2017, 3, 8, 9, tzinfo=ZoneInfo("UTC")), 5, facility_name="blah")
+        slot_counter = SlotCounter(facility_name="clinic", site_id=self.site.id)
+        with self.assertNumQueries(1):
+            slot_counter.load(date(2017, 3, 1), date(2017, 4, 1))
+            slot_counter.load(date(2017, 3, 5), date(2017, 3, 20))
+        self.assertEqual(slot_counter.count(date(2017, 3, 6)), 3)
+        self.assertEqual(slot_counter.count(date(2017, 3, 8)), 1)
+        self.assertEqual(slot_counter.count(date(2017, 3, 10)), 0)
+        slot_counter.add(date(2017, 3, 8))
+        self.assertEqual(
+            slot_counter.full_dates(self.facility.slots_by_weekday),
+            {date(2017, 3, 6), date(2017, 3, 8)},
+        )
+        with self.assertNumQueries(1):
+            slot_counter.load(date(2017, 2, 1), date(2017, 4, 1))
+
+    def test_slot_counter_does_not_load_gaps(self):
+        self.book(datetime(2017, 6, 5, 9, tzinfo=ZoneInfo("UTC")), 1)
+        slot_counter = SlotCounter(facility_name="clinic", site_id=self.site.id)
+        slot_counter.load(date(2017, 3, 1), date(2017, 4, 1))
+        slot_counter.load(date(2017, 9, 1), date(2017, 10, 1))
+        self.assertEqual(
+            slot_counter._unloaded(date(2017, 2, 1), date(2017, 11, 1)),
+            [
+                (date(2017, 2, 1).toordinal(), date(2017, 3, 1).toordinal()),
+                (date(2017, 4, 1).toordinal(), date(2017, 9, 1).toordinal()),
+                (date(2017, 10, 1).toordinal(), date(2017, 11, 1).toordinal()),
+            ],
+        )
+        self.assertEqual(
+            slot_counter._loaded,
+            [(date(2017, 2, 1).toordinal(), date(2017, 11, 1).toordinal())],
+        )
+        slot_counter = SlotCounter(facility_name="clinic", site_id=self.site.id)
+        slot_counter.load(date(2017, 3, 1), date(2017, 4, 1))
+        slot_counter.load(date(2017, 9, 1), date(2017, 10, 1))
+        # the gap between the loaded windows was not loaded
+        self.assertEqual(slot_counter.count(date(2017, 6, 5)), 0)
+        with self.assertNumQueries(1):
+            slot_counter.load(date(2017, 6, 1), date(2017, 7, 1))
+        self.assertEqual(slot_counter.count(date(2017, 6, 5)), 1)
+        # only the gaps either side of June
+        with self.assertNumQueries(2):
+            slot_counter.load(date(2017, 3, 15), date(2017, 9, 15))
+        self.assertEqual(slot_counter.count(date(2017, 6, 5)), 1)
+        with self.assertNumQueries(0):
+            slot_counter.load(date(2017, 3, 15), date(2017, 9, 15))
+
+    def test_available_arr_skips_full_days(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))  # MO
+        self.book(suggested_datetime, 2)
+        self.assertEqual(
+            self.facility.available_datetime(
+                suggested_datetime=suggested_datetime, site=self.site
+            ),
+            datetime(2017, 3, 8, 9, tzinfo=ZoneInfo("UTC")),
+        )
+
+    def test_available_arr_other_site_not_counted(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))  # MO
+        self.book(suggested_datetime, 2, site=Site.objects.get(id=10))
+        self.assertEqual(
+            self.facility.available_datetime(
+                suggested_datetime=suggested_datetime, site=self.site
+            ),
+            suggested_datetime,
+        )
+
+    @override_settings(EDC_FACILITY_BOOKING_MODEL=None)
+    def test_slots_not_enforced(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))  # MO
+        self.book(suggested_datetime, 2)
+        self.assertEqual(
+            self.facility.available_datetime(
+                suggested_datetime=suggested_datetime, site=self.site
+            ),
+            suggested_datetime,
+        )
+
+    def test_available_datetimes_counts_bookings(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))  # MO
+        self.book(suggested_datetime, 1)
+        requests = [(suggested_datetime, None, None) for _ in range(5)]
+        with self.assertNumQueries(1):
+            available_datetimes = self.facility.available_datetimes(
+                requests, site=self.site, schedule_on_holidays=True
+            )
+        self.assertEqual(
+            [dt.date() for dt in available_datetimes],
+            [
+                date(2017, 3, 6),
+                date(2017, 3, 8),
+                date(2017, 3, 10),
+                date(2017, 3, 13),
+                date(2017, 3, 15),
+            ],
+        )
+
+    def test_available_datetimes_reuses_slot_counter(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))  # MO
+        slot_counter = SlotCounter(facility_name=self.facility.name, site_id=self.site.id)
+        requests = [(suggested_datetime, None, None)]
+        taken_datetimes = []
+        for _ in range(3):
+            taken_datetimes.extend(
+                self.facility.available_datetimes(
+                    requests,
+                    site=self.site,
+                    slot_counter=slot_counter,
+                    schedule_on_holidays=True,
+                )
+            )
+        self.assertEqual(
+            [dt.date() for dt in taken_datetimes],
+            [date(2017, 3, 6), date(2017, 3, 6), date(2017, 3, 8)],
+        )
+        self.assertEqual(slot_counter.count(date(2017, 3, 6)), 2)
@@ -0,0 +1,135 @@
+import random
+from datetime import date, datetime, timedelta
+from unittest import skipIf
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import FR, MO, TH, TU, WE, relativedelta
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.engines import np
+from edc_facility.exceptions import FacilityError
+from edc_facility.facility import Facility
+from edc_facility.import_holidays import import_holidays
+
+
+@skipIf(np is None, "numpy not installed")
+class TestBusdayEngine(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def test_invalid_engine(self):
+        self.assertRaises(FacilityError, Facility, name="clinic", days=[MO], engine="blah")
+
+    def test_same_as_python_engine(self):
+        random.seed(10)
+        holiday_dates = frozenset(
+            date(2017, 1, 1) + timedelta(days=random.randint(0, 400)) for _ in range(40)
+        )
+        for _ in range(0, 500):
+            days = random.sample(range(7), random.randint(1, 7))
+            python_facility = Facility(name="clinic", days=days)
+            busday_facility = Facility(name="clinic", days=days, engine="busday")
+            suggested_datetime = datetime(
+                2017, 1, 1, random.randint(0, 23), tzinfo=ZoneInfo("UTC")
+            ) + timedelta(days=random.randint(0, 365))
+            forward_delta = relativedelta(days=random.randint(1, 40))
+            reverse_delta = relativedelta(days=random.randint(0, 40))
+            taken_dates = {
+                (suggested_datetime + timedelta(days=random.randint(-20, 20))).date()
+                for _ in range(random.randint(0, 10))
+            }
+            expected = python_facility.engine.search(
+                suggested_datetime,
+                forward_delta,
+                reverse_delta,
+                taken_dates,
+                holiday_dates,
+            )
+            self.assertEqual(
+                expected,
+                busday_facility.engine.search(
+                    suggested_datetime,
+                    forward_delta,
+                    reverse_delta,
+                    taken_dates,
+                    holiday_dates,
+                ),
+            )
+            self.assertEqual(
+                [expected],
+                busday_facility.engine.search_many(
+                    [suggested_datetime],
+                    [forward_delta],
+                    [reverse_delta],
+                    taken_dates,
+                    holiday_dates,
+                ),
+            )
+
+    def test_calendar_per_time_zone(self):
+        facility = Facility(name="clinic", days=[MO, TU, WE, TH, FR], engine="busday")
+        holiday_dates = frozenset([date(2017, 1, 3)])
+        with override_settings(TIME_ZONE="Africa/Gaborone"):
+            calendar = facility.engine.get_busdaycalendar(holiday_dates)
+            self.assertEqual(list(calendar.holidays), [np.datetime64("2017-01-03")])
+        with override_settings(TIME_ZONE="America/New_York"):
+            calendar = facility.engine.get_busdaycalendar(holiday_dates)
+            self.assertEqual(list(calendar.holidays), [np.datetime64("2017-01-04")])
+
+    def test_search_many_same_as_python_engine(self):
+        random.seed(20)
+        holiday_dates = frozenset(
+            date(2017, 1, 1) + timedelta(days=random.randint(0, 400)) for _ in range(40)
+        )
+        python_facility = Facility(name="clinic", days=[MO, WE, TH])
+        busday_facility = Facility(name="clinic", days=[MO, WE, TH], engine="busday")
+        tzinfos = [ZoneInfo("UTC"), ZoneInfo("Africa/Gaborone"), ZoneInfo("America/New_York")]
+        suggested_datetimes = [
+            datetime(2017, 1, 1, random.randint(0, 23), tzinfo=random.choice(tzinfos))
+            + timedelta(days=random.randint(0, 365))
+            for _ in range(500)
+        ]
+        forward_deltas = [relativedelta(days=random.randint(1, 40)) for _ in range(500)]
+        reverse_deltas = [relativedelta(days=random.randint(0, 40)) for _ in range(500)]
+        taken_dates = {
+            date(2017, 1, 1) + timedelta(days=random.randint(0, 365)) for _ in range(100)
+        }
+        for time_zone in ["Africa/Gaborone", "America/New_York"]:
+            with self.subTest(time_zone=time_zone), override_settings(TIME_ZONE=time_zone):
+                self.assertEqual(
+                    [
+                        python_facility.engine.search(*args, taken_dates, holiday_dates)
+                        for args in zip(suggested_datetimes, forward_deltas, reverse_deltas)
+                    ],
+                    busday_facility.engine.search_many(
+                        suggested_datetimes,
+                        forward_deltas,
+                        reverse_deltas,
+                        taken_dates,
+                        holiday_dates,
+                    ),
+                )
+
+    @override_settings(SITE_ID=20)
+    def test_available_datetimes(self):
+        python_facility = Facility(name="clinic", days=[MO, TU, WE, TH, FR])
+        busday_facility = Facility(name="clinic", days=[MO, TU, WE, TH, FR], engine="busday")
+        suggested_datetime = datetime(2017, 1, 1, 9, 0, tzinfo=ZoneInfo("UTC"))
+        requests = [
+            (suggested_datetime + relativedelta(days=n), None, relativedelta(days=3))
+            for n in range(0, 365)
+        ]
+        for update_taken in [True, False]:
+            with self.subTest(update_taken=update_taken):
+                self.assertEqual(
+                    python_facility.available_datetimes(requests, update_taken=update_taken),
+                    busday_facility.available_datetimes(requests, update_taken=update_taken),
+                )
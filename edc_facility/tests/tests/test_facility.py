@@ -1,6 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from itertools import islice
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
+from arrow import Arrow
 from dateutil.relativedelta import FR, MO, SA, SU, TH, TU, WE, relativedelta
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -9,9 +12,14 @@ from edc_sites.tests import SiteTestCaseMixin
 from edc_sites.utils import add_or_update_django_sites
 from edc_utils import get_utcnow
 
+from edc_facility.engines import as_timedelta, iter_candidate_dates
+from edc_facility.exceptions import FacilityError
 from edc_facility.facility import Facility
+from edc_facility.holiday_cache import holiday_cache
 from edc_facility.import_holidays import import_holidays
 from edc_facility.models import Holiday
+from edc_facility.taken_dates import TakenDates
+from edc_facility.utils import get_facilities, get_facility
 
 
 class TestFacility(SiteTestCaseMixin, TestCase):
@@ -104,3 +112,194 @@ class TestFacility(SiteTestCaseMixin, TestCase):
         facility = Facility(name="clinic", days=[suggested_date.weekday()], slots=[100])
         available_arr = facility.available_arr(suggested_date)
         self.assertEqual(expected_date, available_arr.datetime)
+
+    def test_facility_is_immutable(self):
+        self.assertRaises(FacilityError, setattr, self.facility, "name", "clinic2")
+        with self.assertRaises(TypeError):
+            self.facility.slots_by_weekday[0] = 1  # noqa
+
+    def test_compiled_tables(self):
+        facility = Facility(name="clinic", days=[TU, TH], slots=[10, 20])
+        self.assertEqual(
+            facility.weekday_mask, (False, True, False, True, False, False, False)
+        )
+        self.assertEqual(dict(facility.slots_by_weekday), {1: 10, 3: 20})
+
+    def test_get_facility_is_shared(self):
+        facility = get_facility("7-day-clinic")
+        self.assertIs(facility, get_facility("7-day-clinic"))
+        self.assertIs(facility, get_facilities()["7-day-clinic"])
+        self.assertRaises(FacilityError, get_facility, "blah")
+
+    def test_get_facility_rebuilt_if_definitions_change(self):
+        facility = get_facility("7-day-clinic")
+        with override_settings(EDC_FACILITY_DEFINITIONS={"clinic": dict(days=[MO])}):
+            self.assertRaises(FacilityError, get_facility, "7-day-clinic")
+            self.assertEqual(get_facility("clinic").weekdays, [MO.weekday])
+        self.assertIsNot(facility, get_facility("7-day-clinic"))
+
+    @override_settings(SITE_ID=20)
+    def test_available_datetimes(self):
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[100, 100, 100])
+        suggested_datetime = datetime(2017, 3, 6, 9, 0, tzinfo=ZoneInfo("UTC"))  # MO
+        requests = [
+            (suggested_datetime + relativedelta(weeks=n), None, None) for n in range(0, 20)
+        ]
+        requests.append((suggested_datetime, None, None))
+        taken_datetimes = []
+        expected = []
+        for suggested, forward_delta, reverse_delta in requests:
+            dt = facility.available_datetime(
+                suggested_datetime=suggested, taken_datetimes=taken_datetimes
+            )
+            taken_datetimes.append(dt)
+            expected.append(dt)
+        holiday_cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(expected, facility.available_datetimes(requests))
+        # the repeated suggested date moves to the next clinic day
+        self.assertEqual(expected[-1], datetime(2017, 3, 8, 9, 0, tzinfo=ZoneInfo("UTC")))
+
+    @override_settings(SITE_ID=20)
+    def test_available_datetimes_with_taken_datetimes(self):
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[100, 100, 100])
+        suggested_datetime = datetime(2017, 3, 6, 9, 0, tzinfo=ZoneInfo("UTC"))  # MO
+        self.assertEqual(
+            [datetime(2017, 3, 8, 9, 0, tzinfo=ZoneInfo("UTC"))],
+            facility.available_datetimes(
+                [(suggested_datetime, None, None)], taken_datetimes=[suggested_datetime]
+            ),
+        )
+
+    def test_iter_candidate_dates(self):
+        suggested_date = date(2017, 3, 10)
+        self.assertEqual(
+            [
+                d.day
+                for d in iter_candidate_dates(
+                    suggested_date, date(2017, 3, 8), date(2017, 3, 13)
+                )
+            ],
+            [10, 11, 12, 9, 8],
+        )
+        self.assertEqual(
+            [
+                d.day
+                for d in iter_candidate_dates(
+                    suggested_date, date(2017, 3, 8), date(2017, 3, 12)
+                )
+            ],
+            [10, 11, 9, 8],
+        )
+        self.assertEqual(
+            [
+                d.day
+                for d in iter_candidate_dates(
+                    suggested_date, date(2017, 3, 7), date(2017, 3, 14)
+                )
+            ],
+            [10, 11, 12, 9, 13, 8, 7],
+        )
+
+    def test_iter_candidate_dates_wide_window_is_lazy(self):
+        suggested_date = date(2017, 3, 10)
+        candidates = iter_candidate_dates(
+            suggested_date,
+            suggested_date - timedelta(days=3650),
+            suggested_date + timedelta(days=3650),
+        )
+        self.assertEqual([d.day for d in islice(candidates, 5)], [10, 11, 9, 12, 8])
+
+    def test_get_arr_span(self):
+        suggested_arr = Arrow.fromdatetime(datetime(2017, 3, 10, 9, tzinfo=ZoneInfo("UTC")))
+        arr_span, min_arr, max_arr = self.facility.get_arr_span(
+            suggested_arr, relativedelta(days=3), relativedelta(days=2)
+        )
+        self.assertEqual([arr.date().day for arr in arr_span], [10, 11, 12, 9, 13, 8])
+        self.assertEqual(min_arr.date(), date(2017, 3, 8))
+        self.assertEqual(max_arr.date(), date(2017, 3, 13))
+
+    def test_taken_dates(self):
+        taken_dates = TakenDates([datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))])
+        self.assertIn(date(2017, 3, 6), taken_dates)
+        self.assertIn(datetime(2017, 3, 6, 23, tzinfo=ZoneInfo("UTC")), taken_dates)
+        self.assertNotIn(date(2017, 3, 7), taken_dates)
+        taken_dates.add(date(2017, 3, 7))
+        self.assertEqual(list(taken_dates), [date(2017, 3, 6), date(2017, 3, 7)])
+
+    @override_settings(SITE_ID=20)
+    def test_available_arr_with_taken_dates_index(self):
+        facility = Facility(name="clinic", days=[MO, WE, FR], slots=[100, 100, 100])
+        suggested_datetime = datetime(2017, 3, 6, 9, 0, tzinfo=ZoneInfo("UTC"))  # MO
+        taken_dates = TakenDates([suggested_datetime])
+        self.assertEqual(
+            facility.available_datetime(
+                suggested_datetime=suggested_datetime, taken_datetimes=taken_dates
+            ),
+            datetime(2017, 3, 8, 9, 0, tzinfo=ZoneInfo("UTC")),
+        )
+        # index is not changed by available_arr
+        self.assertEqual(len(taken_dates), 1)
+        # ... but is extended by available_datetimes
+        facility.available_datetimes(
+            [(suggested_datetime, None, None)], taken_datetimes=taken_dates
+        )
+        self.assertIn(date(2017, 3, 8), taken_dates)
+        self.assertEqual(
+            facility.available_datetime(
+                suggested_datetime=suggested_datetime, taken_datetimes=taken_dates
+            ),
+            datetime(2017, 3, 10, 9, 0, tzinfo=ZoneInfo("UTC")),
+        )
+
+    @override_settings(SITE_ID=20)
+    def test_available_datetime_without_arrow(self):
+        suggested_datetime = datetime(2017, 4, 14, 9, 0, tzinfo=ZoneInfo("UTC"))  # FR, holiday
+        with patch("edc_facility.facility.Arrow") as mock_arrow:
+            available_datetime = self.facility.available_datetime(
+                suggested_datetime=suggested_datetime
+            )
+        self.assertEqual(mock_arrow.mock_calls, [])
+        self.assertNotIsInstance(available_datetime, Arrow)
+        self.assertEqual(
+            available_datetime, datetime(2017, 4, 18, 9, 0, tzinfo=ZoneInfo("UTC"))
+        )
+        self.assertEqual(
+            self.facility.available_arr(suggested_datetime=suggested_datetime),
+            Arrow.fromdatetime(available_datetime),
+        )
+
+    @override_settings(SITE_ID=20)
+    def test_naive_suggested_datetime_is_utc(self):
+        self.assertEqual(
+            self.facility.available_datetime(
+                suggested_datetime=datetime(2017, 4, 14, 9, 0), schedule_on_holidays=True
+            ),
+            datetime(2017, 4, 14, 9, 0, tzinfo=ZoneInfo("UTC")),
+        )
+
+    @override_settings(SITE_ID=20)
+    def test_open_slot_on_override_gets_arrow(self):
+        class MyFacility(Facility):
+            @staticmethod
+            def open_slot_on(arr):
+                # refuse Tuesdays
+                return None if arr.weekday() == TU.weekday else arr
+
+        facility = MyFacility(name="clinic", days=[MO, TU, WE, TH, FR])
+        self.assertEqual(
+            facility.available_datetime(
+                suggested_datetime=datetime(2017, 3, 7, 9, 0, tzinfo=ZoneInfo("UTC")),  # TU
+                reverse_delta=relativedelta(days=0),
+            ),
+            datetime(2017, 3, 8, 9, 0, tzinfo=ZoneInfo("UTC")),
+        )
+
+    def test_as_timedelta(self):
+        self.assertEqual(as_timedelta(relativedelta(days=3)), timedelta(days=3))
+        self.assertEqual(
+            as_timedelta(relativedelta(weeks=1, hours=2)), timedelta(days=7, hours=2)
+        )
+        self.assertEqual(as_timedelta(relativedelta(months=1)), relativedelta(months=1))
+        self.assertEqual(as_timedelta(relativedelta(weekday=MO)), relativedelta(weekday=MO))
+        self.assertEqual(as_timedelta(timedelta(days=2)), timedelta(days=2))
@@ -0,0 +1,206 @@
+from datetime import date, datetime
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import MO, TH
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.exceptions import HolidayImportError
+from edc_facility.holiday_rules import (
+    EasterRelative,
+    FixedDate,
+    HolidayRule,
+    NthWeekday,
+    ObservedOnMonday,
+    expand_rules,
+    expand_rules_for_years,
+)
+from edc_facility.holidays import Holidays
+from edc_facility.import_holidays import import_holidays, materialize_holiday_rules
+from edc_facility.models import Holiday
+
+botswana_rules = [
+    ObservedOnMonday(FixedDate(1, 1, "New Year"), observed_name="Public Holiday"),
+    EasterRelative(-2, "Good Friday"),
+    EasterRelative(-1, "Public Holiday"),
+    EasterRelative(1, "Easter Monday"),
+    EasterRelative(39, "Ascension Day"),
+    FixedDate(5, 1, "May Day/Labour Day"),
+    FixedDate(7, 1, "Sir Seretse Khama Day"),
+    NthWeekday(7, MO, 3, "President's Day"),
+    NthWeekday(7, MO, 3, "Public Holiday", days=1),
+    FixedDate(9, 30, "Botswana Day"),
+    ObservedOnMonday(FixedDate(10, 1, "Public Holiday"), observed_name="Public Holiday"),
+    FixedDate(12, 25, "Christmas Day"),
+    FixedDate(12, 26, "Boxing Day"),
+]
+
+
+class TestHolidayRules(TestCase):
+    def test_fixed_date(self):
+        self.assertEqual(
+            FixedDate(12, 25, "Christmas Day").dates(2030),
+            [(date(2030, 12, 25), "Christmas Day")],
+        )
+
+    def test_easter_relative(self):
+        self.assertEqual(
+            EasterRelative(-2, "Good Friday").dates(2017)[0][0], date(2017, 4, 14)
+        )
+        self.assertEqual(
+            EasterRelative(1, "Easter Monday").dates(2024)[0][0], date(2024, 4, 1)
+        )
+
+    def test_nth_weekday(self):
+        self.assertEqual(NthWeekday(7, MO, 3, "").dates(2017)[0][0], date(2017, 7, 17))
+        self.assertEqual(NthWeekday(11, TH, 4, "").dates(2024)[0][0], date(2024, 11, 28))
+        self.assertEqual(NthWeekday(5, MO, -1, "").dates(2024)[0][0], date(2024, 5, 27))
+        self.assertEqual(NthWeekday(7, 0, 3, "", days=1).dates(2017)[0][0], date(2017, 7, 18))
+
+    def test_observed_on_monday(self):
+        rules = (ObservedOnMonday(FixedDate(1, 1, "New Year")),)
+        self.assertEqual(
+            dict(expand_rules(rules, 2017)),
+            {date(2017, 1, 1): "New Year", date(2017, 1, 2): "New Year (observed)"},
+        )
+        self.assertEqual(dict(expand_rules(rules, 2018)), {date(2018, 1, 1): "New Year"})
+
+    def test_observed_on_monday_collision(self):
+        rules = (
+            ObservedOnMonday(FixedDate(12, 25, "Christmas Day")),
+            ObservedOnMonday(FixedDate(12, 26, "Boxing Day"), weekdays=(5, 6)),
+        )
+        # 2016: Christmas on a Sunday, Boxing Day on the Monday
+        self.assertEqual(
+            dict(expand_rules(rules, 2016)),
+            {
+                date(2016, 12, 25): "Christmas Day",
+                date(2016, 12, 26): "Boxing Day",
+                date(2016, 12, 27): "Christmas Day (observed)",
+            },
+        )
+        # 2021: Christmas on a Saturday, Boxing Day on the Sunday
+        self.assertEqual(
+            sorted(expand_rules(rules, 2021)),
+            [date(2021, 12, 25), date(2021, 12, 26), date(2021, 12, 27)],
+        )
+        # the observed day skips the weekend
+        rules = tuple(FixedDate(1, day, "Public Holiday") for day in range(2, 7)) + (
+            ObservedOnMonday(FixedDate(1, 1, "New Year")),
+        )
+        self.assertEqual(expand_rules(rules, 2017)[date(2017, 1, 9)], "New Year (observed)")
+
+    def test_holiday_rule_is_abstract(self):
+        self.assertRaises(TypeError, HolidayRule)
+
+    def test_expand_rules_is_memoized(self):
+        rules = tuple(botswana_rules)
+        self.assertIs(expand_rules(rules, 2040), expand_rules(rules, 2040))
+
+    def test_expand_rules_for_years(self):
+        local_dates = expand_rules_for_years(tuple(botswana_rules), 2017, 2019)
+        self.assertEqual({d.year for d in local_dates}, {2017, 2018, 2019})
+        self.assertEqual(local_dates[date(2017, 10, 2)], "Public Holiday")
+
+
+@override_settings(SITE_ID=20, EDC_FACILITY_HOLIDAY_RULES={"botswana": botswana_rules})
+class TestHolidayRulesWithHolidays(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def test_rules_cover_holiday_file(self):
+        local_dates = set(
+            Holiday.objects.filter(country="botswana").values_list("local_date", flat=True)
+        )
+        self.assertTrue(local_dates)
+        self.assertLessEqual(
+            local_dates, set(expand_rules_for_years(tuple(botswana_rules), 2017, 2017))
+        )
+
+    def test_is_holiday_for_any_year(self):
+        holidays = Holidays()
+        self.assertTrue(
+            holidays.is_holiday(datetime(2017, 4, 14, 10, 0, tzinfo=ZoneInfo("UTC")))
+        )
+        # Good Friday and the day after Christmas, far from the file's year
+        self.assertTrue(
+            holidays.is_holiday(datetime(2090, 4, 14, 10, 0, tzinfo=ZoneInfo("UTC")))
+        )
+        self.assertTrue(
+            holidays.is_holiday(datetime(1990, 12, 26, 10, 0, tzinfo=ZoneInfo("UTC")))
+        )
+        self.assertFalse(
+            holidays.is_holiday(datetime(2090, 4, 13, 10, 0, tzinfo=ZoneInfo("UTC")))
+        )
+
+    def test_local_dates_for_years(self):
+        local_dates = Holidays().local_dates_for_years(2017, 2018)
+        self.assertIn(date(2017, 7, 18), local_dates)
+        self.assertIn(date(2018, 3, 30), local_dates)
+        self.assertNotIn(date(2019, 4, 19), local_dates)
+
+    def test_between_and_holidays_in(self):
+        holidays = Holidays()
+        self.assertEqual(
+            holidays.between(date(2090, 12, 20), date(2091, 1, 5)),
+            [date(2090, 12, 25), date(2090, 12, 26), date(2091, 1, 1)],
+        )
+        self.assertEqual(
+            holidays.holidays_in([date(2090, 12, 25), date(2090, 12, 27)]),
+            frozenset([date(2090, 12, 25)]),
+        )
+
+    def test_between_merges_table_and_rules(self):
+        Holiday.objects.create(country="botswana", local_date=date(2017, 12, 27), name="x")
+        holidays = Holidays()
+        with self.assertNumQueries(1):
+            local_dates = holidays.between(date(2017, 12, 20), date(2018, 1, 5))
+        self.assertEqual(
+            local_dates,
+            [date(2017, 12, 25), date(2017, 12, 26), date(2017, 12, 27), date(2018, 1, 1)],
+        )
+
+    @override_settings(EDC_FACILITY_HOLIDAY_RULES={})
+    def test_without_rules(self):
+        holidays = Holidays()
+        self.assertFalse(
+            holidays.is_holiday(datetime(2090, 4, 14, 10, 0, tzinfo=ZoneInfo("UTC")))
+        )
+
+    def test_materialize(self):
+        count = materialize_holiday_rules("botswana", 2017, 2019)
+        self.assertEqual(count, len(expand_rules_for_years(tuple(botswana_rules), 2017, 2019)))
+        self.assertTrue(
+            Holiday.objects.filter(country="botswana", local_date=date(2019, 4, 19)).exists()
+        )
+        # existing rows are updated, not duplicated
+        self.assertEqual(
+            Holiday.objects.filter(country="botswana", local_date=date(2017, 4, 14)).count(),
+            1,
+        )
+        self.assertEqual(materialize_holiday_rules("botswana", 2017, 2019), count)
+
+    def test_materialize_without_rules_raises(self):
+        self.assertRaises(HolidayImportError, materialize_holiday_rules, "lesotho", 2017, 2019)
+
+    def test_materialize_command(self):
+        out = StringIO()
+        call_command(
+            "materialize_holidays",
+            "botswana",
+            "--start-year=2020",
+            "--end-year=2021",
+            stdout=out,
+        )
+        self.assertTrue(
+            Holiday.objects.filter(country="botswana", local_date=date(2021, 12, 25)).exists()
+        )
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
 from django.contrib.auth.models import User
@@ -8,9 +8,11 @@ from edc_sites.site import sites
 from edc_sites.tests import SiteTestCaseMixin
 from edc_sites.utils import add_or_update_django_sites
 
-from edc_facility.exceptions import FacilitySiteError
+from edc_facility.exceptions import FacilitySiteError, HolidayImportError
+from edc_facility.holiday_cache import holiday_cache
 from edc_facility.holidays import Holidays
 from edc_facility.import_holidays import import_holidays
+from edc_facility.models import Holiday
 
 
 class TestHolidays(SiteTestCaseMixin, TestCase):
@@ -22,6 +24,7 @@ class TestHolidays(SiteTestCaseMixin, TestCase):
         import_holidays()
 
     def setUp(self):
+        holiday_cache.clear()
         self.user = User.objects.create(username="erik")
 
     @override_settings(SITE_ID=10)
@@ -49,6 +52,36 @@ class TestHolidays(SiteTestCaseMixin, TestCase):
         self.assertIsNotNone(holidays.local_dates)
         self.assertGreater(len(holidays), 0)
 
+    def test_holidays_follow_current_site(self):
+        Holiday.objects.create(country="namibia", local_date=date(2017, 3, 21), name="x")
+        holidays = Holidays()
+        with override_settings(SITE_ID=10):
+            self.assertEqual(len(holidays), 14)
+            self.assertIn(date(2017, 9, 30), holidays.local_dates)
+        with override_settings(SITE_ID=60):
+            self.assertEqual(len(holidays), 1)
+            self.assertEqual(holidays.local_dates, [date(2017, 3, 21)])
+        with override_settings(SITE_ID=10):
+            self.assertEqual(len(holidays), 14)
+
+    async def test_aholidays_follow_current_site(self):
+        await Holiday.objects.acreate(
+            country="namibia", local_date=date(2017, 3, 21), name="x"
+        )
+        holidays = Holidays()
+        with override_settings(SITE_ID=10):
+            self.assertEqual(await (await holidays.aholidays()).acount(), 14)
+        with override_settings(SITE_ID=60):
+            self.assertEqual(await (await holidays.aholidays()).acount(), 1)
+
+    @override_settings(SITE_ID=10)
+    def test_holidays_disabled(self):
+        holidays = Holidays()
+        self.assertEqual(len(holidays), 14)
+        with override_settings(EDC_FACILITY_DISABLE_HOLIDAYS=True):
+            self.assertEqual(len(holidays), 0)
+            self.assertEqual(holidays.local_dates, [])
+
     @override_settings(SITE_ID=10)
     def test_key_is_formatted_datestring(self):
         holidays = Holidays()
@@ -66,3 +99,137 @@ class TestHolidays(SiteTestCaseMixin, TestCase):
         utc_datetime = datetime(2017, 9, 30, tzinfo=ZoneInfo("UTC"))
         holidays = Holidays()
         self.assertTrue(holidays.is_holiday(utc_datetime))
+
+    @override_settings(SITE_ID=10)
+    def test_is_holiday_queries_once_per_country(self):
+        holidays = Holidays()
+        country = holidays.country
+        with self.assertNumQueries(1):
+            for day in range(1, 32):
+                holidays.is_holiday(datetime(2017, 12, day, tzinfo=ZoneInfo("UTC")))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                Holidays().is_holiday(datetime(2017, 12, 25, tzinfo=ZoneInfo("UTC")))
+            )
+        self.assertIn(country, [k[1] for k in holiday_cache._registry])
+
+    @override_settings(SITE_ID=10)
+    def test_cache_cleared_on_save_and_delete(self):
+        utc_datetime = datetime(2017, 12, 27, tzinfo=ZoneInfo("UTC"))
+        holidays = Holidays()
+        self.assertFalse(holidays.is_holiday(utc_datetime))
+        obj = Holiday.objects.create(
+            country=holidays.country, local_date=utc_datetime.date(), name="holiday"
+        )
+        self.assertTrue(holidays.is_holiday(utc_datetime))
+        obj.delete()
+        self.assertFalse(holidays.is_holiday(utc_datetime))
+
+    @override_settings(SITE_ID=10)
+    def test_cache_cleared_on_import(self):
+        holidays = Holidays()
+        holidays.is_holiday(datetime(2017, 12, 25, tzinfo=ZoneInfo("UTC")))
+        self.assertGreater(len(holiday_cache), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_holidays()
+            # not cleared until the import commits
+            self.assertGreater(len(holiday_cache), 0)
+        self.assertEqual(len(holiday_cache), 0)
+
+    @override_settings(SITE_ID=10)
+    def test_cache_cleared_once_on_import(self):
+        generation = holiday_cache._generation
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            import_holidays()
+            self.assertEqual(holiday_cache._generation, generation)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(holiday_cache._generation, generation + 1)
+
+    @override_settings(SITE_ID=10)
+    def test_import_keeps_holidays_on_error(self):
+        holidays = Holidays()
+        self.assertTrue(holidays.is_holiday(datetime(2017, 12, 25, tzinfo=ZoneInfo("UTC"))))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with override_settings(HOLIDAY_FILE=__file__):
+                self.assertRaises(HolidayImportError, import_holidays)
+        self.assertEqual(len(callbacks), 0)
+        self.assertGreater(len(holiday_cache), 0)
+        self.assertGreater(Holiday.objects.all().count(), 0)
+
+    def test_deferred(self):
+        holiday_cache._registry = {("edc_facility.holiday", "botswana"): frozenset()}
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with holiday_cache.deferred():
+                with holiday_cache.deferred():
+                    holiday_cache.clear()
+                    self.assertEqual(len(holiday_cache), 1)
+            self.assertEqual(len(holiday_cache), 1)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(holiday_cache), 0)
+
+    @override_settings(SITE_ID=10)
+    def test_holidays_in(self):
+        holidays = Holidays()
+        values = [
+            datetime(2017, 9, 30, tzinfo=ZoneInfo("UTC")),
+            datetime(2017, 9, 29, tzinfo=ZoneInfo("UTC")),
+            # naive, taken as UTC
+            datetime(2017, 12, 25, 10),
+            date(2017, 12, 26),
+            date(2017, 12, 27),
+        ]
+        with self.assertNumQueries(1):
+            holiday_dates = holidays.holidays_in(values)
+        self.assertEqual(
+            holiday_dates,
+            frozenset([date(2017, 9, 30), date(2017, 12, 25), date(2017, 12, 26)]),
+        )
+        self.assertEqual(
+            [holidays.is_holiday(dt) for dt in values[:2]],
+            [dt.date() in holiday_dates for dt in values[:2]],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(holidays.holidays_in(values), holiday_dates)
+        self.assertEqual(holidays.holidays_in([]), frozenset())
+
+    @override_settings(SITE_ID=10)
+    def test_holidays_in_local_date(self):
+        holidays = Holidays()
+        # 2017-09-29 22:00 UTC is 2017-09-30 00:00 in Africa/Gaborone
+        with override_settings(TIME_ZONE="Africa/Gaborone"):
+            self.assertEqual(
+                holidays.holidays_in([datetime(2017, 9, 29, 22, tzinfo=ZoneInfo("UTC"))]),
+                frozenset([date(2017, 9, 30)]),
+            )
+
+    @override_settings(SITE_ID=10)
+    def test_between(self):
+        holidays = Holidays()
+        with self.assertNumQueries(1):
+            local_dates = holidays.between(date(2017, 9, 1), date(2017, 12, 25))
+        self.assertEqual(local_dates[0], date(2017, 9, 30))
+        self.assertEqual(local_dates[-1], date(2017, 12, 25))
+        self.assertEqual(
+            local_dates,
+            sorted(
+                d
+                for d in holidays.cached_local_dates
+                if date(2017, 9, 1) <= d <= date(2017, 12, 25)
+            ),
+        )
+        self.assertEqual(holidays.between(date(2017, 9, 1), date(2017, 9, 29)), [])
+
+    def test_local_dates_between(self):
+        self.assertEqual(
+            list(
+                Holiday.objects.local_dates_between(
+                    "botswana", date(2017, 9, 30), date(2017, 12, 26), chunk_size=1
+                )
+            ),
+            sorted(
+                Holiday.objects.filter(
+                    country="botswana",
+                    local_date__range=(date(2017, 9, 30), date(2017, 12, 26)),
+                ).values_list("local_date", flat=True)
+            ),
+        )
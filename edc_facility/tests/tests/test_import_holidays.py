@@ -0,0 +1,238 @@
+import gzip
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.exceptions import HolidayImportError
+from edc_facility.holiday_file import iter_holiday_file
+from edc_facility.import_holidays import (
+    HolidayDiff,
+    apply_holiday_diff,
+    import_file,
+    import_holidays,
+)
+from edc_facility.models import Holiday
+
+
+@override_settings(SITE_ID=20)
+class TestImportHolidays(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+
+    def setUp(self):
+        self.path = settings.HOLIDAY_FILE
+        self.count = len(list(iter_holiday_file(self.path)))
+
+    def test_import_holidays(self):
+        import_holidays()
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+
+    def test_import_file_upserts(self):
+        Holiday.objects.create(country="botswana", local_date=date(2017, 4, 14), name="blah")
+        count = import_file(self.path, Holiday)
+        self.assertEqual(count, self.count)
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+        self.assertEqual(
+            Holiday.objects.get(country="botswana", local_date=date(2017, 4, 14)).name,
+            "Good Friday",
+        )
+        # again, nothing added
+        import_file(self.path, Holiday)
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+
+    def test_import_file_in_chunks(self):
+        with CaptureQueriesContext(connection) as context:
+            import_file(self.path, Holiday, chunk_size=10)
+        inserts = [q for q in context.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 5)
+        self.assertLess(len(context.captured_queries), 10)
+
+    def test_reimport_query_count(self):
+        import_holidays()
+        Holiday.objects.bulk_create(
+            [
+                Holiday(country="botswana", local_date=date(2000, 1, 1) + timedelta(days=i))
+                for i in range(2000)
+            ]
+        )
+        # one DELETE, one INSERT per chunk and the savepoints of the
+        # transactions, whatever the number of rows replaced
+        with CaptureQueriesContext(connection) as context:
+            with self.assertNumQueries(6):
+                import_holidays()
+        statements = [q["sql"].split()[0] for q in context.captured_queries]
+        self.assertEqual(statements.count("DELETE"), 1)
+        self.assertEqual(statements.count("INSERT"), 1)
+        self.assertNotIn("SELECT", statements)
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+
+    def test_import_file_reports_rows_per_second(self):
+        with patch("sys.stdout", new_callable=StringIO) as stdout:
+            import_file(self.path, Holiday, verbose=True)
+        self.assertIn(f"Imported {self.count} holidays in", stdout.getvalue())
+        self.assertIn("rows/s", stdout.getvalue())
+
+    def write_file(self, folder: str, lines: list[str], compress: bool | None = None) -> str:
+        path = Path(folder) / ("holidays.csv.gz" if compress else "holidays.csv")
+        with gzip.open(path, "wt") if compress else open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return str(path)
+
+    def test_import_file_gzip(self):
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        with TemporaryDirectory() as folder:
+            path = self.write_file(folder, lines, compress=True)
+            self.assertEqual(import_file(path, Holiday), self.count)
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+
+    def test_import_file_without_header(self):
+        with TemporaryDirectory() as folder:
+            path = self.write_file(
+                folder, ["2017-01-01,New Year,botswana", "2017-01-02,Public Holiday,botswana"]
+            )
+            self.assertEqual(import_file(path, Holiday), 2)
+
+    def test_import_file_with_other_header(self):
+        with TemporaryDirectory() as folder:
+            path = self.write_file(
+                folder,
+                [
+                    "date,label,country",
+                    "2017-01-01,New Year,botswana",
+                    "2017-01-02,Public Holiday,botswana",
+                ],
+            )
+            self.assertEqual(import_file(path, Holiday), 2)
+            self.assertEqual([line_num for line_num, _ in iter_holiday_file(path)], [2, 3])
+
+    def test_import_file_invalid_first_row_without_header(self):
+        with TemporaryDirectory() as folder:
+            path = self.write_file(
+                folder, ["2017-13-01,Bad Month,botswana", "2017-01-02,Public Holiday,botswana"]
+            )
+            with self.assertRaises(HolidayImportError) as cm:
+                import_file(path, Holiday)
+        self.assertIn("Line 1: Invalid local_date", str(cm.exception))
+
+    def test_import_file_reports_all_errors(self):
+        with TemporaryDirectory() as folder:
+            path = self.write_file(
+                folder,
+                [
+                    "local_date,label,country",
+                    "2017-01-01,New Year,botswana",
+                    "2017-13-01,Bad Month,botswana",
+                    "2017-01-03,No Country,",
+                    "2017-01-01,New Year,botswana",
+                    "2017-01-04,Fine,botswana",
+                ],
+            )
+            with self.assertRaises(HolidayImportError) as cm:
+                import_file(path, Holiday, chunk_size=1)
+        message = str(cm.exception)
+        self.assertIn("Got 3 errors", message)
+        self.assertIn("Line 3: Invalid local_date", message)
+        self.assertIn("Line 4: Invalid country", message)
+        self.assertIn("Line 5: Duplicate date for country", message)
+        # nothing written
+        self.assertEqual(Holiday.objects.all().count(), 0)
+
+    def test_import_holidays_invalid_file_keeps_existing(self):
+        import_holidays()
+        with TemporaryDirectory() as folder:
+            path = self.write_file(folder, ["2017-01-01,New Year,botswana", "blah,,"])
+            with override_settings(HOLIDAY_FILE=path):
+                self.assertRaises(HolidayImportError, import_holidays)
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+
+    def change_holidays(self):
+        Holiday.objects.filter(country="botswana", local_date=date(2017, 4, 14)).update(
+            name="blah"
+        )
+        Holiday.objects.filter(country="botswana", local_date=date(2017, 4, 17)).delete()
+        Holiday.objects.create(country="botswana", local_date=date(2017, 4, 18), name="extra")
+
+    def test_incremental_without_changes(self):
+        import_holidays()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(1):
+                diff = import_holidays(incremental=True)
+        self.assertEqual(len(diff), 0)
+        self.assertEqual(len(callbacks), 0)
+
+    def test_incremental(self):
+        import_holidays()
+        self.change_holidays()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            diff = import_holidays(incremental=True)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            [(obj.local_date, obj.name) for obj in diff.inserts],
+            [(date(2017, 4, 17), "Easter Monday")],
+        )
+        self.assertEqual(
+            [(obj.local_date, obj.name, old_name) for obj, old_name in diff.updates],
+            [(date(2017, 4, 14), "Good Friday", "blah")],
+        )
+        self.assertEqual([obj.local_date for obj in diff.deletes], [date(2017, 4, 18)])
+        self.assertEqual(Holiday.objects.all().count(), self.count)
+        self.assertEqual(
+            Holiday.objects.get(country="botswana", local_date=date(2017, 4, 14)).name,
+            "Good Friday",
+        )
+        self.assertFalse(
+            Holiday.objects.filter(country="botswana", local_date=date(2017, 4, 18)).exists()
+        )
+        self.assertEqual(len(import_holidays(incremental=True)), 0)
+
+    def test_apply_holiday_diff_deletes_in_chunks(self):
+        Holiday.objects.bulk_create(
+            [
+                Holiday(country="botswana", local_date=date(2000, 1, 1) + timedelta(days=i))
+                for i in range(25)
+            ]
+        )
+        diff = HolidayDiff(deletes=list(Holiday.objects.all()))
+        with CaptureQueriesContext(connection) as context:
+            apply_holiday_diff(diff, Holiday, chunk_size=10)
+        statements = [q["sql"].split()[0] for q in context.captured_queries]
+        self.assertEqual(statements.count("DELETE"), 3)
+        self.assertNotIn("SELECT", statements)
+        self.assertEqual(Holiday.objects.all().count(), 0)
+
+    def test_dry_run(self):
+        import_holidays()
+        self.change_holidays()
+        diff = import_holidays(dry_run=True)
+        self.assertEqual(len(diff), 3)
+        self.assertEqual(
+            Holiday.objects.get(country="botswana", local_date=date(2017, 4, 14)).name, "blah"
+        )
+        out = StringIO()
+        with patch("sys.stdout", new_callable=StringIO) as stdout:
+            call_command("import_holidays", dry_run=True, stdout=out)
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "+ 2017-04-17 botswana Easter Monday",
+                "~ 2017-04-14 botswana blah -> Good Friday",
+                "- 2017-04-18 botswana extra",
+                "1 to insert, 1 to update, 1 to delete.",
+            ],
+        )
@@ -0,0 +1,115 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import FR, MO, TH, TU, WE
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.facility import Facility
+from edc_facility.holiday_cache import holiday_cache
+from edc_facility.holidays import Holidays
+from edc_facility.import_holidays import import_holidays
+from edc_facility.instrumentation import (
+    add_count,
+    instrument,
+    measure,
+    site_instruments,
+)
+
+utc = ZoneInfo("UTC")
+
+
+@override_settings(SITE_ID=20)
+class TestInstrumentation(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        holiday_cache.clear()
+        site_instruments.reset()
+        self.facility = Facility(
+            name="clinic", days=[MO, TU, WE, TH, FR], slots=[100, 100, 100, 100, 100]
+        )
+
+    def tearDown(self):
+        site_instruments.reset()
+
+    def test_inactive(self):
+        self.assertFalse(site_instruments.active)
+        with measure("outer") as measurement:
+            self.facility.available_arr(datetime(2017, 1, 7, tzinfo=utc))
+        # only the explicit measure, the facility call is not measured
+        self.assertEqual(measurement.name, "outer")
+        self.assertGreater(measurement.candidates, 0)
+
+    def test_instrument_collects_measurements(self):
+        with instrument() as measurements:
+            self.assertTrue(site_instruments.active)
+            self.facility.available_arr(datetime(2017, 1, 7, tzinfo=utc))
+        self.assertFalse(site_instruments.active)
+        # the nested call is emitted first
+        self.assertEqual(
+            [m.name for m in measurements],
+            ["Facility.available_datetime", "Facility.available_arr"],
+        )
+        for measurement in measurements:
+            self.assertGreater(measurement.seconds, 0)
+            # a Saturday, then Sunday and Friday
+            self.assertEqual(measurement.candidates, 3)
+
+    def test_cache_hits_and_misses(self):
+        with instrument() as measurements:
+            self.facility.available_datetime(datetime(2017, 1, 9, tzinfo=utc))
+            self.facility.available_datetime(datetime(2017, 1, 9, tzinfo=utc))
+        first, second = measurements
+        self.assertEqual((first.cache_hits, first.cache_misses), (0, 1))
+        self.assertEqual((second.cache_hits, second.cache_misses), (1, 0))
+
+    def test_query_budget_warm_cache(self):
+        self.facility.available_arr(datetime(2017, 1, 9, tzinfo=utc))
+        with instrument() as measurements:
+            self.facility.available_arr(datetime(2017, 1, 9, tzinfo=utc))
+        self.assertEqual(measurements[-1].queries, 0)
+
+    def test_query_budget_cold_cache(self):
+        with instrument() as measurements:
+            self.facility.available_arr(datetime(2017, 1, 9, tzinfo=utc))
+        self.assertLessEqual(measurements[-1].queries, 1)
+
+    def test_is_holiday_query_budget(self):
+        holidays = Holidays()
+        holidays.is_holiday(datetime(2017, 9, 30, tzinfo=utc))
+        with instrument() as measurements:
+            self.assertTrue(holidays.is_holiday(datetime(2017, 9, 30, tzinfo=utc)))
+        self.assertEqual(measurements[-1].queries, 0)
+        self.assertEqual(measurements[-1].cache_hits, 1)
+
+    def test_register_callback(self):
+        received = []
+        site_instruments.register(received.append)
+        site_instruments.register(received.append)
+        self.assertTrue(site_instruments.active)
+        self.facility.available_arr(datetime(2017, 1, 9, tzinfo=utc))
+        self.assertEqual(
+            [m.name for m in received],
+            ["Facility.available_datetime", "Facility.available_arr"],
+        )
+        site_instruments.unregister(received.append)
+        self.assertFalse(site_instruments.active)
+        self.facility.available_arr(datetime(2017, 1, 9, tzinfo=utc))
+        self.assertEqual(len(received), 2)
+
+    def test_nested_counts(self):
+        with measure("outer") as outer:
+            with measure("inner") as inner:
+                add_count("candidates", 2)
+            add_count("candidates")
+        self.assertEqual(inner.candidates, 2)
+        self.assertEqual(outer.candidates, 3)
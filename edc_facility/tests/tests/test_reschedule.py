@@ -0,0 +1,210 @@
+import csv
+import json
+import pickle
+from datetime import datetime, timedelta
+from io import StringIO
+from tempfile import NamedTemporaryFile
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import MO, relativedelta
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.constants import FIVE_DAY_CLINIC
+from edc_facility.exceptions import FacilityError
+from edc_facility.facility import Facility
+from edc_facility.import_holidays import import_holidays
+from edc_facility.reschedule import (
+    FacilitySnapshot,
+    iter_available_datetimes,
+    read_rows,
+)
+from edc_facility.utils import get_facility
+
+
+class NoMondayFacility(Facility):
+    def open_slot_on(self, arr):
+        return None if arr.weekday() == 0 else arr
+
+
+@override_settings(SITE_ID=20)
+class TestReschedule(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        self.facility = get_facility(FIVE_DAY_CLINIC)
+        start = datetime(2017, 4, 1, 9, tzinfo=ZoneInfo("UTC"))
+        self.requests = [
+            (start + timedelta(days=i % 45), relativedelta(days=7), relativedelta(days=i % 3))
+            for i in range(200)
+        ]
+
+    def test_snapshot(self):
+        snapshot = FacilitySnapshot.from_facility(
+            self.facility,
+            taken_datetimes=[datetime(2017, 4, 3, 9, tzinfo=ZoneInfo("UTC"))],
+        )
+        snapshot = pickle.loads(pickle.dumps(snapshot))
+        with self.assertNumQueries(0):
+            available_datetimes = snapshot.available_datetimes(self.requests)
+        self.assertEqual(
+            available_datetimes,
+            self.facility.available_datetimes(
+                self.requests,
+                taken_datetimes=[datetime(2017, 4, 3, 9, tzinfo=ZoneInfo("UTC"))],
+                update_taken=False,
+            ),
+        )
+
+    def test_iter_available_datetimes_in_input_order(self):
+        snapshot = FacilitySnapshot.from_facility(self.facility)
+        expected = snapshot.available_datetimes(self.requests)
+        self.assertEqual(
+            list(iter_available_datetimes(snapshot, self.requests, workers=1, chunk_size=7)),
+            expected,
+        )
+        self.assertEqual(
+            list(iter_available_datetimes(snapshot, self.requests, workers=2, chunk_size=7)),
+            expected,
+        )
+
+    def test_snapshot_keeps_facility_subclass(self):
+        facility = NoMondayFacility(name="clinic", days=[0, 1, 2, 3, 4])
+        snapshot = pickle.loads(pickle.dumps(FacilitySnapshot.from_facility(facility)))
+        self.assertIsInstance(snapshot.get_facility(), NoMondayFacility)
+        expected = facility.available_datetimes(self.requests, update_taken=False)
+        self.assertNotIn(0, [dt.weekday() for dt in expected])
+        self.assertEqual(snapshot.available_datetimes(self.requests), expected)
+        self.assertEqual(
+            list(iter_available_datetimes(snapshot, self.requests, workers=2, chunk_size=50)),
+            expected,
+        )
+
+    def test_snapshot_facility_class_not_importable(self):
+        class LocalFacility(Facility):
+            pass
+
+        self.assertRaises(
+            FacilityError,
+            FacilitySnapshot.from_facility,
+            LocalFacility(name="clinic", days=[0, 1, 2, 3, 4]),
+        )
+
+    def write_csv(self, f):
+        writer = csv.DictWriter(
+            f, fieldnames=["subject_identifier", "suggested_datetime", "forward_delta_days"]
+        )
+        writer.writeheader()
+        for i, (dt, _, _) in enumerate(self.requests):
+            writer.writerow(
+                dict(
+                    subject_identifier=f"S{i:04d}",
+                    suggested_datetime=dt.isoformat(),
+                    forward_delta_days=7,
+                )
+            )
+        f.flush()
+
+    def test_command_csv(self):
+        expected = self.facility.available_datetimes(
+            [(dt, relativedelta(days=7), None) for dt, _, _ in self.requests],
+            update_taken=False,
+        )
+        with NamedTemporaryFile("w", suffix=".csv") as f:
+            self.write_csv(f)
+            for workers, batch_size in [(1, 100_000), (1, 70), (2, 70)]:
+                with self.subTest(workers=workers, batch_size=batch_size):
+                    out = StringIO()
+                    call_command(
+                        "reschedule",
+                        FIVE_DAY_CLINIC,
+                        file=f.name,
+                        workers=workers,
+                        chunk_size=11,
+                        batch_size=batch_size,
+                        stdout=out,
+                    )
+                    rows = list(csv.DictReader(StringIO(out.getvalue())))
+                    self.assertEqual(
+                        [row["subject_identifier"] for row in rows],
+                        [f"S{i:04d}" for i in range(200)],
+                    )
+                    self.assertEqual(
+                        [datetime.fromisoformat(row["available_datetime"]) for row in rows],
+                        expected,
+                    )
+
+    def test_command_json_lines(self):
+        with NamedTemporaryFile("w", suffix=".json") as f:
+            for i, (dt, _, _) in enumerate(self.requests[:10]):
+                f.write(json.dumps(dict(id=i, suggested_datetime=dt.isoformat())) + "\n")
+            f.flush()
+            out = StringIO()
+            call_command(
+                "reschedule",
+                FIVE_DAY_CLINIC,
+                file=f.name,
+                format="json",
+                workers=1,
+                stdout=out,
+            )
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["id"] for row in rows], list(range(10)))
+        self.assertEqual(
+            [datetime.fromisoformat(row["available_datetime"]) for row in rows],
+            self.facility.available_datetimes(
+                [(dt, None, None) for dt, _, _ in self.requests[:10]], update_taken=False
+            ),
+        )
+
+    def test_command_invalid_row(self):
+        with NamedTemporaryFile("w", suffix=".csv") as f:
+            f.write("suggested_datetime\nblah\n")
+            f.flush()
+            self.assertRaises(
+                CommandError, call_command, "reschedule", FIVE_DAY_CLINIC, file=f.name
+            )
+
+    def test_command_no_available_date(self):
+        facility = Facility(
+            name="clinic", days=[MO], slots=[100], best_effort_available_datetime=False
+        )
+        with NamedTemporaryFile("w", suffix=".csv") as f:
+            # a Tuesday, no Monday in the window
+            f.write("suggested_datetime,forward_delta_days\n2017-04-04T09:00:00,3\n")
+            f.flush()
+            with patch(
+                "edc_facility.management.commands.reschedule.get_facility",
+                return_value=facility,
+            ):
+                with self.assertRaises(CommandError) as cm:
+                    call_command(
+                        "reschedule",
+                        FIVE_DAY_CLINIC,
+                        file=f.name,
+                        workers=1,
+                        stdout=StringIO(),
+                    )
+        self.assertIn("No available appointment dates", str(cm.exception))
+
+    def test_read_rows_streams(self):
+        for format, text in [
+            ("csv", "suggested_datetime\n2017-04-04T09:00:00\n2017-04-05T09:00:00\n"),
+            ("json", '{"suggested_datetime": "2017-04-04T09:00:00"}\n\n{"blah"\n'),
+        ]:
+            with self.subTest(format=format):
+                rows = read_rows(StringIO(text), format)
+                # the next row is not read until needed
+                self.assertEqual(next(rows), {"suggested_datetime": "2017-04-04T09:00:00"})
+        rows = read_rows(StringIO(' \n[{"id": 1}, {"id": 2}]'), "json")
+        self.assertEqual(list(rows), [{"id": 1}, {"id": 2}])
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import FR, MO, WE, relativedelta
+from django.contrib.sites.models import Site
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.facility import Facility
+from edc_facility.holiday_cache import holiday_cache
+from edc_facility.import_holidays import import_holidays
+from edc_facility.models import SlotReservation
+
+
+@override_settings(SITE_ID=20)
+class TestReservation(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        self.site = Site.objects.get(id=20)
+        self.facility = Facility(name="clinic", days=[MO, WE, FR], slots=[2, 2, 2])
+
+    def test_reserve_and_release(self):
+        reserve_date = date(2017, 3, 6)
+        self.assertTrue(SlotReservation.objects.reserve("clinic", 20, reserve_date, 2))
+        self.assertTrue(SlotReservation.objects.reserve("clinic", 20, reserve_date, 2))
+        self.assertFalse(SlotReservation.objects.reserve("clinic", 20, reserve_date, 2))
+        self.assertTrue(SlotReservation.objects.reserve("clinic", 20, reserve_date))
+        self.assertEqual(SlotReservation.objects.get(reserved_date=reserve_date).booked, 3)
+        self.assertTrue(SlotReservation.objects.release("clinic", 20, reserve_date))
+        self.assertEqual(SlotReservation.objects.get(reserved_date=reserve_date).booked, 2)
+        self.assertFalse(SlotReservation.objects.release("clinic", 20, date(2017, 3, 8)))
+
+    def test_reserve_slot_uses_facility_slots(self):
+        self.assertTrue(self.facility.reserve_slot(date(2017, 3, 6)))
+        self.assertTrue(self.facility.reserve_slot(date(2017, 3, 6)))
+        self.assertFalse(self.facility.reserve_slot(date(2017, 3, 6)))
+        self.assertTrue(self.facility.reserve_slot(date(2017, 3, 6), force=True))
+        # closed on Tuesday
+        self.assertFalse(self.facility.reserve_slot(date(2017, 3, 7)))
+
+    def test_available_arr_skips_reserved_dates(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))
+        available_dates = [
+            self.facility.available_arr(
+                suggested_datetime=suggested_datetime,
+                forward_delta=relativedelta(days=10),
+                reverse_delta=relativedelta(days=0),
+                reserve=True,
+            ).date()
+            for _ in range(5)
+        ]
+        self.assertEqual(
+            available_dates,
+            [date(2017, 3, 6), date(2017, 3, 6), date(2017, 3, 8), date(2017, 3, 8)]
+            + [date(2017, 3, 10)],
+        )
+        self.assertEqual(
+            list(SlotReservation.objects.order_by("reserved_date").values_list("booked")),
+            [(2,), (2,), (1,)],
+        )
+
+    def test_available_arr_without_reserve(self):
+        self.facility.available_arr(
+            suggested_datetime=datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))
+        )
+        self.assertEqual(SlotReservation.objects.all().count(), 0)
+
+    def test_available_datetimes_reserve(self):
+        suggested_datetime = datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC"))
+        self.facility.reserve_slot(date(2017, 3, 6))
+        self.facility.reserve_slot(date(2017, 3, 6))
+        available_datetimes = self.facility.available_datetimes(
+            [(suggested_datetime, relativedelta(days=10), None)] * 2,
+            update_taken=False,
+            reserve=True,
+        )
+        self.assertEqual(
+            [dt.date() for dt in available_datetimes], [date(2017, 3, 8), date(2017, 3, 8)]
+        )
+
+
+@override_settings(SITE_ID=20)
+class TestReservationConcurrency(SiteTestCaseMixin, TransactionTestCase):
+    def setUp(self):
+        sites.initialize()
+        sites.register(*self.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+        holiday_cache.clear()
+        self.facility = Facility(name="clinic", days=[MO, WE, FR], slots=[2, 2, 2])
+
+    def reserve_with_retry(self, results: list, errors: list) -> None:
+        """Books one appointment, retrying if the database is busy.
+
+        SQLite may raise "database is locked", or "database table is
+        locked" for the shared in-memory test database, instead of
+        waiting on a concurrent write.
+        """
+        try:
+            for _ in range(500):
+                try:
+                    available_arr = self.facility.available_arr(
+                        suggested_datetime=datetime(2017, 3, 6, 9, tzinfo=ZoneInfo("UTC")),
+                        forward_delta=relativedelta(days=28),
+                        reverse_delta=relativedelta(days=0),
+                        reserve=True,
+                    )
+                except OperationalError:
+                    time.sleep(0.001)
+                else:
+                    results.append(available_arr.date())
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_reservations_never_exceed_slots(self):
+        results, errors = [], []
+        threads = [
+            threading.Thread(target=self.reserve_with_retry, args=(results, errors))
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 16)
+        counts = Counter(results)
+        self.assertTrue(all(count <= 2 for count in counts.values()), counts)
+        self.assertEqual(
+            {obj.reserved_date: obj.booked for obj in SlotReservation.objects.all()},
+            {k: v for k, v in counts.items()},
+        )
+        # 16 bookings at 2 slots per day fill the first 8 open days
+        self.assertEqual(sorted(counts.values()), [2] * 8)
@@ -0,0 +1,107 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from edc_sites.site import sites
+from edc_sites.tests import SiteTestCaseMixin
+from edc_sites.utils import add_or_update_django_sites
+
+from edc_facility.holiday_cache import HolidayCache, holiday_cache
+from edc_facility.import_holidays import import_holidays
+from edc_facility.models import Holiday
+from edc_facility.shared_holiday_cache import SharedHolidayCache
+
+
+@override_settings(
+    SITE_ID=20,
+    EDC_FACILITY_HOLIDAY_CACHE_ALIAS="default",
+    EDC_FACILITY_HOLIDAY_CACHE_VERSION_INTERVAL=0,
+)
+class TestSharedHolidayCache(SiteTestCaseMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites.initialize()
+        sites.register(*cls.get_default_sites())
+        add_or_update_django_sites()
+        import_holidays()
+
+    def setUp(self):
+        cache.clear()
+        holiday_cache.clear()
+        self.shared = SharedHolidayCache("default")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_nodes_share_holidays(self):
+        node1, node2 = HolidayCache(), HolidayCache()
+        with self.assertNumQueries(1):
+            local_dates = node1.get(Holiday, "botswana")
+        with self.assertNumQueries(0):
+            self.assertEqual(node2.get(Holiday, "botswana"), local_dates)
+        self.assertEqual(
+            self.shared.get("edc_facility.holiday", "botswana", self.shared.get_version()),
+            local_dates,
+        )
+
+    def test_clear_bumps_version(self):
+        node1, node2 = HolidayCache(), HolidayCache()
+        node1.get(Holiday, "botswana")
+        node2.get(Holiday, "botswana")
+        version = self.shared.get_version()
+        node1.clear()
+        self.assertEqual(self.shared.get_version(), version + 1)
+        # node2 sees the new version and reloads
+        with self.assertNumQueries(1):
+            node2.get(Holiday, "botswana")
+        with self.assertNumQueries(0):
+            node1.get(Holiday, "botswana")
+
+    def test_version_checked_once_per_interval(self):
+        node1, node2 = HolidayCache(), HolidayCache()
+        node2.get(Holiday, "botswana")
+        with override_settings(EDC_FACILITY_HOLIDAY_CACHE_VERSION_INTERVAL=60):
+            node1.clear()
+            with self.assertNumQueries(0):
+                node2.get(Holiday, "botswana")
+        with self.assertNumQueries(1):
+            node2.get(Holiday, "botswana")
+
+    def test_holiday_save_and_delete_bump_version(self):
+        version = self.shared.get_version()
+        obj = Holiday.objects.create(
+            country="botswana", local_date=date(2017, 9, 29), name="x"
+        )
+        self.assertEqual(self.shared.get_version(), version + 1)
+        obj.delete()
+        self.assertEqual(self.shared.get_version(), version + 2)
+
+    def test_import_holidays_bumps_version_once(self):
+        version = self.shared.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_holidays()
+        self.assertEqual(self.shared.get_version(), version + 1)
+
+    def test_evicted_version_starts_new_version(self):
+        node = HolidayCache()
+        node.get(Holiday, "botswana")
+        version = self.shared.get_version()
+        cache.delete(SharedHolidayCache.version_key)
+        self.assertNotEqual(self.shared.bump(), version)
+        with self.assertNumQueries(1):
+            node.get(Holiday, "botswana")
+
+    async def test_aget_shares_holidays(self):
+        node1, node2 = HolidayCache(), HolidayCache()
+        local_dates = await node1.aget(Holiday, "botswana")
+        self.assertEqual(await node2.aget(Holiday, "botswana"), local_dates)
+        self.assertEqual(node2.get(Holiday, "botswana"), local_dates)
+
+    @override_settings(EDC_FACILITY_HOLIDAY_CACHE_ALIAS=None)
+    def test_not_shared(self):
+        cache.clear()
+        node = HolidayCache()
+        node.get(Holiday, "botswana")
+        node.clear()
+        self.assertIsNone(cache.get(SharedHolidayCache.version_key))
@@ -1,4 +1,8 @@
 import os
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from django.apps import apps as django_apps
 from django.conf import settings
@@ -9,6 +13,10 @@ from edc_sites.tests import SiteTestCaseMixin
 from edc_sites.utils import add_or_update_django_sites
 from multisite import SiteID
 
+from edc_facility.holiday_file import (
+    get_holiday_file_cache_path,
+    get_holiday_file_countries,
+)
 from edc_facility.import_holidays import import_holidays
 from edc_facility.system_checks import holiday_country_check, holiday_path_check
 
@@ -52,3 +60,107 @@ class TestSystemChecks(SiteTestCaseMixin, TestCase):
         app_configs = django_apps.get_app_configs()
         errors = holiday_country_check(app_configs=app_configs)
         self.assertIn("edc_facility.W002", [error.id for error in errors])
+
+    @override_settings(
+        HOLIDAY_FILE=os.path.join(settings.BASE_DIR, "edc_facility", "tests", "holidays.csv"),
+        SITE_ID=SiteID(default=10),
+    )
+    def test_reports_all_unknown_and_missing_countries(self):
+        with TemporaryDirectory() as folder:
+            with override_settings(
+                EDC_FACILITY_HOLIDAY_FILE_CACHE=os.path.join(folder, "cache.json")
+            ):
+                errors = holiday_country_check(app_configs=None)
+        self.assertEqual(["edc_facility.W002", "edc_facility.W003"], [e.id for e in errors])
+        for country in ["malawi", "south africa", "uganda", "zimbabwe"]:
+            self.assertIn(country, errors[0].msg)
+        self.assertIn("namibia", errors[1].msg)
+
+    @override_settings(SITE_ID=SiteID(default=10))
+    def test_row_without_country(self):
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, "holidays.csv")
+            with open(path, "w") as f:
+                f.write("local_date,label,country\n2017-01-01,New Year\n2017-01-02,x,mars\n")
+            with override_settings(
+                HOLIDAY_FILE=path,
+                EDC_FACILITY_HOLIDAY_FILE_CACHE=os.path.join(folder, "cache.json"),
+            ):
+                errors = holiday_country_check(app_configs=None)
+        self.assertEqual(
+            ["edc_facility.W004", "edc_facility.W002", "edc_facility.W003"],
+            [e.id for e in errors],
+        )
+        self.assertIn("without a country", errors[0].msg)
+        self.assertIn("mars", errors[1].msg)
+
+    @override_settings(SITE_ID=SiteID(default=10))
+    def test_header_not_counted_as_country(self):
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, "holidays.csv")
+            with open(path, "w") as f:
+                f.write("date,label,country\n2017-01-01,New Year,botswana\n")
+            with override_settings(
+                HOLIDAY_FILE=path,
+                EDC_FACILITY_HOLIDAY_FILE_CACHE=os.path.join(folder, "cache.json"),
+            ):
+                errors = holiday_country_check(app_configs=None)
+        self.assertEqual(["edc_facility.W003"], [e.id for e in errors])
+
+
+class TestHolidayFileCache(TestCase):
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.path = Path(self.folder.name) / "holidays.csv"
+        shutil.copy(
+            os.path.join(settings.BASE_DIR, "edc_facility", "tests", "holidays.csv"),
+            self.path,
+        )
+        cache_path = os.path.join(self.folder.name, "cache", "cache.json")
+        self.override = override_settings(EDC_FACILITY_HOLIDAY_FILE_CACHE=cache_path)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.folder.cleanup()
+
+    def test_warm_start_skips_scan(self):
+        countries = get_holiday_file_countries(self.path)
+        self.assertIn("botswana", countries)
+        with patch("edc_facility.holiday_file.iter_holiday_file") as mock_iter:
+            with patch("edc_facility.holiday_file.get_file_digest") as mock_digest:
+                self.assertEqual(get_holiday_file_countries(self.path), countries)
+        mock_iter.assert_not_called()
+        mock_digest.assert_not_called()
+
+    def test_touched_file_is_hashed_not_scanned(self):
+        countries = get_holiday_file_countries(self.path)
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with patch("edc_facility.holiday_file.iter_holiday_file") as mock_iter:
+            self.assertEqual(get_holiday_file_countries(self.path), countries)
+        mock_iter.assert_not_called()
+
+    def test_changed_file_is_scanned(self):
+        get_holiday_file_countries(self.path)
+        with open(self.path, "a") as f:
+            f.write("2017-01-01,New Year,namibia\n")
+        self.assertIn("namibia", get_holiday_file_countries(self.path))
+
+    def test_default_cache_path_is_per_user(self):
+        with override_settings():
+            del settings.EDC_FACILITY_HOLIDAY_FILE_CACHE
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": self.folder.name}):
+                cache_path = get_holiday_file_cache_path()
+                get_holiday_file_countries(self.path)
+        self.assertEqual(
+            cache_path,
+            Path(self.folder.name) / "edc_facility" / "holiday_file_cache.json",
+        )
+        self.assertTrue(cache_path.exists())
+        self.assertEqual(cache_path.parent.stat().st_mode & 0o777, 0o700)
+
+    def test_cache_disabled(self):
+        with override_settings(EDC_FACILITY_HOLIDAY_FILE_CACHE=None):
+            self.assertIn("botswana", get_holiday_file_countries(self.path))
+        self.assertFalse((Path(self.folder.name) / "cache").exists())
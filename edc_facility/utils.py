@@ -6,7 +6,8 @@ from django.apps import apps as django_apps
 from django.conf import settings
 
 from .default_definitions import default_definitions
-from .facility import Facility, FacilityError
+from .facility import Facility, FacilityError  # noqa: F401
+from .site_facilities import site_facilities
 
 if TYPE_CHECKING:
     from .models import HealthFacility, Holiday
@@ -29,19 +30,18 @@ def get_facility_definitions():
 
 
 def get_facilities() -> dict[str, Facility]:
-    """Returns a dictionary of facilities."""
-    return {k: Facility(name=k, **v) for k, v in get_facility_definitions().items()}
+    """Returns a dictionary of the shared facility instances.
+
+    See also `site_facilities`.
+    """
+    return dict(site_facilities.registry)
 
 
 def get_facility(name: str = None) -> Facility:
-    """Returns a facility instance for this name, if it exists,
-    or raises.
+    """Returns the shared facility instance for this name, if it
+    exists, or raises.
     """
-    facilities = get_facilities()
-    facility = facilities.get(name)
-    if not facility:
-        raise FacilityError(f"Facility '{name}' does not exist. Expected one of {facilities}.")
-    return facility
+    return site_facilities.get(name)
 
 
 def get_health_facility_model_cls() -> Type[HealthFacility]:
@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+app_name = "edc_facility"
+if __name__ == "__main__":
+    os.environ["DJANGO_SETTINGS_MODULE"] = f"{app_name}.tests.benchmark_settings"
+    from edc_facility.tests.benchmarks import main
+
+    sys.exit(main(sys.argv[1:]))